@@ -0,0 +1,173 @@
+"""combined purchase orders
+
+Revision ID: a7c2d5e8b913
+Revises: f1a6c3e9d024
+Create Date: 2026-10-19 21:14:08.362915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2d5e8b913'
+down_revision: Union[str, Sequence[str], None] = 'f1a6c3e9d024'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _status_type() -> Union[tuple, None]:
+    """(enum type name, uppercase labels?) of purchase_orders.status, None for a text column."""
+    row = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT t.typname, bool_and(e.enumlabel = upper(e.enumlabel))
+            FROM pg_attribute a
+            JOIN pg_type t ON t.oid = a.atttypid
+            JOIN pg_enum e ON e.enumtypid = t.oid
+            WHERE a.attrelid = CAST('purchase_orders' AS regclass) AND a.attname = 'status'
+            GROUP BY t.typname
+            """
+        )
+    ).first()
+    return tuple(row) if row else None
+
+
+def _status_label(status: str) -> str:
+    """The stored spelling of a status value (see c3d8f2a61e47)."""
+    status_type = _status_type()
+    return status.upper() if status_type and status_type[1] else status
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    order_columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("purchase_orders")}
+    ex_vat = "total_tp" if "total_tp" in order_columns else "total_ex_vat"
+    vat = "total_vat" if "total_vat" in order_columns else "vat_amount"
+    approved = _status_label("approved")
+    combined = _status_label("combined")
+
+    status_type = _status_type()
+    if status_type:
+        # A new enum value can't be used in the transaction that adds it
+        with op.get_context().autocommit_block():
+            op.execute(f"ALTER TYPE {status_type[0]} ADD VALUE IF NOT EXISTS '{combined}'")
+
+    # A combined order is the supplier PO for a batch of dealer orders; it
+    # has no dealer of its own
+    op.alter_column("purchase_orders", "dealer_id", existing_type=sa.UUID(), nullable=True)
+    op.create_check_constraint(
+        "ck_purchase_orders_dealer_id",
+        "purchase_orders",
+        f"dealer_id IS NOT NULL OR status = '{combined}'",
+    )
+    op.create_index(
+        "ix_purchase_orders_combined_po_id",
+        "purchase_orders",
+        ["combined_po_id"],
+        unique=False,
+        postgresql_where=sa.text("combined_po_id IS NOT NULL"),
+    )
+
+    inc_vat_column = ", total_inc_vat" if "total_inc_vat" in order_columns else ""
+    inc_vat_value = ", v_ex_vat + v_vat" if "total_inc_vat" in order_columns else ""
+
+    # Locks the approved, not yet combined orders selected by id and/or
+    # po_date range, creates the combined order with their lines summed
+    # per product, and links them to it, in one transaction. Raises
+    # no_data_found (P0002) when nothing is left to combine.
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION consolidate_purchase_orders(
+            p_created_by uuid,
+            p_po_ids integer[] DEFAULT NULL,
+            p_start timestamptz DEFAULT NULL,
+            p_end timestamptz DEFAULT NULL
+        ) RETURNS json
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_members integer[];
+            v_po_id integer;
+            v_po_number text;
+            v_ex_vat numeric;
+            v_vat numeric;
+            v_lines integer;
+            v_quantity bigint;
+        BEGIN
+            SELECT array_agg(po_id ORDER BY po_id) INTO v_members
+            FROM (
+                SELECT po_id FROM purchase_orders
+                WHERE status = '{approved}' AND combined_po_id IS NULL
+                  AND (p_po_ids IS NULL OR po_id = ANY(p_po_ids))
+                  AND (p_start IS NULL OR po_date >= p_start)
+                  AND (p_end IS NULL OR po_date < p_end)
+                FOR UPDATE
+            ) m;
+            IF v_members IS NULL THEN
+                RAISE EXCEPTION 'No approved purchase orders to consolidate' USING ERRCODE = 'no_data_found';
+            END IF;
+
+            SELECT COALESCE(SUM(CAST({ex_vat} AS numeric)), 0), COALESCE(SUM(CAST({vat} AS numeric)), 0)
+            INTO v_ex_vat, v_vat
+            FROM purchase_orders WHERE po_id = ANY(v_members);
+
+            v_po_id := nextval(pg_get_serial_sequence('purchase_orders', 'po_id'));
+            v_po_number := 'CPO-' || to_char(now(), 'YYYYMMDD') || '-' || v_po_id;
+            INSERT INTO purchase_orders (
+                po_id, po_number, dealer_id, created_by_user, po_date, status, {ex_vat}, {vat}, vat_percent{inc_vat_column}
+            )
+            VALUES (
+                v_po_id, v_po_number, NULL, p_created_by, now(), '{combined}', v_ex_vat, v_vat,
+                CASE WHEN v_ex_vat = 0 THEN 0 ELSE round(v_vat * 100 / v_ex_vat, 2) END{inc_vat_value}
+            );
+
+            INSERT INTO purchase_order_items (po_id, product_id, pack_size_snapshot, quantity, unit_price, total_price)
+            SELECT v_po_id, product_id, max(pack_size_snapshot), SUM(quantity),
+                   round(COALESCE(SUM(total_price), 0) / SUM(quantity), 2), COALESCE(SUM(total_price), 0)
+            FROM purchase_order_items
+            WHERE po_id = ANY(v_members)
+            GROUP BY product_id;
+            GET DIAGNOSTICS v_lines = ROW_COUNT;
+
+            SELECT COALESCE(SUM(quantity), 0) INTO v_quantity FROM purchase_order_items WHERE po_id = v_po_id;
+
+            UPDATE purchase_orders SET combined_po_id = v_po_id WHERE po_id = ANY(v_members);
+
+            RETURN json_build_object(
+                'po_id', v_po_id,
+                'po_number', v_po_number,
+                'po_ids', to_json(v_members),
+                'line_count', v_lines,
+                'total_quantity', v_quantity,
+                'total_tp', v_ex_vat,
+                'total_vat', v_vat
+            );
+        END;
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    combined = _status_label("combined")
+    op.execute("DROP FUNCTION IF EXISTS consolidate_purchase_orders(uuid, integer[], timestamptz, timestamptz)")
+    op.drop_index(
+        "ix_purchase_orders_combined_po_id",
+        table_name="purchase_orders",
+        postgresql_where=sa.text("combined_po_id IS NOT NULL"),
+    )
+    # Combined orders can't exist without the nullable dealer_id; release
+    # their members and drop them. The enum value itself stays (Postgres
+    # can't remove enum values)
+    op.execute("UPDATE purchase_orders SET combined_po_id = NULL WHERE combined_po_id IS NOT NULL")
+    op.execute(
+        f"DELETE FROM purchase_order_items WHERE po_id IN "
+        f"(SELECT po_id FROM purchase_orders WHERE status = '{combined}')"
+    )
+    op.execute(f"DELETE FROM purchase_orders WHERE status = '{combined}'")
+    op.drop_constraint("ck_purchase_orders_dealer_id", "purchase_orders", type_="check")
+    op.alter_column("purchase_orders", "dealer_id", existing_type=sa.UUID(), nullable=False)
@@ -0,0 +1,96 @@
+"""dealer customer code allocator
+
+Revision ID: b7e41c9d2a10
+Revises: 3a3ae6ba37ca
+Create Date: 2026-10-19 09:12:41.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e41c9d2a10'
+down_revision: Union[str, Sequence[str], None] = '3a3ae6ba37ca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Customer codes are allocated from a sequence seeded past the highest
+    # numeric code already in use, so deletions never cause reuse.
+    op.execute("CREATE SEQUENCE IF NOT EXISTS dealer_customer_code_seq")
+    op.execute(
+        """
+        SELECT setval(
+            'dealer_customer_code_seq',
+            COALESCE(
+                (SELECT MAX(customer_code::bigint) FROM dealers WHERE customer_code ~ '^[0-9]+$'),
+                0
+            ) + 1,
+            false
+        )
+        """
+    )
+
+    # Creates the buyer user and its dealer in a single transaction and
+    # returns both rows. A duplicate email raises unique_violation (23505).
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION create_dealer_with_user(
+            p_email text,
+            p_password_hash text,
+            p_full_name text,
+            p_user_contact_number text,
+            p_company_name text,
+            p_contact_person text,
+            p_contact_number text,
+            p_billing_address text,
+            p_shipping_address text
+        ) RETURNS json
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_user users%ROWTYPE;
+            v_dealer dealers%ROWTYPE;
+            v_code text;
+        BEGIN
+            INSERT INTO users (user_id, email, password_hash, full_name, role, contact_number, status)
+            VALUES (gen_random_uuid(), lower(p_email), p_password_hash, p_full_name, 'buyer', p_user_contact_number, 'active')
+            RETURNING * INTO v_user;
+
+            -- Skip codes that were entered by hand and already taken
+            LOOP
+                v_code := nextval('dealer_customer_code_seq')::text;
+                EXIT WHEN NOT EXISTS (SELECT 1 FROM dealers WHERE customer_code = v_code);
+            END LOOP;
+
+            INSERT INTO dealers (
+                dealer_id, customer_code, company_name, contact_person, contact_number,
+                billing_address, shipping_address, user_id
+            )
+            VALUES (
+                gen_random_uuid(), v_code, p_company_name, p_contact_person, p_contact_number,
+                p_billing_address, p_shipping_address, v_user.user_id
+            )
+            RETURNING * INTO v_dealer;
+
+            RETURN json_build_object(
+                'user', to_jsonb(v_user) - 'password_hash',
+                'dealer', to_jsonb(v_dealer)
+            );
+        END;
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "DROP FUNCTION IF EXISTS create_dealer_with_user(text, text, text, text, text, text, text, text, text)"
+    )
+    op.execute("DROP SEQUENCE IF EXISTS dealer_customer_code_seq")
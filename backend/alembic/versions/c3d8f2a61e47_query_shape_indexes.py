@@ -0,0 +1,102 @@
+"""query shape indexes
+
+Revision ID: c3d8f2a61e47
+Revises: b7e41c9d2a10
+Create Date: 2026-10-19 13:05:18.226410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8f2a61e47'
+down_revision: Union[str, Sequence[str], None] = 'b7e41c9d2a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _status_label(table: str, status: str) -> str:
+    """
+    The stored spelling of a status value. Enums created by earlier
+    migrations use upper-case labels while the Supabase tables hold the
+    lower-case values the services write; a partial index predicate has to
+    use the same spelling as the queries to be usable.
+    """
+    label = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT e.enumlabel
+            FROM pg_attribute a
+            JOIN pg_enum e ON e.enumtypid = a.atttypid
+            WHERE a.attrelid = CAST(:table AS regclass) AND a.attname = 'status'
+              AND lower(e.enumlabel) = :status
+            """
+        ),
+        {"table": table, "status": status},
+    ).scalar()
+    return label or status
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    approved = _status_label("purchase_orders", "approved")
+    active = _status_label("products", "active")
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Built concurrently so the tables stay writable; that can't run inside
+    # the migration transaction
+    with op.get_context().autocommit_block():
+        # Dealer order lists: created_by_user [+ status] ORDER BY po_id DESC.
+        # The first one also serves the old single-column index's lookups
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_purchase_orders_created_by_user_po_id "
+            "ON purchase_orders (created_by_user, po_id DESC)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_purchase_orders_created_by_user_status_po_id "
+            "ON purchase_orders (created_by_user, status, po_id DESC)"
+        )
+        # Status counts and status + date ranges (dashboard pending/revenue)
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_purchase_orders_status_po_date "
+            "ON purchase_orders (status, po_date DESC)"
+        )
+        # Approved-order aggregations read only approved rows
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_purchase_orders_approved_dealer_id_po_date "
+            f"ON purchase_orders (dealer_id, po_date) WHERE status = '{approved}'"
+        )
+        # Recent orders: ORDER BY po_date DESC LIMIT n
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_purchase_orders_po_date "
+            "ON purchase_orders (po_date DESC)"
+        )
+        # Catalog search: status = active AND name ILIKE '%term%'
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_active_name_trgm "
+            f"ON products USING gin (name gin_trgm_ops) WHERE status = '{active}'"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_purchase_orders_created_by_user")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_purchase_orders_created_by_user "
+            "ON purchase_orders (created_by_user)"
+        )
+        for name in (
+            "ix_products_active_name_trgm",
+            "ix_purchase_orders_po_date",
+            "ix_purchase_orders_approved_dealer_id_po_date",
+            "ix_purchase_orders_status_po_date",
+            "ix_purchase_orders_created_by_user_status_po_id",
+            "ix_purchase_orders_created_by_user_po_id",
+        ):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    # pg_trgm is left installed; other objects may depend on it
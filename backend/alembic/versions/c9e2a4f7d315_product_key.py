@@ -0,0 +1,47 @@
+"""product key
+
+Revision ID: c9e2a4f7d315
+Revises: b8d3f6a1c024
+Create Date: 2026-10-21 09:12:44.519873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e2a4f7d315'
+down_revision: Union[str, Sequence[str], None] = 'b8d3f6a1c024'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The catalog import's product identity (scripts/import_products.py
+# product_keys): case-insensitive name plus pack size
+PRODUCT_KEY = "lower(btrim(name)) || '|' || lower(btrim(coalesce(pack_size, '')))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    duplicates = op.get_bind().execute(
+        sa.text(f"SELECT {PRODUCT_KEY} AS product_key FROM products GROUP BY 1 HAVING count(*) > 1 LIMIT 20")
+    ).scalars().all()
+    if duplicates:
+        # Products may be referenced by purchase orders, so they are not
+        # merged here; rename or remove the duplicates first
+        raise RuntimeError(f"products has duplicate name/pack size pairs: {', '.join(duplicates)}")
+
+    # A stored generated column rather than an expression index, so that
+    # PostgREST can name it in on_conflict
+    op.add_column(
+        "products",
+        sa.Column("product_key", sa.Text(), sa.Computed(PRODUCT_KEY, persisted=True), nullable=True),
+    )
+    op.create_index("ux_products_product_key", "products", ["product_key"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ux_products_product_key", table_name="products")
+    op.drop_column("products", "product_key")
@@ -0,0 +1,113 @@
+"""snapshot order prices
+
+Revision ID: d4a9e17b3c58
+Revises: c3d8f2a61e47
+Create Date: 2026-10-19 15:42:07.813952
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9e17b3c58'
+down_revision: Union[str, Sequence[str], None] = 'c3d8f2a61e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    order_columns = {c["name"] for c in inspector.get_columns("purchase_orders")}
+
+    # Orders store the VAT rate their totals were computed at. The Supabase
+    # tables name the totals total_tp/total_vat, the models total_ex_vat/vat_amount
+    op.execute("ALTER TABLE purchase_orders ADD COLUMN IF NOT EXISTS vat_percent numeric(5, 2)")
+    ex_vat = "total_tp" if "total_tp" in order_columns else "total_ex_vat"
+    vat = "total_vat" if "total_vat" in order_columns else "vat_amount"
+
+    # Current VAT rate for orders that never stored one (app_settings holds a fraction)
+    current_vat = "15"
+    if inspector.has_table("app_settings"):
+        current_vat = (
+            "COALESCE((SELECT (value::json->>'vat')::numeric * 100 FROM app_settings "
+            "WHERE key = 'invoice' LIMIT 1), 15)"
+        )
+
+    # Lines written without a price snapshot get the catalog price they have
+    # been served at until now
+    op.execute(
+        """
+        UPDATE purchase_order_items i
+        SET unit_price = p.trade_price_incl_vat
+        FROM products p
+        WHERE p.product_id = i.product_id AND i.unit_price IS NULL
+        """
+    )
+    op.execute(
+        """
+        UPDATE purchase_order_items
+        SET total_price = unit_price * quantity
+        WHERE total_price IS NULL AND unit_price IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        UPDATE purchase_order_items i
+        SET pack_size_snapshot = p.pack_size
+        FROM products p
+        WHERE p.product_id = i.product_id AND i.pack_size_snapshot IS NULL
+        """
+    )
+
+    op.execute(
+        f"""
+        UPDATE purchase_orders o
+        SET {ex_vat} = s.total
+        FROM (
+            SELECT po_id, COALESCE(SUM(total_price), 0) AS total
+            FROM purchase_order_items
+            GROUP BY po_id
+        ) s
+        WHERE s.po_id = o.po_id AND o.{ex_vat} IS NULL
+        """
+    )
+    # Derive the rate from stored totals where both exist, so old orders keep
+    # the VAT they were charged
+    op.execute(
+        f"""
+        UPDATE purchase_orders
+        SET vat_percent = CASE
+            WHEN {vat} IS NOT NULL AND CAST({ex_vat} AS numeric) > 0
+                THEN round(CAST({vat} AS numeric) * 100 / CAST({ex_vat} AS numeric), 2)
+            ELSE {current_vat}
+        END
+        WHERE vat_percent IS NULL
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE purchase_orders
+        SET {vat} = round(CAST({ex_vat} AS numeric) * vat_percent / 100, 2)
+        WHERE {vat} IS NULL AND {ex_vat} IS NOT NULL
+        """
+    )
+    if "total_inc_vat" in order_columns:
+        op.execute(
+            f"""
+            UPDATE purchase_orders
+            SET total_inc_vat = CAST({ex_vat} AS numeric) + CAST({vat} AS numeric)
+            WHERE total_inc_vat IS NULL AND {ex_vat} IS NOT NULL AND {vat} IS NOT NULL
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The backfilled values are kept: they are what these orders were
+    # served at. vat_percent is part of the model schema, so it stays too.
+    pass
@@ -0,0 +1,140 @@
+"""data version sequences
+
+Revision ID: e3f7b1c8a592
+Revises: c9e2a4f7d315
+Create Date: 2026-10-21 14:37:05.184226
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f7b1c8a592'
+down_revision: Union[str, Sequence[str], None] = 'c9e2a4f7d315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same set as f1a6c3e9d024
+VERSIONED_TABLES = (
+    "products", "dealers", "purchase_orders", "purchase_order_items",
+    "invoices", "invoice_items", "app_settings",
+)
+
+
+def _sequence(table: str) -> str:
+    return f"data_version_{table}_seq"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    tables = [t for t in VERSIONED_TABLES if inspector.has_table(t)]
+    current = dict(op.get_bind().execute(sa.text("SELECT name, version FROM data_versions")).all())
+
+    for table in tables:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_data_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS data_versions_bump()")
+    op.drop_table("data_versions")
+
+    # One sequence per table instead of a counter row: nextval takes no row
+    # lock, so concurrent writers no longer queue (or deadlock) on the
+    # counter. Each sequence continues from the table's current version
+    for table in tables:
+        op.execute(f"CREATE SEQUENCE {_sequence(table)} MINVALUE 0")
+        op.execute(
+            sa.text(f"SELECT setval('{_sequence(table)}', :version, true)").bindparams(version=int(current.get(table, 0)))
+        )
+
+    # Bumps once per table and transaction, from a deferred row trigger, so
+    # the new version appears at commit time rather than while the writing
+    # transaction is still open. A reader can still catch a bump in the
+    # instant before the commit becomes visible. The transaction-local flag
+    # skips the remaining row events. TRUNCATE has statement triggers only
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION data_versions_bump() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_flag text := 'data_versions.' || TG_TABLE_NAME;
+        BEGIN
+            IF TG_LEVEL = 'ROW' THEN
+                IF current_setting(v_flag, true) = '1' THEN
+                    RETURN NULL;
+                END IF;
+                PERFORM set_config(v_flag, '1', true);
+            END IF;
+            PERFORM nextval(format('%I', 'data_version_' || TG_TABLE_NAME || '_seq')::regclass);
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    for table in tables:
+        op.execute(
+            f"CREATE CONSTRAINT TRIGGER {table}_data_version AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION data_versions_bump()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_data_version_truncate AFTER TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION data_versions_bump()"
+        )
+
+    # Readers keep selecting name, version from data_versions
+    op.execute(
+        "CREATE VIEW data_versions AS "
+        + " UNION ALL ".join(
+            f"SELECT CAST('{table}' AS varchar(63)) AS name, last_value AS version FROM {_sequence(table)}"
+            for table in tables
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    current = dict(bind.execute(sa.text("SELECT name, version FROM data_versions")).all())
+    tables = list(current)
+
+    op.execute("DROP VIEW data_versions")
+    for table in tables:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_data_version ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_data_version_truncate ON {table}")
+        op.execute(f"DROP SEQUENCE IF EXISTS {_sequence(table)}")
+    op.execute("DROP FUNCTION IF EXISTS data_versions_bump()")
+
+    # The counter table and statement triggers of f1a6c3e9d024
+    op.create_table(
+        "data_versions",
+        sa.Column("name", sa.String(length=63), nullable=False),
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION data_versions_bump() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO data_versions AS v (name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (name) DO UPDATE
+            SET version = v.version + 1, updated_at = now();
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    for table in tables:
+        op.execute(
+            sa.text("INSERT INTO data_versions (name, version) VALUES (:name, :version)")
+            .bindparams(name=table, version=int(current[table]))
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION data_versions_bump()"
+        )
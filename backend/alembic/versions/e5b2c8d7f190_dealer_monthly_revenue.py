@@ -0,0 +1,133 @@
+"""dealer monthly revenue
+
+Revision ID: e5b2c8d7f190
+Revises: d4a9e17b3c58
+Create Date: 2026-10-19 17:20:44.091376
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c8d7f190'
+down_revision: Union[str, Sequence[str], None] = 'd4a9e17b3c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _status_label(table: str, status: str) -> str:
+    """The stored spelling of a status value (see c3d8f2a61e47)."""
+    label = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT e.enumlabel
+            FROM pg_attribute a
+            JOIN pg_enum e ON e.enumtypid = a.atttypid
+            WHERE a.attrelid = CAST(:table AS regclass) AND a.attname = 'status'
+              AND lower(e.enumlabel) = :status
+            """
+        ),
+        {"table": table, "status": status},
+    ).scalar()
+    return label or status
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    order_columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("purchase_orders")}
+    ex_vat = "total_tp" if "total_tp" in order_columns else "total_ex_vat"
+    vat = "total_vat" if "total_vat" in order_columns else "vat_amount"
+    approved = _status_label("purchase_orders", "approved")
+
+    op.create_table(
+        "dealer_monthly_revenue",
+        sa.Column("year", sa.SmallInteger(), nullable=False),
+        sa.Column("month", sa.SmallInteger(), nullable=False),
+        sa.Column("dealer_id", sa.UUID(), nullable=False),
+        sa.Column("order_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("revenue_ex_vat", sa.Numeric(precision=14, scale=2), server_default="0", nullable=False),
+        sa.Column("revenue_vat", sa.Numeric(precision=14, scale=2), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["dealer_id"], ["dealers.dealer_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("year", "month", "dealer_id"),
+    )
+
+    # Adds one order's contribution (or removes it, with negative values)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION dealer_monthly_revenue_apply(
+            p_dealer_id uuid, p_po_date timestamptz, p_orders integer, p_ex_vat numeric, p_vat numeric
+        ) RETURNS void
+        LANGUAGE sql
+        AS $$
+            INSERT INTO dealer_monthly_revenue AS r (year, month, dealer_id, order_count, revenue_ex_vat, revenue_vat)
+            VALUES (
+                EXTRACT(YEAR FROM p_po_date), EXTRACT(MONTH FROM p_po_date), p_dealer_id,
+                p_orders, COALESCE(p_ex_vat, 0), COALESCE(p_vat, 0)
+            )
+            ON CONFLICT (year, month, dealer_id) DO UPDATE
+            SET order_count = r.order_count + EXCLUDED.order_count,
+                revenue_ex_vat = r.revenue_ex_vat + EXCLUDED.revenue_ex_vat,
+                revenue_vat = r.revenue_vat + EXCLUDED.revenue_vat
+        $$
+        """
+    )
+    # Approval, un-approval, deletion and edits of an approved order's
+    # dealer/date/totals all move revenue between buckets the same way:
+    # take the old row out, put the new row in
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION purchase_orders_revenue_rollup() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = '{approved}' THEN
+                PERFORM dealer_monthly_revenue_apply(
+                    OLD.dealer_id, OLD.po_date, -1,
+                    -CAST(OLD.{ex_vat} AS numeric), -CAST(OLD.{vat} AS numeric)
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = '{approved}' THEN
+                PERFORM dealer_monthly_revenue_apply(
+                    NEW.dealer_id, NEW.po_date, 1,
+                    CAST(NEW.{ex_vat} AS numeric), CAST(NEW.{vat} AS numeric)
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+
+    # No approvals may land between the backfill and the triggers
+    op.execute("LOCK TABLE purchase_orders IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(
+        "CREATE TRIGGER purchase_orders_revenue_rollup_write AFTER INSERT OR DELETE ON purchase_orders "
+        "FOR EACH ROW EXECUTE FUNCTION purchase_orders_revenue_rollup()"
+    )
+    op.execute(
+        f"CREATE TRIGGER purchase_orders_revenue_rollup_update "
+        f"AFTER UPDATE OF status, dealer_id, po_date, {ex_vat}, {vat} ON purchase_orders "
+        f"FOR EACH ROW EXECUTE FUNCTION purchase_orders_revenue_rollup()"
+    )
+    op.execute(
+        f"""
+        INSERT INTO dealer_monthly_revenue (year, month, dealer_id, order_count, revenue_ex_vat, revenue_vat)
+        SELECT EXTRACT(YEAR FROM po_date), EXTRACT(MONTH FROM po_date), dealer_id, count(*),
+               COALESCE(SUM(CAST({ex_vat} AS numeric)), 0), COALESCE(SUM(CAST({vat} AS numeric)), 0)
+        FROM purchase_orders
+        WHERE status = '{approved}'
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS purchase_orders_revenue_rollup_update ON purchase_orders")
+    op.execute("DROP TRIGGER IF EXISTS purchase_orders_revenue_rollup_write ON purchase_orders")
+    op.execute("DROP FUNCTION IF EXISTS purchase_orders_revenue_rollup()")
+    op.execute("DROP FUNCTION IF EXISTS dealer_monthly_revenue_apply(uuid, timestamptz, integer, numeric, numeric)")
+    op.drop_table("dealer_monthly_revenue")
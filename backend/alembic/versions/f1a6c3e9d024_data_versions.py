@@ -0,0 +1,70 @@
+"""data versions
+
+Revision ID: f1a6c3e9d024
+Revises: e5b2c8d7f190
+Create Date: 2026-10-19 19:02:31.550148
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a6c3e9d024'
+down_revision: Union[str, Sequence[str], None] = 'e5b2c8d7f190'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose writes invalidate cached responses (invoices and
+# invoice_items only exist in the Supabase schema)
+VERSIONED_TABLES = (
+    "products", "dealers", "purchase_orders", "purchase_order_items",
+    "invoices", "invoice_items", "app_settings",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    tables = [t for t in VERSIONED_TABLES if inspector.has_table(t)]
+
+    op.create_table(
+        "data_versions",
+        sa.Column("name", sa.String(length=63), nullable=False),
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    # Statement level: a bulk update bumps the version once, not per row
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION data_versions_bump() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO data_versions AS v (name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (name) DO UPDATE
+            SET version = v.version + 1, updated_at = now();
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    for table in tables:
+        op.execute(sa.text("INSERT INTO data_versions (name) VALUES (:name)").bindparams(name=table))
+        op.execute(
+            f"CREATE TRIGGER {table}_data_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION data_versions_bump()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for table in (t for t in VERSIONED_TABLES if inspector.has_table(t)):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_data_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS data_versions_bump()")
+    op.drop_table("data_versions")
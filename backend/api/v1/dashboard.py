@@ -1,19 +1,47 @@
 # backend/api/v1/dashboard.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from api.v1.deps import get_current_user, require_roles
+from core.http_cache import check_not_modified
 from models.user import UserRole
 from services.dashboard_service import DashboardService
+from services.data_version_service import DASHBOARD_TABLES, DataVersionService
 
 router = APIRouter()
 
 @router.get("/stats", tags=["Dashboard"])
 def get_dashboard_stats(
+    request: Request,
+    response: Response,
     current_user = Depends(require_roles(UserRole.admin))
 ):
     """
-    Get dashboard statistics (Admin only)
+    Get dashboard statistics (Admin only). Answers If-None-Match with 304
+    while the underlying data is unchanged.
     """
     if current_user["role"] != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
-    
+
+    # The monthly series moves with the calendar, not only with the data
+    today = datetime.now(timezone.utc).date().isoformat()
+    etag = DataVersionService.etag(DASHBOARD_TABLES, request.url.path, str(current_user["user_id"]), today)
+    check_not_modified(request, response, etag)
     return DashboardService.get_stats(current_user["user_id"], current_user["role"])
+
+
+@router.get("/revenue", tags=["Dashboard"])
+def get_revenue(
+    period: Optional[str] = Query(None, description="6m, 12m (default) or ytd, ending with the current month"),
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="First month (YYYY-MM) of a custom range"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Last month (YYYY-MM) of a custom range"),
+    top_dealers: int = Query(5, ge=0, le=100),
+    current_user = Depends(require_roles(UserRole.admin))
+):
+    """
+    Approved-order revenue per calendar month (keyed YYYY-MM) and the top
+    dealers over a period (Admin only). Served from the monthly rollup, so
+    the cost depends on the length of the range, not the number of orders.
+    """
+    return DashboardService.get_revenue(period, start, end, top_dealers)
+
@@ -1,11 +1,13 @@
 """
 Dealers API endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from api.v1.deps import require_roles
 from models.user import UserRole
-from schemas.dealer import DealerCreate, DealerUpdate, DealerBase, DealerWithUserCreate, DealerWithUserRead
+from schemas.dealer import DealerCreate, DealerUpdate, DealerBase, DealerWithUserCreate, DealerWithUserRead, DealerList
 from services.dealer_service_supabase import DealerServiceSB as DealerService  # <- use Supabase service
 
 router = APIRouter()
@@ -72,9 +74,21 @@ def admin_create_dealer(
     }
 
 
-@router.get("/admin/all", status_code=status.HTTP_200_OK)
+@router.get("/admin/all", response_model=DealerList, status_code=status.HTTP_200_OK)
 def admin_get_all_dealers(
+    search: Optional[str] = Query(None, description="Search by company name or customer code"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=1000),
+    sort_by: Literal["company_name", "customer_code", "created_at"] = Query("company_name"),
+    sort_order: Literal["asc", "desc"] = Query("asc"),
     current_user = Depends(require_roles(UserRole.admin)),
 ):
-    """Admin endpoint: Get all dealers with user information"""
-    return DealerService.get_all_dealers()
+    """Admin endpoint: Get dealers with user information, paginated"""
+    dealers, total = DealerService.get_all_dealers(
+        skip=skip,
+        limit=limit,
+        search=search,
+        sort_by=sort_by,
+        sort_order=sort_order,
+    )
+    return DealerList(items=dealers, total=total, skip=skip, limit=limit)
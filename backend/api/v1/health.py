@@ -0,0 +1,41 @@
+# backend/api/v1/health.py
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, status
+
+from core.document_pool import document_pool_ready
+from services.settings_service_supabase import SettingsServiceSB
+
+router = APIRouter()
+
+TEMPLATES_DIR = Path(__file__).parent.parent.parent / "static" / "templates"
+REQUIRED_TEMPLATES = ("invoice_template.docx", "purchase_order_template.docx")
+
+
+@router.get("/live", tags=["Health"])
+def liveness():
+    """
+    Liveness probe: the process is up and serving requests
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready", tags=["Health"])
+def readiness():
+    """
+    Readiness probe: settings cache loaded (Supabase reachable), document
+    pool warmed and document templates present. 503 until all pass.
+    """
+    checks = {}
+    try:
+        SettingsServiceSB.get_settings()
+        checks["settings_cache"] = "ok"
+    except HTTPException:
+        checks["settings_cache"] = "unavailable"
+    checks["document_pool"] = "ok" if document_pool_ready() else "starting"
+    missing = [name for name in REQUIRED_TEMPLATES if not (TEMPLATES_DIR / name).exists()]
+    checks["templates"] = "ok" if not missing else f"missing: {', '.join(missing)}"
+
+    if any(result != "ok" for result in checks.values()):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=checks)
+    return {"status": "ok", "checks": checks}
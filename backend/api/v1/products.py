@@ -3,8 +3,10 @@ Public/Buyer-facing Product API endpoints.
 """
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
+from core.http_cache import check_not_modified
+from services.data_version_service import PRODUCT_TABLES, DataVersionService
 from services.product_service_supabase import ProductServiceSB as ProductService
 from schemas.product import ProductRead, ProductList
 
@@ -13,14 +15,19 @@ router = APIRouter()
 
 @router.get("/", response_model=ProductList)
 def list_active_products(
+    request: Request,
+    response: Response,
     search: Optional[str] = Query(None, description="Search products by name"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
 ):
     """
     List all active products with pagination.
-    Supports searching by name.
+    Supports searching by name. Answers If-None-Match with 304 while the
+    catalog is unchanged.
     """
+    etag = DataVersionService.etag(PRODUCT_TABLES, request.url.path, request.url.query, ProductService.signed_url_epoch())
+    check_not_modified(request, response, etag, cache_control="no-cache")
     products = ProductService.get_products(skip=skip, limit=limit, search=search)
     total = ProductService.get_products_count(search=search)
     return ProductList(
@@ -32,10 +39,12 @@ def list_active_products(
 
 
 @router.get("/{product_id}", response_model=ProductRead)
-def get_product_details(product_id: UUID):
+def get_product_details(product_id: UUID, request: Request, response: Response):
     """
     Get details for a specific product by its ID.
     """
+    etag = DataVersionService.etag(PRODUCT_TABLES, request.url.path, ProductService.signed_url_epoch())
+    check_not_modified(request, response, etag, cache_control="no-cache")
     product = ProductService.get_product_by_id(str(product_id))
     if not product:
         raise HTTPException(
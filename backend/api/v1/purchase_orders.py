@@ -1,17 +1,27 @@
 # backend/api/v1/purchase_orders.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from pathlib import Path
 import tempfile
 import logging
 import io
+from typing import Optional, Union
 
 from api.v1.deps import get_current_user
 
 logger = logging.getLogger(__name__)
+from core.document_pool import run_document_job
 from core.security import create_access_token
-from schemas.purchase_order import PurchaseOrderCreate, PurchaseOrderUpdate, PurchaseOrder, PurchaseOrderList, DocumentSchema
+from core.http_cache import check_not_modified
+from core.idempotency import run_idempotent
+from core.serialization import list_response, sparse_response
+from schemas.purchase_order import (
+    PurchaseOrderCreate, PurchaseOrderUpdate, PurchaseOrder, PurchaseOrderList, DocumentSchema, PurchaseOrderSummaryList,
+    PurchaseOrderBulkStatusUpdate, PurchaseOrderBulkStatusResult, PurchaseOrderConsolidate, PurchaseOrderConsolidation,
+)
+from services.data_version_service import ORDER_DETAIL_TABLES, DataVersionService
 from services.purchase_order_service_supabase import PurchaseOrderServiceSB as PurchaseOrderService
 from services.document_generation_sevice import DocumentGenerationService
 from services.invoice_generator_service import InvoiceGeneratorService
@@ -21,36 +31,92 @@ from models.user import UserRole
 
 router = APIRouter()
 
+VIEW_QUERY = Query("full", pattern="^(full|summary)$", description="summary: order rows only, without dealer and items")
+FIELDS_QUERY = Query(None, description="Comma-separated summary fields (implies view=summary)")
+IDEMPOTENCY_KEY_HEADER = Header(
+    None, min_length=1, max_length=255,
+    description="Client-chosen unique key; retries with the same key return the first result instead of creating another order",
+)
+
+
+def _summary_page(fields: Optional[str], skip: int, limit: int, **filters):
+    """A view=summary page: one query, no dealer/item hydration, only the requested fields."""
+    columns = PurchaseOrderService.resolve_summary_fields(fields)
+    orders, total = PurchaseOrderService.get_order_summaries(columns, skip=skip, limit=limit, **filters)
+    return sparse_response(PurchaseOrderSummaryList(items=orders, total=total, skip=skip, limit=limit))
+
+
 
 @router.post("/", response_model=PurchaseOrder, status_code=status.HTTP_201_CREATED, tags=["Purchase Orders"])
 def create_purchase_order(
     order_in: PurchaseOrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
     current_user = Depends(get_current_user),
 ):
     """
-    Create new purchase order (buyer only)
+    Create new purchase order (buyer only). Send an Idempotency-Key to make
+    retries safe: a repeat, or a duplicate sent while the first is still
+    running, returns the original order.
     """
     if current_user["role"] != "buyer":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
-    return PurchaseOrderService.create_purchase_order(order_in, current_user["user_id"])
+    return run_idempotent(
+        idempotency_key, f"create_purchase_order:{current_user['user_id']}", order_in, response,
+        lambda: PurchaseOrderService.create_purchase_order(order_in, current_user["user_id"]),
+    )
 
 
 @router.post("/admin/create-for-dealer", response_model=PurchaseOrder, status_code=status.HTTP_201_CREATED, tags=["Purchase Orders"])
 def admin_create_purchase_order_for_dealer(
     order_in: PurchaseOrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
     current_user = Depends(require_roles(UserRole.admin)),
 ):
     """
     Create purchase order for a specific dealer (admin only)
     Admin can create orders on behalf of dealers
     """
-    return PurchaseOrderService.create_purchase_order_as_admin(order_in, current_user["user_id"])
+    return run_idempotent(
+        idempotency_key, f"create_purchase_order_as_admin:{current_user['user_id']}", order_in, response,
+        lambda: PurchaseOrderService.create_purchase_order_as_admin(order_in, current_user["user_id"]),
+    )
+
+
+@router.post("/admin/bulk-status", response_model=PurchaseOrderBulkStatusResult, tags=["Purchase Orders"])
+def bulk_update_purchase_order_status(
+    body: PurchaseOrderBulkStatusUpdate,
+    current_user = Depends(require_roles(UserRole.admin)),
+):
+    """
+    Move many orders to one status (admin only): approve the month-end
+    batch of submitted orders in one request. Transitions are validated per order; the result
+    lists what happened to each id. Set include_orders to get the updated
+    orders back in full.
+    """
+    return PurchaseOrderService.bulk_transition(body.po_ids, body.status.value, body.include_orders)
+
+
+@router.post("/admin/consolidate", response_model=PurchaseOrderConsolidation, status_code=status.HTTP_201_CREATED, tags=["Purchase Orders"])
+def consolidate_purchase_orders(
+    body: PurchaseOrderConsolidate,
+    current_user = Depends(require_roles(UserRole.admin)),
+):
+    """
+    Combine approved dealer orders into one supplier PO (admin only), with
+    quantities summed per product. Download its document from
+    GET /purchase-orders/{po_id}/po like any other PO.
+    """
+    return PurchaseOrderService.consolidate_orders(current_user["user_id"], body.po_ids, body.start, body.end)
 
 
-@router.get("/my-orders/approved", response_model=PurchaseOrderList, tags=["Purchase Orders"])
+@router.get("/my-orders/approved", response_model=Union[PurchaseOrderList, PurchaseOrderSummaryList], tags=["Purchase Orders"])
 def get_my_approved_purchase_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
+    view: str = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
     current_user = Depends(get_current_user),
 ):
     """
@@ -58,15 +124,19 @@ def get_my_approved_purchase_orders(
     """
     if current_user["role"] != "buyer":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    if view == "summary" or fields:
+        return _summary_page(fields, skip, limit, created_by_user=current_user["user_id"], status="approved")
     orders = PurchaseOrderService.get_my_approved_orders(current_user["user_id"], skip=skip, limit=limit)
     total = PurchaseOrderService.get_my_approved_orders_count(current_user["user_id"])
-    return PurchaseOrderList(items=orders, total=total, skip=skip, limit=limit)
+    return list_response(PurchaseOrderList, items=orders, total=total, skip=skip, limit=limit)
 
 
-@router.get("/my-orders", response_model=PurchaseOrderList, tags=["Purchase Orders"])
+@router.get("/my-orders", response_model=Union[PurchaseOrderList, PurchaseOrderSummaryList], tags=["Purchase Orders"])
 def get_my_purchase_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
+    view: str = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
     current_user = Depends(get_current_user),
 ):
     """
@@ -74,21 +144,29 @@ def get_my_purchase_orders(
     """
     if current_user["role"] != "buyer":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    if view == "summary" or fields:
+        return _summary_page(fields, skip, limit, created_by_user=current_user["user_id"])
     orders = PurchaseOrderService.get_my_orders(current_user["user_id"], skip=skip, limit=limit)
     total = PurchaseOrderService.get_my_orders_count(current_user["user_id"])
-    return PurchaseOrderList(items=orders, total=total, skip=skip, limit=limit)
+    return list_response(PurchaseOrderList, items=orders, total=total, skip=skip, limit=limit)
 
 
 @router.get("/{po_id}", response_model=PurchaseOrder, tags=["Purchase Orders"])
 def get_purchase_order_details(
     po_id: int,
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_user),
 ):
     """
-    Get purchase order details (own orders only)
+    Get purchase order details (own orders only). Answers If-None-Match
+    with 304 while the order data is unchanged.
     """
     if current_user["role"] != "buyer":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    # Per caller, so a validator never vouches for another user's order
+    etag = DataVersionService.etag(ORDER_DETAIL_TABLES, request.url.path, str(current_user["user_id"]))
+    check_not_modified(request, response, etag)
     return PurchaseOrderService.get_purchase_order_details(po_id, current_user["user_id"])
 
 
@@ -118,10 +196,12 @@ def submit_purchase_order(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     return PurchaseOrderService.submit_purchase_order(po_id, current_user["user_id"])
 
-@router.get("/", response_model=PurchaseOrderList, tags=["Purchase Orders"])
-def get_all_purchase_orders(
+@router.get("/", response_model=Union[PurchaseOrderList, PurchaseOrderSummaryList], tags=["Purchase Orders"])
+async def get_all_purchase_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=1000),
+    view: str = VIEW_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
     current_user = Depends(require_roles(UserRole.admin))
 ):
     """
@@ -129,9 +209,10 @@ def get_all_purchase_orders(
     """
     if current_user["role"] != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
-    orders = PurchaseOrderService.get_all_purchase_orders(skip=skip, limit=limit)
-    total = PurchaseOrderService.get_all_purchase_orders_count()
-    return PurchaseOrderList(items=orders, total=total, skip=skip, limit=limit)
+    if view == "summary" or fields:
+        return await run_in_threadpool(_summary_page, fields, skip, limit)
+    orders, total = await PurchaseOrderService.get_all_purchase_orders_page(skip=skip, limit=limit)
+    return list_response(PurchaseOrderList, items=orders, total=total, skip=skip, limit=limit)
 
 @router.get("/{po_id}/invoice", tags=["Purchase Orders"])
 def download_invoice(
@@ -141,43 +222,44 @@ def download_invoice(
     """
     Download invoice for approved purchase order (PDF)
     """
-    logger.info(f"Invoice download request for PO ID: {po_id} by user: {current_user.get('user_id')}")
+    logger.info("Invoice download request for PO ID: %s by user: %s", po_id, current_user.get('user_id'))
     try:
         # Get purchase order details
-        logger.info(f"Fetching purchase order details for PO ID: {po_id}")
+        logger.debug("Fetching purchase order details for PO ID: %s", po_id)
         order = PurchaseOrderService.get_purchase_order_details(po_id, current_user["user_id"])
-        logger.info(f"PO retrieved - Status: {order.get('status')}")
+        logger.debug("PO retrieved - Status: %s", order.get('status'))
 
         if order["status"] != "approved":
-            logger.warning(f"Invoice download attempted for non-approved PO {po_id} - Status: {order['status']}")
+            logger.warning("Invoice download attempted for non-approved PO %s - Status: %s", po_id, order['status'])
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only approved orders can have invoices")
 
         # Get template path
         template_path = Path(__file__).parent.parent.parent / "static" / "templates" / "invoice_template.docx"
-        logger.debug(f"Template path: {template_path}")
+        logger.debug("Template path: %s", template_path)
         if not template_path.exists():
-            logger.error(f"Invoice template not found at: {template_path}")
+            logger.error("Invoice template not found at: %s", template_path)
             raise HTTPException(status_code=500, detail="Invoice template not found")
         
-        logger.info(f"Template found, starting invoice generation")
+        logger.debug("Template found, starting invoice generation")
         # Generate invoice (uses persistent output directory)
-        docx_path, pdf_path = InvoiceGeneratorService.generate_invoice_for_po(
+        docx_path, pdf_path = run_document_job(
+            InvoiceGeneratorService.generate_invoice_for_po,
             po_id=po_id,
             template_path=template_path
         )
         
-        logger.info(f"Invoice generation completed - DOCX: {docx_path}, PDF: {pdf_path}")
+        logger.debug("Invoice generation completed - DOCX: %s, PDF: %s", docx_path, pdf_path)
         
         # Return PDF if available, otherwise DOCX
         # file_to_return = pdf_path if pdf_path and pdf_path.exists() else docx_path
         file_to_return = docx_path
-        logger.info(f"File to return: {file_to_return}")
+        logger.debug("File to return: %s", file_to_return)
         
         if not file_to_return or not file_to_return.exists():
-            logger.error(f"Generated file does not exist: {file_to_return}")
+            logger.error("Generated file does not exist: %s", file_to_return)
             raise HTTPException(status_code=500, detail="Failed to generate invoice")
         
-        logger.info(f"Reading file content: {file_to_return}")
+        logger.debug("Reading file content: %s", file_to_return)
         # Read file content into memory
         with open(file_to_return, "rb") as f:
             file_content = f.read()
@@ -185,7 +267,7 @@ def download_invoice(
         filename = file_to_return.name
         media_type = "application/pdf" if file_to_return.suffix == ".pdf" else "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         
-        logger.info(f"File response - Name: {filename}, Type: {media_type}, Size: {len(file_content)} bytes")
+        logger.debug("File response - Name: %s, Type: %s, Size: %s bytes", filename, media_type, len(file_content))
         
         # Return as streaming response
         return StreamingResponse(
@@ -194,10 +276,10 @@ def download_invoice(
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     except HTTPException:
-        logger.error(f"HTTP Exception raised for PO {po_id}")
+        logger.error("HTTP Exception raised for PO %s", po_id)
         raise
     except Exception as e:
-        logger.error(f"Error generating invoice for PO {po_id}: {str(e)}", exc_info=True)
+        logger.error("Error generating invoice for PO %s: %s", po_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to generate invoice: {str(e)}")
 
 @router.get("/{po_id}/po", tags=["Purchase Orders"])
@@ -209,34 +291,35 @@ def download_po(
     Download PO as PDF or DOCX
     """
     try:
-        logger.info(f"PO download request for PO ID: {po_id}")
+        logger.info("PO download request for PO ID: %s", po_id)
         
         # Get template path
         template_path = Path(__file__).parent.parent.parent / "static" / "templates" / "purchase_order_template.docx"
-        logger.debug(f"Template path: {template_path}")
+        logger.debug("Template path: %s", template_path)
         if not template_path.exists():
-            logger.error(f"PO template not found at: {template_path}")
+            logger.error("PO template not found at: %s", template_path)
             raise HTTPException(status_code=500, detail="PO template not found")
         
-        logger.info(f"Template found, starting PO generation")
+        logger.debug("Template found, starting PO generation")
         # Generate PO (uses persistent output directory)
-        docx_path, pdf_path = POGeneratorService.generate_po_for_dealer(
+        docx_path, pdf_path = run_document_job(
+            POGeneratorService.generate_po_for_dealer,
             po_id=po_id,
             template_path=template_path
         )
         
-        logger.info(f"PO generation completed - DOCX: {docx_path}, PDF: {pdf_path}")
+        logger.debug("PO generation completed - DOCX: %s, PDF: %s", docx_path, pdf_path)
         
         # Return PDF if available, otherwise DOCX
         # file_to_return = pdf_path if pdf_path and pdf_path.exists() else docx_path
         file_to_return = docx_path
-        logger.info(f"File to return: {file_to_return}")
+        logger.debug("File to return: %s", file_to_return)
         
         if not file_to_return or not file_to_return.exists():
-            logger.error(f"Generated file does not exist: {file_to_return}")
+            logger.error("Generated file does not exist: %s", file_to_return)
             raise HTTPException(status_code=500, detail="Failed to generate PO")
         
-        logger.info(f"Reading file content: {file_to_return}")
+        logger.debug("Reading file content: %s", file_to_return)
         # Read file content into memory
         with open(file_to_return, "rb") as f:
             file_content = f.read()
@@ -244,7 +327,7 @@ def download_po(
         filename = file_to_return.name
         media_type = "application/pdf" if file_to_return.suffix == ".pdf" else "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         
-        logger.info(f"File response - Name: {filename}, Type: {media_type}, Size: {len(file_content)} bytes")
+        logger.debug("File response - Name: %s, Type: %s, Size: %s bytes", filename, media_type, len(file_content))
         
         # Return as streaming response
         return StreamingResponse(
@@ -253,10 +336,10 @@ def download_po(
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     except HTTPException:
-        logger.error(f"HTTP Exception raised for PO {po_id}")
+        logger.error("HTTP Exception raised for PO %s", po_id)
         raise
     except Exception as e:
-        logger.error(f"Error generating PO for PO {po_id}: {str(e)}", exc_info=True)
+        logger.error("Error generating PO for PO %s: %s", po_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to generate PO: {str(e)}")
 
 @router.get("/{dealer_id}/{po_id}", response_model=PurchaseOrder, tags=["Purchase Orders"])
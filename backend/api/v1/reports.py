@@ -0,0 +1,49 @@
+# backend/api/v1/reports.py
+import uuid
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from api.v1.deps import require_roles
+from core.query_budget import exempt_from_budget
+from models.purchase_order import PurchaseOrderStatus
+from models.user import UserRole
+from services.export_service import EXPORT_FORMATS, ExportService
+
+router = APIRouter()
+
+
+@router.get("/purchase-orders", tags=["Reports"])
+def export_purchase_orders(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    level: str = Query("orders", pattern="^(orders|lines)$", description="One row per order, or per order line"),
+    start: Optional[date] = Query(None, description="First PO date (inclusive)"),
+    end: Optional[date] = Query(None, description="Last PO date (inclusive)"),
+    order_status: Optional[PurchaseOrderStatus] = Query(None, alias="status"),
+    dealer_id: Optional[uuid.UUID] = None,
+    current_user = Depends(require_roles(UserRole.admin)),
+):
+    """
+    Stream purchase orders as CSV or NDJSON (Admin only).
+    Rows are written as they are fetched, so large periods download with
+    flat server memory; use this instead of paging the list endpoint.
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+    # Query count grows with the export by design
+    exempt_from_budget()
+
+    filters = {
+        "start": start.isoformat() if start else None,
+        "end": (end + timedelta(days=1)).isoformat() if end else None,
+        "status": order_status.value if order_status else None,
+        "dealer_id": str(dealer_id) if dealer_id else None,
+    }
+    filename = f"purchase_orders_{level}_{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        ExportService.stream(format, level, **filters),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
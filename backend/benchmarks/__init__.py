@@ -0,0 +1,12 @@
+"""
+Benchmarks for the API hot paths.
+
+Runs the FastAPI app in-process (TestClient) against the local Supabase
+stand-in, so results depend on the code and the simulated round-trip time,
+not on a shared database:
+
+    python -m benchmarks.run --rtt-ms 20 --output bench/head.json
+    python -m benchmarks.compare bench/base.json bench/head.json
+
+Run from the backend directory. See benchmarks.run for the cases.
+"""
@@ -0,0 +1,61 @@
+"""
+Compare two benchmark result files.
+
+    python -m benchmarks.compare bench/base.json bench/head.json --threshold 10
+
+Prints the median of every case in both files and the relative change.
+Exits with 1 when a case got slower by more than the threshold (percent),
+so it can gate CI. Runs with a different rtt_ms are flagged, since their
+timings are not comparable.
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--metric", default="median_ms", help="statistic to compare (median_ms, p95_ms, ...)")
+    args = parser.parse_args(argv)
+
+    base, head = _load(args.base), _load(args.head)
+    for key in ("rtt_ms", "jitter_ms", "seed_scale"):
+        if base["meta"].get(key) != head["meta"].get(key):
+            print(f"warning: {key} differs ({base['meta'].get(key)} vs {head['meta'].get(key)})", file=sys.stderr)
+
+    print(f"{'case':<22} {'base':>10} {'head':>10} {'change':>8}  queries")
+    regressions = []
+    for name, after in head["results"].items():
+        before = base["results"].get(name)
+        if before is None or "error" in before or "error" in after:
+            status = after.get("error", "new") if before is None or "error" in after else before["error"]
+            print(f"{name:<22} {'-':>10} {'-':>10} {'-':>8}  {status}")
+            continue
+        change = (after[args.metric] - before[args.metric]) / before[args.metric] * 100
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<22} {before[args.metric]:>10.2f} {after[args.metric]:>10.2f} {change:>+7.1f}%  "
+              f"{before.get('queries')} -> {after.get('queries')}{flag}")
+
+    for name in base["results"].keys() - head["results"].keys():
+        print(f"{name:<22} missing from {args.head}")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) slower by more than {args.threshold:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
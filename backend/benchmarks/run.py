@@ -0,0 +1,277 @@
+"""
+Benchmark runner.
+
+Each case issues one HTTP request through TestClient, repeated for a number
+of rounds after a warmup, and records latency statistics plus the Supabase
+calls and response size of one request. Results are written as JSON so two
+commits can be compared with benchmarks.compare.
+
+Cases:
+- login
+- product listing and name search
+- PO create with 1, 10 and 50 items
+- admin PO list pages of 20, 100 and 1000 orders
+- PO detail
+- dashboard stats
+- invoice and PO document generation at 1, 5 and 20 pages
+
+Usage (from the backend directory):
+
+    python -m benchmarks.run --rtt-ms 20 --jitter-ms 2 --rounds 30 --output bench/head.json
+    python -m benchmarks.run --only po_list --only po_detail
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Rows of the invoice/PO item table that fit on one A4 page of the templates
+ITEMS_PER_PAGE = 25
+DOCUMENT_PAGES = [1, 5, 20]
+PO_CREATE_ITEMS = [1, 10, 50]
+PO_LIST_PAGES = [20, 100, 1000]
+
+
+@dataclass
+class Case:
+    name: str
+    request: Callable[[], Any]
+    expected_status: int = 200
+    # Slow cases (bcrypt, document rendering) run fewer rounds
+    rounds: Optional[int] = None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in samples]
+    return {
+        "rounds": len(ms),
+        "min_ms": round(min(ms), 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p95_ms": round(_percentile(ms, 95), 3),
+        "max_ms": round(max(ms), 3),
+        "stdev_ms": round(statistics.stdev(ms), 3) if len(ms) > 1 else 0.0,
+    }
+
+
+def _configure_environment(args) -> None:
+    # Settings are read when core.config is imported, so this runs first
+    os.environ["SUPABASE_MODE"] = "local"
+    os.environ["SUPABASE_LOCAL_LATENCY_MS"] = str(args.rtt_ms)
+    os.environ["SUPABASE_LOCAL_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["SUPABASE_LOCAL_SEED_SCALE"] = str(args.seed_scale)
+    # Budget/N+1 warnings would fire on every round of the large cases
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ.setdefault("TRACING_ENABLED", "false")
+
+
+def _seed_order(db, dealer: Dict[str, Any], product_ids: List[str], items: int, status: str = "approved") -> int:
+    """Insert an order with the given number of lines directly, without latency."""
+    with db.lock:
+        products = {p["product_id"]: p for p in db.table("products")}
+        lines = []
+        for i in range(items):
+            product = products[product_ids[i % len(product_ids)]]
+            lines.append({
+                "product_id": product["product_id"],
+                "quantity": 1 + i % 10,
+                "unit_price": product["trade_price_incl_vat"],
+                "total_price": product["trade_price_incl_vat"] * (1 + i % 10),
+                "pack_size_snapshot": product["pack_size"],
+            })
+        total = sum(line["total_price"] for line in lines)
+        order = db.insert_row("purchase_orders", {
+            "po_number": f"BENCH-{items}-{db.next_value('bench.po_number')}",
+            "dealer_id": dealer["dealer_id"],
+            "created_by_user": dealer["user_id"],
+            "po_date": datetime.now(timezone.utc).isoformat(),
+            "status": status,
+            "total_tp": f"{total:.2f}",
+            "total_vat": f"{total * 0.15:.2f}",
+            "vat_percent": "15.00",
+            "approved_at": datetime.now(timezone.utc).isoformat() if status == "approved" else None,
+            "combined_po_id": None,
+        })
+        for line in lines:
+            db.insert_row("purchase_order_items", {**line, "po_id": order["po_id"]})
+    return order["po_id"]
+
+
+def build_cases(client, seeded: Dict[str, Any], db) -> List[Case]:
+    from core.security import create_access_token
+
+    admin = seeded["admin"]
+    dealer = seeded["dealers"][0]
+    product_ids = seeded["product_ids"]
+    admin_auth = {"Authorization": f"Bearer {create_access_token({'sub': str(admin['user_id'])})}"}
+    dealer_auth = {"Authorization": f"Bearer {create_access_token({'sub': str(dealer['user_id'])})}"}
+    dealer_email = next(u["email"] for u in db.table("users") if u["user_id"] == dealer["user_id"])
+
+    cases = [
+        Case("login", lambda: client.post(
+            "/api/v1/users/login", json={"email": dealer_email, "password": seeded["password"]},
+        ), rounds=10),
+        Case("products_list", lambda: client.get("/api/v1/products/", params={"limit": 20})),
+        Case("products_search", lambda: client.get("/api/v1/products/", params={"search": "Product 01", "limit": 20})),
+    ]
+
+    for items in PO_CREATE_ITEMS:
+        body = {
+            "dealer_id": dealer["dealer_id"],
+            "items": [{"product_id": product_ids[i % len(product_ids)], "quantity": 1 + i % 10} for i in range(items)],
+        }
+        cases.append(Case(
+            f"po_create[{items}]",
+            lambda body=body: client.post("/api/v1/purchase-orders/", json=body, headers=dealer_auth),
+            expected_status=201,
+        ))
+
+    for limit in PO_LIST_PAGES:
+        cases.append(Case(
+            f"po_list[{limit}]",
+            lambda limit=limit: client.get("/api/v1/purchase-orders/", params={"limit": limit}, headers=admin_auth),
+        ))
+
+    detail_id = _seed_order(db, dealer, product_ids, 10)
+    cases.append(Case("po_detail", lambda: client.get(f"/api/v1/purchase-orders/{detail_id}", headers=dealer_auth)))
+    cases.append(Case("dashboard_stats", lambda: client.get("/api/v1/dashboard/stats", headers=admin_auth)))
+
+    for pages in DOCUMENT_PAGES:
+        po_id = _seed_order(db, dealer, product_ids, pages * ITEMS_PER_PAGE)
+        cases.append(Case(
+            f"invoice[{pages}p]",
+            lambda po_id=po_id: client.get(f"/api/v1/purchase-orders/{po_id}/invoice", headers=dealer_auth),
+            rounds=5,
+        ))
+        cases.append(Case(
+            f"po_document[{pages}p]",
+            lambda po_id=po_id: client.get(f"/api/v1/purchase-orders/{po_id}/po", headers=dealer_auth),
+            rounds=5,
+        ))
+    return cases
+
+
+def run_case(case: Case, rounds: int, warmup: int) -> Dict[str, Any]:
+    from core.query_budget import track_queries
+
+    for _ in range(warmup):
+        case.request()
+
+    with track_queries() as queries:
+        response = case.request()
+    if response.status_code != case.expected_status:
+        return {"error": f"HTTP {response.status_code}: {response.text[:200]}"}
+
+    samples = []
+    for _ in range(min(case.rounds, rounds) if case.rounds else rounds):
+        start = time.perf_counter()
+        response = case.request()
+        samples.append(time.perf_counter() - start)
+        if response.status_code != case.expected_status:
+            return {"error": f"HTTP {response.status_code}: {response.text[:200]}"}
+
+    return {
+        **_summarize(samples),
+        "queries": queries.count,
+        "response_bytes": len(response.content),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark API hot paths against the local Supabase stand-in")
+    parser.add_argument("--rtt-ms", type=float, default=20.0, help="simulated Supabase round trip per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="+/- random variation of the round trip")
+    parser.add_argument("--seed-scale", type=int, default=1, help="multiplier of the seeded data set")
+    parser.add_argument("--rounds", type=int, default=20, help="timed requests per case")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed requests per case")
+    parser.add_argument("--only", action="append", default=[], help="run cases whose name starts with this (repeatable)")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    _configure_environment(args)
+
+    from fastapi.testclient import TestClient
+
+    from core.database import get_supabase
+    from local_supabase import ADMIN_EMAIL, DEFAULT_PASSWORD
+    from main import app
+
+    local = get_supabase()
+    db = local.db
+    admin = next(u for u in db.table("users") if u["email"] == ADMIN_EMAIL)
+    dealers = sorted(db.table("dealers"), key=lambda d: d["customer_code"])
+    seeded = {
+        "admin": admin,
+        "password": DEFAULT_PASSWORD,
+        "dealers": dealers,
+        "product_ids": [p["product_id"] for p in db.table("products") if p["status"] == "active"],
+    }
+
+    # Keep generated documents out of the repository's output/ directory
+    from services import invoice_generator_service, po_generator_service
+    document_dir = Path(tempfile.mkdtemp(prefix="benchmarks-"))
+    invoice_generator_service.OUTPUT_DIR = document_dir / "invoices"
+    po_generator_service.OUTPUT_DIR = document_dir / "purchase_orders"
+
+    client = TestClient(app)
+    cases = build_cases(client, seeded, db)
+    if args.only:
+        cases = [c for c in cases if any(c.name.startswith(prefix) for prefix in args.only)]
+
+    results: Dict[str, Any] = {}
+    for case in cases:
+        results[case.name] = run_case(case, args.rounds, args.warmup)
+        outcome = results[case.name]
+        if "error" in outcome:
+            print(f"{case.name:<22} ERROR {outcome['error']}", file=sys.stderr)
+        else:
+            print(f"{case.name:<22} median {outcome['median_ms']:>9.2f} ms  p95 {outcome['p95_ms']:>9.2f} ms  "
+                  f"queries {outcome['queries']:>4}")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rtt_ms": args.rtt_ms,
+            "jitter_ms": args.jitter_ms,
+            "seed_scale": args.seed_scale,
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Serialization benchmark for purchase order list responses.
+
+Loads a page of orders from the local Supabase stand-in once (no simulated
+latency), then times turning it into a response body three ways:
+
+- stdlib: model validation, jsonable_encoder and json.dumps (the path of
+  routes without dump_json, e.g. with a custom response class)
+- validated: model validation and pydantic-core dump_json (what FastAPI
+  does for list endpoints by default)
+- trusted: core.serialization projection and orjson (TRUSTED_LIST_RESPONSES)
+
+Timings are reported per 1000 orders. The trusted body is also checked
+against the validated one: same keys everywhere, values compared after
+both are parsed.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.serialization --orders 1000 --rounds 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _keys(value: Any, path: str = "") -> List[str]:
+    """Every key path in a parsed JSON document (list positions collapsed)."""
+    if isinstance(value, dict):
+        return [p for k, v in value.items() for p in [f"{path}.{k}", *_keys(v, f"{path}.{k}")]]
+    if isinstance(value, list):
+        return sorted({p for v in value for p in _keys(v, f"{path}[]")})
+    return []
+
+
+def _time(fn: Callable[[], bytes], rounds: int) -> List[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time purchase order list serialization")
+    parser.add_argument("--orders", type=int, default=1000, help="orders in the serialized page")
+    parser.add_argument("--rounds", type=int, default=20, help="timed runs per method")
+    parser.add_argument("--seed-scale", type=int, default=1, help="multiplier of the seeded data set")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    os.environ["SUPABASE_MODE"] = "local"
+    os.environ["SUPABASE_LOCAL_LATENCY_MS"] = "0"
+    os.environ["SUPABASE_LOCAL_SEED_SCALE"] = str(args.seed_scale)
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from core.serialization import dump_trusted
+    from schemas.purchase_order import PurchaseOrderList
+    from services.purchase_order_service_supabase import PurchaseOrderServiceSB
+
+    orders = PurchaseOrderServiceSB.get_all_purchase_orders(skip=0, limit=args.orders)
+    if not orders:
+        print("No orders seeded", file=sys.stderr)
+        return 1
+    content = {"items": orders, "total": len(orders), "skip": 0, "limit": args.orders}
+    adapter = TypeAdapter(PurchaseOrderList)
+
+    methods: Dict[str, Callable[[], bytes]] = {
+        "stdlib": lambda: json.dumps(jsonable_encoder(PurchaseOrderList(**content))).encode(),
+        "validated": lambda: adapter.dump_json(PurchaseOrderList(**content)),
+        "trusted": lambda: dump_trusted(PurchaseOrderList, content),
+    }
+
+    validated = json.loads(methods["validated"]())
+    trusted = json.loads(methods["trusted"]())
+    missing = set(_keys(validated)) ^ set(_keys(trusted))
+    if missing:
+        print(f"Trusted output differs in keys: {sorted(missing)[:10]}", file=sys.stderr)
+        return 1
+
+    scale = 1000 / len(orders)
+    results: Dict[str, Any] = {}
+    for name, fn in methods.items():
+        fn()
+        ms = [s * 1000 * scale for s in _time(fn, args.rounds)]
+        results[name] = {
+            "median_ms_per_1000": round(statistics.median(ms), 3),
+            "min_ms_per_1000": round(min(ms), 3),
+            "bytes": len(fn()),
+        }
+        print(f"{name:<10} median {results[name]['median_ms_per_1000']:>9.2f} ms / 1000 orders  "
+              f"min {results[name]['min_ms_per_1000']:>9.2f} ms  {results[name]['bytes']:>9} bytes")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"orders": len(orders), "rounds": args.rounds, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
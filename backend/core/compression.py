@@ -0,0 +1,96 @@
+"""
+Response compression.
+
+CompressionMiddleware compresses bodies of at least COMPRESSION_MINIMUM_SIZE
+bytes with Brotli when the client accepts it and the brotli package is
+installed, otherwise with gzip. Streaming responses (exports) are
+compressed chunk by chunk. Already-compressed formats (images, generated
+.docx/.pdf documents) pass through untouched.
+"""
+from typing import Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip covers every client
+    brotli = None
+
+EXCLUDED_CONTENT_TYPES = DEFAULT_EXCLUDED_CONTENT_TYPES + (
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+)
+
+
+def _accepted_encodings(header: str) -> set:
+    """Codings listed in Accept-Encoding, minus those refused with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                if float(value) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int, thread_minimum_size: int):
+        super().__init__(app, minimum_size, exclude_content_types=EXCLUDED_CONTENT_TYPES)
+        self.quality = quality
+        self.thread_minimum_size = thread_minimum_size
+        self._compressor: Optional["brotli.Compressor"] = None
+
+    @property
+    def compressor(self) -> "brotli.Compressor":
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        return self._compressor
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= self.thread_minimum_size:
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body)
+        return self._compress_body(body, more_body)
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        thread_minimum_size: int = 128 * 1024,
+    ) -> None:
+        # Lower levels than the defaults: JSON compresses well either way and
+        # these run on every large response
+        super().__init__(
+            app,
+            minimum_size=minimum_size,
+            compresslevel=gzip_level,
+            thread_minimum_size=thread_minimum_size,
+            exclude_content_types=EXCLUDED_CONTENT_TYPES,
+        )
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and brotli is not None:
+            if "br" in _accepted_encodings(Headers(scope=scope).get("Accept-Encoding", "")):
+                responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality, self.thread_minimum_size)
+                await responder(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
@@ -7,10 +7,15 @@ from sqlalchemy.orm import sessionmaker
 
 from core.config import settings
 
-# Create database engine
+# Create database engine (QueuePool; connections are checked before use)
 engine = create_engine(
     settings.DATABASE_URL,
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
 )
 
 # Session maker
@@ -33,22 +38,78 @@ def get_db():
         db.close()
 
 
+def _async_database_url(url: str) -> str:
+    """Point a postgresql:// URL at the asyncpg driver."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# Async engine and session factory (lazy, so asyncpg is only needed when used)
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """Get or create the asyncpg-backed engine."""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_engine = create_async_engine(
+            _async_database_url(settings.DATABASE_URL),
+            echo=settings.DEBUG,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            # Compiled SQL cache shared by all connections
+            query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+            # Prepared statements kept per connection by the asyncpg dialect
+            connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+        )
+    return _async_engine
+
+
+def get_async_session_factory():
+    """Get or create the async session maker."""
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _AsyncSessionLocal
+
+
 """
 Database client initialization using application settings.
 """
 from supabase import create_client, Client
 
 from .config import settings
+from .instrumentation import QueryInfo, query_scope
 
 # Lazy-loaded Supabase client
 _supabase_client: Client | None = None
 
 
 def _create_supabase_client() -> Client:
+    if settings.SUPABASE_MODE == "local":
+        from local_supabase import create_local_client
+        return create_local_client(
+            latency_ms=settings.SUPABASE_LOCAL_LATENCY_MS,
+            jitter_ms=settings.SUPABASE_LOCAL_JITTER_MS,
+            seed_scale=settings.SUPABASE_LOCAL_SEED_SCALE,
+        )
     if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
         raise RuntimeError("Supabase configuration missing: SUPABASE_URL and SUPABASE_KEY must be set")
 
-    print(settings.SUPABASE_KEY)
     return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
 
@@ -60,8 +121,64 @@ def get_supabase() -> Client:
     return _supabase_client
 
 
+_QUERY_OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+# Filters whose first argument is a column; or_/match/filter strings carry values
+_COLUMN_FILTERS = {"eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is_", "in_", "contains", "order"}
+_SHAPE_FILTERS = {"or_", "match", "filter"}
+
+
+class _InstrumentedQuery:
+    """
+    Wraps a PostgREST request builder, recording the query shape as it is
+    chained and reporting execute() through core.instrumentation.
+    """
+
+    def __init__(self, builder, info: QueryInfo):
+        self._builder = builder
+        self._info = info
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            # e.g. the .not_ property, which returns the builder itself
+            if hasattr(attr, "execute"):
+                self._info.filters.append(name)
+                return _InstrumentedQuery(attr, self._info)
+            return attr
+
+        def call(*args, **kwargs):
+            if name in _QUERY_OPERATIONS:
+                self._info.operation = name
+            elif name in _COLUMN_FILTERS and args:
+                self._info.filters.append(f"{name}:{args[0]}")
+            elif name in _SHAPE_FILTERS:
+                self._info.filters.append(name)
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _InstrumentedQuery(result, self._info)
+            return result
+
+        return call
+
+    def execute(self):
+        with query_scope(self._info):
+            res = self._builder.execute()
+            data = getattr(res, "data", None)
+            self._info.row_count = len(data) if isinstance(data, list) else int(data is not None)
+            return res
+
+
 # For backward compatibility, create a property-like access
 class _SupabaseProxy:
+    def table(self, table_name: str):
+        return _InstrumentedQuery(get_supabase().table(table_name), QueryInfo(table=table_name))
+
+    from_ = table
+
+    def rpc(self, fn: str, params=None, *args, **kwargs):
+        builder = get_supabase().rpc(fn, params or {}, *args, **kwargs)
+        return _InstrumentedQuery(builder, QueryInfo(table=fn, operation="rpc"))
+
     def __getattr__(self, name):
         return getattr(get_supabase(), name)
 
@@ -0,0 +1,154 @@
+"""
+Process pool for document generation.
+
+Rendering invoices and POs with python-docx/lxml is CPU-bound and holds the
+GIL, so running it in the web worker's threadpool stalls every other request
+of that worker. run_document_job() hands the generator call to a small pool
+of spawned processes instead and blocks only the calling thread.
+
+- DOCUMENT_WORKERS processes per web worker; 0 runs jobs inline (dev, tests),
+  as does SUPABASE_MODE=local, whose data lives in the web worker's memory
+- each child is replaced after DOCUMENT_MAX_TASKS_PER_CHILD jobs, which caps
+  the memory python-docx/lxml accumulates
+- the caller's trace context is carried into the child
+- HTTPExceptions raised by a generator are re-raised in the caller
+- a job without a result after DOCUMENT_JOB_TIMEOUT answers 504; it is
+  cancelled if still queued (a running child can't be interrupted)
+
+The pool is started and warmed by the app lifespan; document_pool_ready()
+backs the readiness probe.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as JobTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from core.config import settings
+from core.logging import get_logger
+from core.tracing import attach_context, inject_context
+
+logger = get_logger(__name__)
+
+# Imported by each child up front so the first job doesn't pay for it
+_WARM_MODULES = ("services.invoice_generator_service", "services.po_generator_service")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_ready = False
+_lock = threading.Lock()
+
+
+def _pool_size() -> int:
+    return 0 if settings.SUPABASE_MODE == "local" else settings.DOCUMENT_WORKERS
+
+
+def _init_child() -> None:
+    # Register the metrics and tracing hooks in the child as well
+    import core.metrics  # noqa: F401
+    from core.tracing import setup_process_tracing
+    setup_process_tracing()
+
+
+def _warm_up() -> bool:
+    import importlib
+    for module in _WARM_MODULES:
+        importlib.import_module(module)
+    return True
+
+
+def _run_job(fn: Callable, carrier: Dict[str, str], args: tuple, kwargs: dict):
+    """Child side: run fn under the caller's trace context."""
+    with attach_context(carrier):
+        try:
+            return fn(*args, **kwargs)
+        except HTTPException as e:
+            # HTTPException can't be pickled; the caller rebuilds it
+            return _HTTPError(e.status_code, e.detail)
+
+
+class _HTTPError:
+    def __init__(self, status_code: int, detail: Any):
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _create_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: the web worker holds threads and open HTTP clients
+    return ProcessPoolExecutor(
+        max_workers=_pool_size(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_child,
+        max_tasks_per_child=settings.DOCUMENT_MAX_TASKS_PER_CHILD,
+    )
+
+
+def start_document_pool() -> None:
+    """Start the pool and import the generators in every child. No-op when disabled."""
+    global _pool, _ready
+    if _pool_size() <= 0:
+        _ready = True
+        return
+    with _lock:
+        if _pool is None:
+            _pool = _create_pool()
+        pool = _pool
+    warm = [pool.submit(_warm_up) for _ in range(_pool_size())]
+    for future in warm:
+        future.result(timeout=settings.DOCUMENT_JOB_TIMEOUT)
+    _ready = True
+    logger.info("Document pool started with %s process(es)", _pool_size())
+
+
+def shutdown_document_pool() -> None:
+    global _pool, _ready
+    with _lock:
+        pool, _pool = _pool, None
+        _ready = False
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def document_pool_ready() -> bool:
+    return _ready
+
+
+def run_document_job(fn: Callable, *args, **kwargs):
+    """Run a document generator in the pool (or inline when disabled) and return its result."""
+    if _pool_size() <= 0:
+        return fn(*args, **kwargs)
+
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = _create_pool()
+        pool = _pool
+
+    future = pool.submit(_run_job, fn, inject_context(), args, kwargs)
+    try:
+        result = future.result(timeout=settings.DOCUMENT_JOB_TIMEOUT)
+    except JobTimeoutError:
+        if future.cancel():
+            logger.warning("Document job still queued after %ss; cancelled", settings.DOCUMENT_JOB_TIMEOUT)
+        else:
+            logger.error("Document job still running after %ss; its worker stays busy until it ends",
+                         settings.DOCUMENT_JOB_TIMEOUT)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Document generation timed out, please retry",
+        )
+    except BrokenProcessPool:
+        # A child died (OOM, segfault in LibreOffice): replace the pool for the next job
+        logger.error("Document worker process died; restarting the document pool")
+        with _lock:
+            if _pool is pool:
+                _pool = _create_pool()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Document generation worker crashed, please retry",
+        )
+    if isinstance(result, _HTTPError):
+        raise HTTPException(status_code=result.status_code, detail=result.detail)
+    return result
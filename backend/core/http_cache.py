@@ -0,0 +1,49 @@
+"""
+Conditional GET.
+
+Cacheable endpoints derive a weak ETag from the change counters of the
+tables they read (services.data_version_service) plus whatever else the
+body depends on (the URL, the caller, a time bucket), before building the
+response. check_not_modified() answers a matching If-None-Match with 304
+straight away, so an unchanged response costs one counter lookup instead
+of its queries and serialization. ETags are weak because the same body
+may go out gzip- or Brotli-encoded.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of etag against an If-None-Match list."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    etag: Optional[str],
+    cache_control: str = "private, no-cache",
+) -> None:
+    """
+    Raise 304 when the client's copy is current, otherwise put the
+    validators on the response being built. No-op without an etag.
+    """
+    if etag is None:
+        return
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+__all__ = ["make_etag", "check_not_modified"]
@@ -0,0 +1,243 @@
+"""
+Idempotency-Key handling for non-idempotent POSTs.
+
+A client that retries a request with the same Idempotency-Key gets the
+outcome of the first attempt instead of a second execution, whichever
+worker serves the retry:
+
+- The first request claims the key by inserting it into idempotency_keys
+  (migration b8d3f6a1c024) before running, and stores its response there
+  when done. Keys expire after IDEMPOTENCY_TTL_SECONDS.
+- A duplicate whose claim conflicts replays the stored response, or, while
+  the first request is still running on another worker, polls for it for
+  up to IDEMPOTENCY_WAIT_SECONDS (then 409). A claim still without a
+  response after IDEMPOTENCY_LEASE_SECONDS is taken to be abandoned (its
+  worker died) and can be reclaimed.
+- Duplicates on the same worker wait on the running call in process
+  instead of polling, and completed results are kept in process (at most
+  IDEMPOTENCY_MAX_KEYS) so same-worker replays skip the lookup.
+
+Failed attempts release their claim, so a later retry runs again. Reusing
+a key with a different body is rejected with 422. If the table can't be
+reached, requests run without cross-worker deduplication.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from postgrest.exceptions import APIError
+from pydantic import BaseModel
+
+from core.config import settings
+from core.database import supabase
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+TABLE = "idempotency_keys"
+UNIQUE_VIOLATION = "23505"
+# Expired keys are deleted at most this often per worker (seconds)
+SWEEP_INTERVAL = 60
+_POLL_MIN, _POLL_MAX = 0.05, 1.0
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "expires_at", "done", "result", "replayed", "error")
+
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.done = threading.Event()
+        self.result: Any = None
+        self.replayed = False
+        self.error: Optional[BaseException] = None
+
+
+def _different_request() -> HTTPException:
+    return HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+
+
+def _in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still in progress",
+    )
+
+
+def _timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+class IdempotencyStore:
+    """Keyed calls and their results: claimed in the database, awaited in process."""
+
+    def __init__(self, ttl: float, max_keys: int, wait: float, lease: float):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.wait = wait
+        self.lease = lease
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+
+    def _purge(self, now: float) -> None:
+        # Entries are in creation order, so expired ones are at the front
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at > now and len(self._entries) < self.max_keys:
+                break
+            self._entries.popitem(last=False)
+
+    def run(self, scope: str, key: str, fingerprint: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        fn() the first time key is seen in scope, otherwise the first
+        call's outcome. Returns (result, replayed).
+        """
+        entry_key = (scope, key)
+        with self._lock:
+            now = time.monotonic()
+            self._purge(now)
+            entry = self._entries.get(entry_key)
+            first = entry is None
+            if first:
+                entry = self._entries[entry_key] = _Entry(fingerprint, now + self.ttl)
+
+        if not first:
+            if entry.fingerprint != fingerprint:
+                raise _different_request()
+            if not entry.done.wait(self.wait):
+                raise _in_progress()
+            if entry.error is not None:
+                raise entry.error
+            logger.info("Replaying result for Idempotency-Key %s (%s)", key, scope)
+            return entry.result, True
+
+        try:
+            entry.result, entry.replayed = self._run_claimed(f"{scope}:{key}", fingerprint, fn)
+        except BaseException as e:
+            entry.error = e
+            with self._lock:
+                if self._entries.get(entry_key) is entry:
+                    del self._entries[entry_key]
+            raise
+        finally:
+            entry.done.set()
+        return entry.result, entry.replayed
+
+    def _run_claimed(self, row_key: str, fingerprint: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """fn() under the key's database claim, or the response of whoever holds it."""
+        self._sweep()
+        deadline = time.monotonic() + self.wait
+        delay = _POLL_MIN
+        while True:
+            try:
+                row = self._claim(row_key, fingerprint)
+            except Exception as e:
+                logger.warning("Idempotency store unavailable, running without it: %s", e)
+                return fn(), False
+            if row is None:
+                break
+            if row["fingerprint"] != fingerprint:
+                raise _different_request()
+            if row.get("response") is not None:
+                logger.info("Replaying stored result for Idempotency-Key %s", row_key)
+                return row["response"], True
+            if time.monotonic() >= deadline:
+                raise _in_progress()
+            time.sleep(delay)
+            delay = min(delay * 2, _POLL_MAX)
+
+        try:
+            result = fn()
+        except BaseException:
+            self._release(row_key)
+            raise
+        try:
+            supabase.table(TABLE).update({"response": jsonable_encoder(result)}).eq("key", row_key).execute()
+        except Exception as e:
+            logger.warning("Could not store result for Idempotency-Key %s: %s", row_key, e)
+        return result, False
+
+    def _claim(self, row_key: str, fingerprint: str) -> Optional[dict]:
+        """
+        Insert the key; None when this call now holds it, otherwise the
+        current holder's row. Expired and abandoned claims are removed
+        and retried.
+        """
+        while True:
+            now = datetime.now(timezone.utc)
+            try:
+                supabase.table(TABLE).insert({
+                    "key": row_key,
+                    "fingerprint": fingerprint,
+                    "expires_at": (now + timedelta(seconds=self.ttl)).isoformat(),
+                }).execute()
+                return None
+            except APIError as e:
+                if getattr(e, "code", None) != UNIQUE_VIOLATION:
+                    raise
+            rows = supabase.table(TABLE).select("*").eq("key", row_key).execute().data or []
+            if not rows:
+                continue  # released since the insert failed
+            row = rows[0]
+            abandoned = row.get("response") is None and \
+                _timestamp(row["created_at"]) < now - timedelta(seconds=self.lease)
+            if _timestamp(row["expires_at"]) > now and not abandoned:
+                return row
+            # created_at guards against removing a claim someone just renewed
+            supabase.table(TABLE).delete().eq("key", row_key).eq("created_at", row["created_at"]).execute()
+
+    def _release(self, row_key: str) -> None:
+        try:
+            supabase.table(TABLE).delete().eq("key", row_key).is_("response", "null").execute()
+        except Exception as e:
+            logger.warning("Could not release Idempotency-Key %s: %s", row_key, e)
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept_at < SWEEP_INTERVAL:
+                return
+            self._swept_at = now
+        try:
+            supabase.table(TABLE).delete().lt("expires_at", datetime.now(timezone.utc).isoformat()).execute()
+        except Exception as e:
+            logger.warning("Could not delete expired idempotency keys: %s", e)
+
+
+idempotency_store = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_keys=settings.IDEMPOTENCY_MAX_KEYS,
+    wait=settings.IDEMPOTENCY_WAIT_SECONDS,
+    lease=settings.IDEMPOTENCY_LEASE_SECONDS,
+)
+
+
+def run_idempotent(
+    key: Optional[str],
+    scope: str,
+    body: BaseModel,
+    response: Response,
+    fn: Callable[[], Any],
+) -> Any:
+    """
+    fn() deduplicated by the request's Idempotency-Key within scope (the
+    operation and caller). Without a key fn() simply runs. Replays are
+    marked with an Idempotent-Replayed header; stored results are shared
+    between responses and must not be mutated.
+    """
+    if key is None:
+        return fn()
+    fingerprint = hashlib.sha256(body.model_dump_json().encode("utf-8")).hexdigest()
+    result, replayed = idempotency_store.run(scope, key, fingerprint, fn)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+__all__ = ["IdempotencyStore", "idempotency_store", "run_idempotent"]
@@ -0,0 +1,86 @@
+"""
+Instrumentation hooks for outbound queries and document generation stages.
+
+core.database reports every Supabase call through query_scope() and the
+document generators wrap their stages in document_stage(). Observers
+(metrics, query budgets, tracing) register hooks here instead of being
+imported by the code they observe.
+
+A hook is a callable returning a context manager: it is entered before the
+work starts and exited after it finishes (or raises), so it can time the
+call, open a span around it or inspect the result.
+"""
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, ContextManager, Iterator, List, Optional
+
+
+@dataclass
+class QueryInfo:
+    """Shape of one Supabase/PostgREST call. Filter values are never recorded."""
+
+    table: str
+    operation: str = "select"
+    filters: List[str] = field(default_factory=list)
+    row_count: Optional[int] = None
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the query shape, e.g. 'select products eq:product_id'."""
+        return " ".join([self.operation, self.table, *self.filters])
+
+
+QueryHook = Callable[[QueryInfo], ContextManager]
+StageHook = Callable[[str, str], ContextManager]
+
+_query_hooks: List[QueryHook] = []
+_stage_hooks: List[StageHook] = []
+
+
+def register_query_hook(hook: QueryHook) -> QueryHook:
+    """Run hook(info) around every Supabase call. Usable as a decorator."""
+    if hook not in _query_hooks:
+        _query_hooks.append(hook)
+    return hook
+
+
+def register_stage_hook(hook: StageHook) -> StageHook:
+    """Run hook(document, stage) around every document generation stage."""
+    if hook not in _stage_hooks:
+        _stage_hooks.append(hook)
+    return hook
+
+
+@contextmanager
+def query_scope(info: QueryInfo) -> Iterator[QueryInfo]:
+    """Wrap one outbound query; the caller fills info.row_count before exiting."""
+    with ExitStack() as stack:
+        for hook in list(_query_hooks):
+            stack.enter_context(hook(info))
+        yield info
+
+
+@contextmanager
+def document_stage(document: str, stage: str) -> Iterator[None]:
+    """
+    Wrap one stage of document generation.
+    document: "invoice" or "purchase_order"
+    stage: render, rows, placeholders, merge, save or pdf_convert
+    """
+    with ExitStack() as stack:
+        for hook in list(_stage_hooks):
+            stack.enter_context(hook(document, stage))
+        yield
+
+
+def route_template(scope) -> str:
+    """Route path with parameters (/api/v1/purchase-orders/{po_id}), not the raw URL."""
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        # Unmatched paths share one label so 404 scans can't explode cardinality
+        return "unmatched"
+    # Routes of included routers may only know their own part of the path;
+    # the router prefixes are static, so take them from the request path
+    segments = scope["path"].rstrip("/").split("/")
+    depth = template.rstrip("/").count("/")
+    return "/".join(segments[:len(segments) - depth]) + template
@@ -1,23 +1,143 @@
 """
 Centralized logging configuration
+
+Records are put on an in-memory queue by a QueueHandler and written by a
+QueueListener thread, so request threads never block on stdout or the log
+file. Formatting (JSON by default) also happens on the listener thread; log
+with %-style arguments so the message is only built if the record is kept.
+Every record carries the request id set by RequestIdMiddleware.
 """
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import sys
-from typing import Optional
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
 from pathlib import Path
 
+from core.config import settings
+
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request_id and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (runs in the logging thread's caller)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of DEBUG records from the configured modules, e.g.
+    {"services.invoice_generator_service": 0.1}. Prefixes match submodules.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not self.rates:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition(".")[0]
+        return True
+
+
+class _NonFormattingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as-is; the listener thread does all the formatting."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_sample_rates(value: Optional[str]) -> Dict[str, float]:
+    """Parse "module=rate,module=rate" into a dict."""
+    rates = {}
+    for part in (value or "").split(","):
+        if "=" in part:
+            module, rate = part.split("=", 1)
+            rates[module.strip()] = float(rate)
+    return rates
+
+
+class RequestIdMiddleware:
+    """ASGI middleware binding X-Request-ID (or a new id) to the request's log records."""
+
+    header = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers", [])).get(self.header)
+        request_id = incoming.decode("latin-1")[:128] if incoming else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (self.header, request_id.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+
 
 class LoggerSetup:
     """Centralized logger setup for consistent logging across the application."""
     
     _initialized = False
+    _listener: Optional[logging.handlers.QueueListener] = None
     
     @classmethod
     def setup_logging(
         cls,
         log_level: str = "INFO",
         log_file: Optional[str] = None,
-        format_string: Optional[str] = None
+        format_string: Optional[str] = None,
+        json_output: bool = True,
+        sample_rates: Optional[Dict[str, float]] = None,
     ) -> None:
         """
         Configure logging for the entire application.
@@ -25,19 +145,22 @@ class LoggerSetup:
         Args:
             log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
             log_file: Optional log file path. If None, logs to console only.
-            format_string: Custom format string for log messages
+            format_string: Custom format string for text output
+            json_output: Write JSON lines instead of text
+            sample_rates: Fraction of DEBUG records kept per module prefix
         """
         if cls._initialized:
             return
             
-        # Default format string - more concise for better readability
-        if format_string is None:
-            format_string = (
-                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-            )
-        
-        # Create formatter
-        formatter = logging.Formatter(format_string)
+        if json_output:
+            formatter = JsonFormatter()
+        else:
+            # Default format string - more concise for better readability
+            if format_string is None:
+                format_string = (
+                    "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+                )
+            formatter = logging.Formatter(format_string)
         
         # Get root logger
         root_logger = logging.getLogger()
@@ -50,7 +173,7 @@ class LoggerSetup:
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
-        root_logger.addHandler(console_handler)
+        handlers = [console_handler]
         
         # File handler (optional)
         if log_file:
@@ -60,7 +183,19 @@ class LoggerSetup:
             
             file_handler = logging.FileHandler(log_file)
             file_handler.setFormatter(formatter)
-            root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
+        
+        # Callers only enqueue; the listener thread formats and writes
+        log_queue: queue.Queue = queue.Queue(-1)
+        queue_handler = _NonFormattingQueueHandler(log_queue)
+        queue_handler.addFilter(RequestIdFilter())
+        if sample_rates:
+            queue_handler.addFilter(SamplingFilter(sample_rates))
+        root_logger.addHandler(queue_handler)
+        
+        cls._listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        cls._listener.start()
+        atexit.register(cls.shutdown)
         
         # Configure third-party library logging levels to reduce noise
         cls._configure_third_party_loggers(log_level)
@@ -69,9 +204,16 @@ class LoggerSetup:
         
         # Log initialization
         logger = logging.getLogger(__name__)
-        logger.info(f"Logging initialized with level: {log_level}")
+        logger.info("Logging initialized with level: %s", log_level)
         if log_file:
-            logger.info(f"Logging to file: {log_file}")
+            logger.info("Logging to file: %s", log_file)
+    
+    @classmethod
+    def shutdown(cls) -> None:
+        """Flush queued records and stop the listener thread."""
+        if cls._listener is not None:
+            cls._listener.stop()
+            cls._listener = None
     
     @classmethod
     def _configure_third_party_loggers(cls, main_log_level: str) -> None:
@@ -140,7 +282,7 @@ class LoggerSetup:
                 logger.propagate = False
         
         logger = logging.getLogger(__name__)
-        logger.info(f"SQLAlchemy logging configured to {sql_log_level} level")
+        logger.info("SQLAlchemy logging configured to %s level", sql_log_level)
     
     @staticmethod
     def get_logger(name: str) -> logging.Logger:
@@ -171,4 +313,9 @@ def get_logger(name: str) -> logging.Logger:
 
 
 # Initialize logging on import (can be customized later)
-LoggerSetup.setup_logging()
\ No newline at end of file
+LoggerSetup.setup_logging(
+    log_level=settings.LOG_LEVEL,
+    log_file=settings.LOG_FILE,
+    json_output=settings.LOG_FORMAT.lower() == "json",
+    sample_rates=parse_sample_rates(settings.LOG_SAMPLE_RATES),
+)
\ No newline at end of file
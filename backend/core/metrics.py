@@ -0,0 +1,127 @@
+"""
+Prometheus metrics for the API.
+
+MetricsMiddleware records request latency and response size per route
+template plus in-flight requests; Supabase calls and document generation
+stages are timed through the hooks in core.instrumentation. metrics_response()
+renders everything for the /metrics endpoint.
+
+Under gunicorn (several worker processes plus the document pool) set
+PROMETHEUS_MULTIPROC_DIR: every process then writes its samples there and
+/metrics aggregates them, whichever worker serves the scrape.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from core.instrumentation import QueryInfo, register_query_hook, register_stage_hook, route_template
+
+# Buckets reach past the LibreOffice timeout so slow conversions stay visible
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size by route template",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+SUPABASE_LATENCY = Histogram(
+    "supabase_query_duration_seconds",
+    "Supabase/PostgREST call latency by table and operation",
+    ["table", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+SUPABASE_ERRORS = Counter(
+    "supabase_query_errors_total",
+    "Supabase/PostgREST calls that raised",
+    ["table", "operation"],
+)
+DOCUMENT_STAGE_LATENCY = Histogram(
+    "document_stage_duration_seconds",
+    "Document generation latency by document and stage",
+    ["document", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@register_query_hook
+@contextmanager
+def _time_query(info: QueryInfo):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SUPABASE_ERRORS.labels(info.table, info.operation).inc()
+        raise
+    finally:
+        SUPABASE_LATENCY.labels(info.table, info.operation).observe(time.perf_counter() - start)
+
+
+@register_stage_hook
+@contextmanager
+def _time_stage(document: str, stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        DOCUMENT_STAGE_LATENCY.labels(document, stage).observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and response size."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(elapsed)
+            RESPONSE_SIZE.labels(method, route).observe(size)
+
+
+def metrics_response() -> Response:
+    """Render all metrics in the Prometheus text format."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,143 @@
+"""
+Per-request query budget and N+1 detection.
+
+QueryBudgetMiddleware gives every request a QueryTracker (through a context
+variable, so it follows the request into the threadpool). Each Supabase call
+reported to core.instrumentation is counted and timed against it. When a
+request goes over QUERY_BUDGET calls, or repeats one query shape more than
+QUERY_REPEAT_LIMIT times, a warning with the offending fingerprints is
+logged. With DEBUG on, the totals are sent as X-Query-Count/X-Query-Time-Ms.
+Endpoints whose query count grows with the result by design (streaming
+exports) call exempt_from_budget() to skip the checks.
+
+Tests can collect the same data without headers:
+
+    with track_queries() as queries:
+        client.get("/api/v1/purchase-orders/my-orders", headers=auth)
+    assert queries.count <= 3
+"""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Set, Tuple
+
+from core.config import settings
+from core.instrumentation import QueryInfo, register_query_hook
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueryTracker:
+    """Counts and times the Supabase calls made in one scope."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_time = 0.0
+        self.fingerprints: Counter = Counter()
+        self.exempt = False
+
+    def record(self, info: QueryInfo, elapsed: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_time += elapsed
+            self.fingerprints[info.fingerprint] += 1
+
+    def repeated(self, limit: int) -> List[Tuple[str, int]]:
+        """Query shapes issued more than limit times, most frequent first."""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n > limit]
+
+
+_request_tracker: ContextVar[Optional[QueryTracker]] = ContextVar("request_query_tracker", default=None)
+# Process-wide collectors opened by track_queries(); TestClient runs the app
+# in another thread, so a context variable alone would not see its queries
+_collectors: Set[QueryTracker] = set()
+
+
+@register_query_hook
+@contextmanager
+def _record_query(info: QueryInfo):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        tracker = _request_tracker.get()
+        if tracker is not None:
+            tracker.record(info, elapsed)
+        for collector in list(_collectors):
+            collector.record(info, elapsed)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryTracker]:
+    """Collect every Supabase call made anywhere in the process while open."""
+    tracker = QueryTracker()
+    _collectors.add(tracker)
+    try:
+        yield tracker
+    finally:
+        _collectors.discard(tracker)
+
+
+def current_tracker() -> Optional[QueryTracker]:
+    """The tracker of the request being served, if any."""
+    return _request_tracker.get()
+
+
+def exempt_from_budget() -> None:
+    """Skip the budget and N+1 checks for the request being served."""
+    tracker = _request_tracker.get()
+    if tracker is not None:
+        tracker.exempt = True
+
+
+class QueryBudgetMiddleware:
+    """ASGI middleware enforcing the per-request query budget."""
+
+    def __init__(self, app, budget: Optional[int] = None, repeat_limit: Optional[int] = None,
+                 expose_headers: Optional[bool] = None):
+        self.app = app
+        self.budget = settings.QUERY_BUDGET if budget is None else budget
+        self.repeat_limit = settings.QUERY_REPEAT_LIMIT if repeat_limit is None else repeat_limit
+        self.expose_headers = settings.DEBUG if expose_headers is None else expose_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracker = QueryTracker()
+        token = _request_tracker.set(tracker)
+
+        async def send_wrapper(message):
+            if self.expose_headers and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(tracker.count).encode()))
+                headers.append((b"x-query-time-ms", f"{tracker.total_time * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_tracker.reset(token)
+            self._check(scope, tracker)
+
+    def _check(self, scope, tracker: QueryTracker) -> None:
+        if tracker.exempt:
+            return
+        if tracker.count > self.budget:
+            logger.warning(
+                "Query budget exceeded: %s %s made %d queries in %.1f ms (budget %d); top shapes: %s",
+                scope["method"], scope["path"], tracker.count, tracker.total_time * 1000, self.budget,
+                tracker.fingerprints.most_common(3),
+            )
+        for fingerprint, n in tracker.repeated(self.repeat_limit):
+            logger.warning(
+                "Possible N+1: %s %s repeated '%s' %d times",
+                scope["method"], scope["path"], fingerprint, n,
+            )
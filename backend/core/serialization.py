@@ -0,0 +1,113 @@
+"""
+JSON serialization for large list responses.
+
+Endpoints with a response_model normally return dicts that are validated
+into the schema and dumped by pydantic-core (FastAPI's dump_json path).
+For a page of 1000 orders most of that time goes into validating rows
+the services have already shaped from stored columns. With
+TRUSTED_LIST_RESPONSES on, list_response() skips the validation: rows
+are projected onto the schema's fields by a projector compiled once per
+model, and dumped with orjson.
+
+Trusted output has the same keys as the validated one; values go out as
+the service produced them (e.g. timestamps as stored), so only turn it
+on for endpoints whose services return schema-shaped data.
+"""
+import types
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Type, Union, get_args, get_origin
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+from core.config import settings
+
+Projector = Callable[[Any], Any]
+
+
+def _default(value: Any) -> Any:
+    """orjson fallback for the types it doesn't serialize natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _optional(inner: Projector) -> Projector:
+    return lambda value: None if value is None else inner(value)
+
+
+def _sequence(inner: Projector) -> Projector:
+    return lambda value: None if value is None else [inner(v) for v in value]
+
+
+def _projector_for(annotation: Any) -> Optional[Projector]:
+    """Projection for values of this type, or None when they pass through as-is."""
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        inner = _projector_for(args[0]) if len(args) == 1 else None
+        return _optional(inner) if inner else None
+    if origin in (list, List, tuple, set, frozenset):
+        args = get_args(annotation)
+        inner = _projector_for(args[0]) if args else None
+        return _sequence(inner) if inner else None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return model_projector(annotation)
+    return None
+
+
+@lru_cache(maxsize=None)
+def model_projector(model: Type[BaseModel]) -> Projector:
+    """
+    Build (once per model) a function mapping a dict or object onto the
+    model's fields: extra keys are dropped, missing ones get the field
+    default, nested models are projected recursively.
+    """
+    fields = []
+    for name, field in model.model_fields.items():
+        default = None if field.is_required() else field.get_default(call_default_factory=True)
+        fields.append((name, field.alias or name, default, _projector_for(field.annotation)))
+
+    def project(value: Any) -> Dict[str, Any]:
+        source = value if isinstance(value, dict) else vars(value)
+        out = {}
+        for name, key, default, nested in fields:
+            item = source.get(name, default)
+            out[key] = nested(item) if nested is not None and item is not None else item
+        return out
+
+    return project
+
+
+def dump_trusted(schema: Type[BaseModel], content: Any) -> bytes:
+    """Serialize content in the shape of schema without validating it."""
+    return orjson.dumps(model_projector(schema)(content), default=_default)
+
+
+def trusted_response(schema: Type[BaseModel], content: Any, status_code: int = 200) -> Response:
+    # A Response returned from the endpoint bypasses response_model
+    # validation; the model still documents the endpoint
+    return Response(content=dump_trusted(schema, content), status_code=status_code, media_type="application/json")
+
+
+def sparse_response(content: BaseModel, status_code: int = 200) -> Response:
+    """Only the fields that were set, e.g. the columns a client asked for with fields=."""
+    return Response(content=content.model_dump_json(exclude_unset=True), status_code=status_code,
+                    media_type="application/json")
+
+
+def list_response(schema: Type[BaseModel], **content: Any) -> Union[BaseModel, Response]:
+    """
+    A paginated list response: validated into schema, or with
+    TRUSTED_LIST_RESPONSES on, projected and dumped without validation.
+    """
+    if settings.TRUSTED_LIST_RESPONSES:
+        return trusted_response(schema, content)
+    return schema(**content)
+
+
+__all__ = ["model_projector", "dump_trusted", "trusted_response", "sparse_response", "list_response"]
@@ -0,0 +1,210 @@
+"""
+OpenTelemetry tracing.
+
+setup_tracing(app) installs a tracer provider and adds spans for:
+- every HTTP request, named by route template (FastAPI's native
+  instrumentation where the installed version has it, else TracingMiddleware)
+- every Supabase call (table, operation, filtered columns, row count)
+- every document generation stage, with the LibreOffice subprocess nested
+  under pdf_convert
+
+Spans go to an OTLP/HTTP collector when OTEL_EXPORTER_OTLP_ENDPOINT is set,
+otherwise to a JSON-lines file (TRACE_FILE) for offline inspection.
+Tracing is off unless TRACING_ENABLED is set; the OpenTelemetry packages
+are only imported then, and span() is a no-op without them.
+
+The current span lives in a context variable: use propagate(fn) when
+handing work to a thread pool, and inject_context()/attach_context() to
+carry it into another process (which calls setup_process_tracing()).
+"""
+import contextvars
+import functools
+import inspect
+import json
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from core.config import settings
+from core.instrumentation import QueryInfo, register_query_hook, register_stage_hook, route_template
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    from opentelemetry import context as otel_context, propagate as otel_propagate, trace
+except ImportError:  # tracing is optional
+    trace = None
+
+_TRACER_NAME = "dealer-management"
+
+
+def span(name: str, **attributes):
+    """Start a span as the current one; no-op when OpenTelemetry is missing."""
+    if trace is None:
+        return nullcontext()
+    return trace.get_tracer(_TRACER_NAME).start_as_current_span(name, attributes=attributes)
+
+
+def propagate(fn: Callable) -> Callable:
+    """Bind fn to the caller's context (and so its span) for executor threads."""
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def inject_context() -> Dict[str, str]:
+    """Serialize the current trace context (traceparent) for another process."""
+    carrier: Dict[str, str] = {}
+    if trace is not None:
+        otel_propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attach_context(carrier: Optional[Dict[str, str]]):
+    """Continue the trace serialized by inject_context() in this process."""
+    if trace is None or not carrier:
+        yield
+        return
+    token = otel_context.attach(otel_propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracer = trace.get_tracer(_TRACER_NAME)
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        parent = otel_propagate.extract(headers)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                current.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    current.set_status(trace.Status(trace.StatusCode.ERROR))
+            await send(message)
+
+        with tracer.start_as_current_span(
+            scope["method"], context=parent, kind=trace.SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        ) as current:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = route_template(scope)
+                current.update_name(f"{scope['method']} {route}")
+                current.set_attribute("http.route", route)
+
+
+@contextmanager
+def _query_span(info: QueryInfo):
+    tracer = trace.get_tracer(_TRACER_NAME)
+    with tracer.start_as_current_span(f"supabase {info.operation} {info.table}", kind=trace.SpanKind.CLIENT) as current:
+        current.set_attribute("db.system", "postgrest")
+        current.set_attribute("db.sql.table", info.table)
+        current.set_attribute("db.operation", info.operation)
+        current.set_attribute("db.postgrest.filters", info.filters)
+        yield
+        if info.row_count is not None:
+            current.set_attribute("db.response.row_count", info.row_count)
+
+
+def _stage_span(document: str, stage: str):
+    return trace.get_tracer(_TRACER_NAME).start_as_current_span(
+        f"{document}.{stage}", attributes={"document.type": document, "document.stage": stage},
+    )
+
+
+def _file_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        """Append finished spans to a file, one JSON object per line."""
+
+        def __init__(self, file_path: str):
+            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(file_path, "a", encoding="utf-8")
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            lines = "".join(json.dumps(json.loads(s.to_json())) + "\n" for s in spans)
+            with self._lock:
+                self._file.write(lines)
+                self._file.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            with self._lock:
+                self._file.close()
+
+    return JsonLinesSpanExporter(path)
+
+
+def _fastapi_traces_requests() -> bool:
+    """Newer FastAPI releases (those accepting telemetry=) emit request spans themselves."""
+    from fastapi import FastAPI
+    return "telemetry" in inspect.signature(FastAPI.__init__).parameters
+
+
+def _install_provider() -> Optional[str]:
+    """Set the global tracer provider and span hooks; returns the export target."""
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    if settings.OTEL_EXPORTER_OTLP_ENDPOINT:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT.rstrip("/") + "/v1/traces")
+        target = settings.OTEL_EXPORTER_OTLP_ENDPOINT
+    else:
+        exporter = _file_exporter(settings.TRACE_FILE)
+        target = settings.TRACE_FILE
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+    register_query_hook(_query_span)
+    register_stage_hook(_stage_span)
+    return target
+
+
+def setup_tracing(app) -> bool:
+    """Install the tracer provider, span hooks and request middleware. Returns True if enabled."""
+    if not settings.TRACING_ENABLED:
+        return False
+    if trace is None:
+        logger.warning("TRACING_ENABLED is set but opentelemetry is not installed; tracing disabled")
+        return False
+
+    target = _install_provider()
+    if not _fastapi_traces_requests():
+        app.add_middleware(TracingMiddleware)
+
+    logger.info("Tracing enabled, exporting spans to %s", target)
+    return True
+
+
+def setup_process_tracing() -> bool:
+    """Tracing for helper processes (no app): spans continue the trace from attach_context()."""
+    if not settings.TRACING_ENABLED or trace is None:
+        return False
+    _install_provider()
+    return True
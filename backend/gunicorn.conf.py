@@ -0,0 +1,54 @@
+"""
+Gunicorn settings for production:
+
+    gunicorn main:app -c gunicorn.conf.py
+
+Uvicorn workers sized from the CPU count (override with WEB_CONCURRENCY).
+Each worker also starts DOCUMENT_WORKERS document processes (see
+core.document_pool), so document rendering never blocks request handling.
+Workers are recycled after MAX_REQUESTS requests, with jitter so they don't
+all restart at once, to bound python-docx/lxml memory growth. SIGHUP reloads
+gracefully: new workers start before old ones finish their requests.
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+# Request handling is mostly waiting on Supabase (the threadpool overlaps
+# that), so one worker per CPU; the document pool needs CPU of its own
+workers = int(os.getenv("WEB_CONCURRENCY", 0)) or max(2, multiprocessing.cpu_count())
+
+max_requests = int(os.getenv("MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 100))
+
+# Seconds a worker may go silent before it is killed and replaced, and how
+# long a stopping worker gets to finish in-flight requests (document
+# generation included)
+timeout = int(os.getenv("WORKER_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 60))
+keepalive = 5
+
+# Workers import the app themselves: the app holds HTTP clients and a
+# process pool that must not be shared across a fork
+preload_app = False
+
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = os.getenv("ACCESS_LOG", "-") or None  # ACCESS_LOG= (empty) turns it off
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def on_starting(server):
+    # Samples of a previous run would be summed into the new one
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
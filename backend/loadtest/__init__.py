@@ -0,0 +1,17 @@
+"""
+Load testing with a realistic dealer/admin traffic mix.
+
+An asyncio driver (httpx) runs virtual dealers and admins against a running
+server and reports throughput, latency percentiles and error rates per
+endpoint:
+
+    python -m loadtest.run --base-url http://localhost:8000 --dealers 50 --admins 2 --duration 60
+
+loadtest.capacity starts uvicorn with 1, 2, 4... workers against the local
+Supabase stand-in and sweeps the number of concurrent users to produce
+capacity curves:
+
+    python -m loadtest.capacity --workers 1,2,4 --users 10,25,50,100 --rtt-ms 20
+
+Run from the backend directory. The scenarios live in loadtest.scenarios.
+"""
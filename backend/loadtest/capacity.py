@@ -0,0 +1,128 @@
+"""
+Capacity curves over uvicorn worker counts.
+
+For each worker count this starts `uvicorn main:app --workers N` against the
+local Supabase stand-in (SUPABASE_MODE=local, simulated round trip
+--rtt-ms), runs the traffic mix at each concurrency level in --users and
+records total throughput, p95/p99 latency and error rate. The knee of each
+curve - where throughput stops growing and p95 climbs - is the number of
+concurrent users that worker count can serve.
+
+    python -m loadtest.capacity --workers 1,2,4 --users 10,25,50,100 --duration 30 --output capacity.json
+
+Each worker seeds its own copy of the local data, so startup takes a few
+seconds per worker and writes are only visible to the worker that made them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from loadtest.run import run_load
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/v1/products/", params={"limit": 1}, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server at {base_url} not ready after {timeout:.0f}s")
+
+
+def start_server(workers: int, port: int, rtt_ms: float, jitter_ms: float) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "SUPABASE_MODE": "local",
+        "SUPABASE_LOCAL_LATENCY_MS": str(rtt_ms),
+        "SUPABASE_LOCAL_JITTER_MS": str(jitter_ms),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "ERROR"),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure throughput/latency curves over uvicorn worker counts")
+    parser.add_argument("--workers", default="1,2,4", help="comma separated worker counts")
+    parser.add_argument("--users", default="10,25,50,100", help="comma separated concurrent user counts")
+    parser.add_argument("--admin-share", type=float, default=0.05, help="fraction of users that are admins")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of steady load per point")
+    parser.add_argument("--ramp-up", type=float, default=5.0)
+    parser.add_argument("--think-time", type=float, default=1.0)
+    parser.add_argument("--rtt-ms", type=float, default=20.0, help="simulated Supabase round trip")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="write the curves as JSON to this file")
+    args = parser.parse_args(argv)
+
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    user_counts = [int(u) for u in args.users.split(",")]
+    curves: Dict[str, List[Dict[str, Any]]] = {}
+
+    print(f"{'workers':>7} {'users':>6} {'rps':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'err%':>6}")
+    for workers in worker_counts:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(workers, port, args.rtt_ms, args.jitter_ms)
+        try:
+            _wait_until_ready(base_url, server, args.startup_timeout)
+            points = []
+            for users in user_counts:
+                admins = max(1, round(users * args.admin_share))
+                report = asyncio.run(run_load(
+                    base_url, users - admins, admins, args.duration,
+                    ramp_up=args.ramp_up, think_time=args.think_time,
+                ))
+                total = report["total"]
+                points.append({"users": users, **total})
+                print(f"{workers:>7} {users:>6} {total['rps']:>8.1f} {total['p50_ms']:>7.0f} "
+                      f"{total['p95_ms']:>7.0f} {total['p99_ms']:>7.0f} {total['error_rate'] * 100:>5.1f}%")
+            curves[str(workers)] = points
+        finally:
+            stop_server(server)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {"rtt_ms": args.rtt_ms, "jitter_ms": args.jitter_ms, "duration_s": args.duration,
+                         "think_time_s": args.think_time, "cpu_count": os.cpu_count()},
+                "curves": curves,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
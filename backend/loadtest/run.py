@@ -0,0 +1,141 @@
+"""
+Load test driver.
+
+Starts the virtual dealers and admins (spread over --ramp-up seconds), lets
+them run for --duration seconds and prints, per endpoint, the request count,
+throughput, latency percentiles and error rate. --output writes the same
+report as JSON.
+
+The default accounts are the ones seeded by the local Supabase stand-in
+(dealer001@example.com ... and admin@example.com); point --dealer-email,
+--admin-email and --password at real accounts for other deployments.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from loadtest.scenarios import AdminUser, DealerUser, Stats
+
+# Accounts seeded by local_supabase.seed (not imported: it pulls in app settings)
+ADMIN_EMAIL = "admin@example.com"
+DEFAULT_PASSWORD = "password123"
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summarize(samples: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(s * 1000 for s in samples)
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / elapsed, 2),
+        "errors": errors,
+        "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+        "p50_ms": round(_percentile(ordered, 50), 1),
+        "p90_ms": round(_percentile(ordered, 90), 1),
+        "p95_ms": round(_percentile(ordered, 95), 1),
+        "p99_ms": round(_percentile(ordered, 99), 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+
+def build_report(stats: Stats, elapsed: float) -> Dict[str, Any]:
+    endpoints = {}
+    for label in sorted(stats.latencies):
+        endpoints[label] = _summarize(
+            stats.latencies[label], sum(stats.errors.get(label, {}).values()), elapsed,
+        )
+        if label in stats.errors:
+            endpoints[label]["error_kinds"] = stats.errors[label]
+    every_sample = [s for samples in stats.latencies.values() for s in samples]
+    every_error = sum(n for kinds in stats.errors.values() for n in kinds.values())
+    return {
+        "elapsed_s": round(elapsed, 1),
+        "total": _summarize(every_sample, every_error, elapsed) if every_sample else {"requests": 0},
+        "endpoints": endpoints,
+    }
+
+
+async def run_load(
+    base_url: str,
+    dealers: int,
+    admins: int,
+    duration: float,
+    ramp_up: float = 5.0,
+    think_time: float = 1.0,
+    dealer_accounts: int = 20,
+    dealer_email: str = "dealer{n:03d}@example.com",
+    admin_email: str = ADMIN_EMAIL,
+    password: str = DEFAULT_PASSWORD,
+    seed: int = 1,
+) -> Dict[str, Any]:
+    """Run the traffic mix and return the report (see build_report)."""
+    stats = Stats()
+    users = [
+        DealerUser(base_url, dealer_email.format(n=i % dealer_accounts + 1), password, stats,
+                   think_time, random.Random(seed * 10_000 + i))
+        for i in range(dealers)
+    ] + [
+        AdminUser(base_url, admin_email, password, stats, think_time, random.Random(seed * 10_000 + dealers + i))
+        for i in range(admins)
+    ]
+    random.Random(seed).shuffle(users)
+
+    start = time.monotonic()
+    deadline = start + ramp_up + duration
+
+    async def start_user(user, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await user.run(deadline)
+
+    step = ramp_up / len(users) if users else 0
+    await asyncio.gather(*(start_user(user, i * step) for i, user in enumerate(users)))
+    return build_report(stats, time.monotonic() - start)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'endpoint':<50} {'reqs':>6} {'rps':>7} {'err%':>6} {'p50':>7} {'p90':>7} {'p95':>7} {'p99':>7}")
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for label, r in rows:
+        if not r.get("requests"):
+            continue
+        print(f"{label:<50} {r['requests']:>6} {r['rps']:>7.1f} {r['error_rate'] * 100:>5.1f}% "
+              f"{r['p50_ms']:>7.0f} {r['p90_ms']:>7.0f} {r['p95_ms']:>7.0f} {r['p99_ms']:>7.0f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the dealer/admin traffic mix against a server")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--dealers", type=int, default=20, help="concurrent virtual dealers")
+    parser.add_argument("--admins", type=int, default=2, help="concurrent virtual admins")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of steady load after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users are started")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean pause between a user's requests")
+    parser.add_argument("--dealer-accounts", type=int, default=20, help="distinct dealer logins to cycle through")
+    parser.add_argument("--dealer-email", default="dealer{n:03d}@example.com", help="pattern, n starts at 1")
+    parser.add_argument("--admin-email", default=ADMIN_EMAIL)
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(
+        args.base_url, args.dealers, args.admins, args.duration,
+        ramp_up=args.ramp_up, think_time=args.think_time, dealer_accounts=args.dealer_accounts,
+        dealer_email=args.dealer_email, admin_email=args.admin_email, password=args.password, seed=args.seed,
+    ))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["total"].get("requests") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Virtual users for the load test.
+
+Each user logs in once, then repeatedly picks a task by weight and waits a
+random think time in between. Weights follow the production mix: dealers
+mostly browse products and check their orders, some draft and submit POs
+and a few download invoices; admins review the order list and dashboard
+and approve submitted orders.
+
+Every user keeps a single keep-alive connection, so with several uvicorn
+workers all of its requests reach the same worker. This matters against the
+local Supabase stand-in, where each worker holds its own copy of the data.
+"""
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+API = "/api/v1"
+
+
+class Stats:
+    """Latency samples and errors per endpoint label."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def record(self, label: str, elapsed: float, error: Optional[str] = None) -> None:
+        self.latencies.setdefault(label, []).append(elapsed)
+        if error is not None:
+            by_kind = self.errors.setdefault(label, {})
+            by_kind[error] = by_kind.get(error, 0) + 1
+
+
+class VirtualUser:
+    """Base class: a logged-in HTTP session with weighted tasks."""
+
+    # (weight, method name)
+    tasks: List[Tuple[int, str]] = []
+
+    def __init__(self, base_url: str, email: str, password: str, stats: Stats,
+                 think_time: float, rng: random.Random):
+        self.email = email
+        self.password = password
+        self.stats = stats
+        self.think_time = think_time
+        self.rng = rng
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+        )
+
+    async def request(self, label: str, method: str, url: str, expected: Tuple[int, ...] = (200,),
+                      **kwargs) -> Optional[httpx.Response]:
+        """Send one request, record it under label and return it if it succeeded."""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            self.stats.record(label, time.perf_counter() - start, type(exc).__name__)
+            return None
+        self.stats.record(
+            label, time.perf_counter() - start,
+            None if response.status_code in expected else str(response.status_code),
+        )
+        return response if response.status_code in expected else None
+
+    async def login(self) -> bool:
+        response = await self.request("POST /users/login", "POST", f"{API}/users/login",
+                                      json={"email": self.email, "password": self.password})
+        if response is None:
+            return False
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        return True
+
+    async def on_start(self) -> None:
+        """Per-user setup after login."""
+
+    async def run(self, deadline: float) -> None:
+        try:
+            if not await self.login():
+                return
+            await self.on_start()
+            weights = [weight for weight, _ in self.tasks]
+            actions: List[Callable] = [getattr(self, name) for _, name in self.tasks]
+            while time.monotonic() < deadline:
+                await self.rng.choices(actions, weights)[0]()
+                await asyncio.sleep(self.rng.expovariate(1 / self.think_time) if self.think_time else 0)
+        finally:
+            await self.client.aclose()
+
+
+class DealerUser(VirtualUser):
+    tasks = [
+        (40, "browse_products"),
+        (10, "search_products"),
+        (15, "my_orders"),
+        (10, "order_detail"),
+        (10, "create_draft"),
+        (5, "submit_draft"),
+        (5, "download_invoice"),
+        (5, "approved_orders"),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dealer_id: Optional[str] = None
+        self.product_ids: List[str] = []
+        self.order_ids: List[int] = []
+        self.draft_ids: List[int] = []
+        self.approved_ids: List[int] = []
+
+    async def on_start(self) -> None:
+        response = await self.request("GET /dealers/my-profile", "GET", f"{API}/dealers/my-profile")
+        if response is not None:
+            self.dealer_id = response.json()["dealer_id"]
+        await self.browse_products()
+        await self.my_orders()
+
+    async def browse_products(self) -> None:
+        response = await self.request("GET /products/", "GET", f"{API}/products/",
+                                      params={"skip": self.rng.randrange(0, 180, 20), "limit": 20})
+        if response is not None:
+            self.product_ids = [p["product_id"] for p in response.json()["items"]] or self.product_ids
+
+    async def search_products(self) -> None:
+        await self.request("GET /products/?search", "GET", f"{API}/products/",
+                           params={"search": f"Product 0{self.rng.randint(0, 1)}{self.rng.randint(0, 9)}", "limit": 20})
+
+    async def my_orders(self) -> None:
+        response = await self.request("GET /purchase-orders/my-orders", "GET", f"{API}/purchase-orders/my-orders",
+                                      params={"limit": 20})
+        if response is not None:
+            orders = response.json()["items"]
+            self.order_ids = [o["po_id"] for o in orders]
+            self.draft_ids = [o["po_id"] for o in orders if o["status"] == "draft"]
+
+    async def approved_orders(self) -> None:
+        response = await self.request("GET /purchase-orders/my-orders/approved", "GET",
+                                      f"{API}/purchase-orders/my-orders/approved", params={"limit": 20})
+        if response is not None:
+            self.approved_ids = [o["po_id"] for o in response.json()["items"]]
+
+    async def order_detail(self) -> None:
+        if self.order_ids:
+            await self.request("GET /purchase-orders/{po_id}", "GET",
+                               f"{API}/purchase-orders/{self.rng.choice(self.order_ids)}")
+
+    async def create_draft(self) -> None:
+        if not self.dealer_id or not self.product_ids:
+            return
+        products = self.rng.sample(self.product_ids, min(len(self.product_ids), self.rng.randint(3, 15)))
+        response = await self.request(
+            "POST /purchase-orders/", "POST", f"{API}/purchase-orders/", expected=(201,),
+            json={"dealer_id": self.dealer_id,
+                  "items": [{"product_id": p, "quantity": self.rng.randint(1, 20)} for p in products]},
+        )
+        if response is not None:
+            po_id = response.json()["po_id"]
+            self.order_ids.append(po_id)
+            self.draft_ids.append(po_id)
+
+    async def submit_draft(self) -> None:
+        if self.draft_ids:
+            po_id = self.draft_ids.pop(self.rng.randrange(len(self.draft_ids)))
+            await self.request("POST /purchase-orders/{po_id}/submit", "POST",
+                               f"{API}/purchase-orders/{po_id}/submit")
+
+    async def download_invoice(self) -> None:
+        if not self.approved_ids:
+            await self.approved_orders()
+        if self.approved_ids:
+            await self.request("GET /purchase-orders/{po_id}/invoice", "GET",
+                               f"{API}/purchase-orders/{self.rng.choice(self.approved_ids)}/invoice")
+
+
+class AdminUser(VirtualUser):
+    tasks = [
+        (30, "list_orders"),
+        (25, "dashboard"),
+        (20, "order_detail"),
+        (15, "approve_order"),
+        (10, "list_dealers"),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.orders: List[Dict[str, Any]] = []
+
+    async def on_start(self) -> None:
+        await self.list_orders()
+
+    async def list_orders(self) -> None:
+        response = await self.request("GET /purchase-orders/", "GET", f"{API}/purchase-orders/",
+                                      params={"skip": self.rng.choice([0, 0, 0, 20, 40]), "limit": 20})
+        if response is not None:
+            self.orders = response.json()["items"] or self.orders
+
+    async def dashboard(self) -> None:
+        await self.request("GET /dashboard/stats", "GET", f"{API}/dashboard/stats")
+
+    async def order_detail(self) -> None:
+        if self.orders:
+            order = self.rng.choice(self.orders)
+            await self.request("GET /purchase-orders/{dealer_id}/{po_id}", "GET",
+                               f"{API}/purchase-orders/{order['dealer_id']}/{order['po_id']}")
+
+    async def approve_order(self) -> None:
+        submitted = [o for o in self.orders if o["status"] == "submitted"]
+        if submitted:
+            order = self.rng.choice(submitted)
+            order["status"] = "approved"
+            await self.request("PUT /purchase-orders/{dealer_id}/{po_id}/approve", "PUT",
+                               f"{API}/purchase-orders/{order['dealer_id']}/{order['po_id']}/approve")
+
+    async def list_dealers(self) -> None:
+        await self.request("GET /dealers/admin/all", "GET", f"{API}/dealers/admin/all")
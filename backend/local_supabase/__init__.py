@@ -0,0 +1,29 @@
+# Local Supabase stand-in for offline benchmarks and tests
+from typing import Optional
+
+from .client import LocalDatabase, LocalResponse, LocalSupabaseClient
+from .seed import ADMIN_EMAIL, DEFAULT_PASSWORD, seed_database
+
+# Data seeded at scale 1; SUPABASE_LOCAL_SEED_SCALE multiplies it
+SEED_SIZES = {"dealers": 20, "products": 200, "purchase_orders": 2000}
+
+
+def create_local_client(latency_ms: float = 0.0, jitter_ms: float = 0.0, seed_scale: int = 1,
+                        seed: Optional[int] = 42) -> LocalSupabaseClient:
+    """Build an in-memory client, seeded with seed_scale x SEED_SIZES rows."""
+    client = LocalSupabaseClient(latency=latency_ms / 1000, jitter=jitter_ms / 1000)
+    if seed_scale > 0:
+        seed_database(client.db, seed=seed, **{k: v * seed_scale for k, v in SEED_SIZES.items()})
+    return client
+
+
+__all__ = [
+    "ADMIN_EMAIL",
+    "DEFAULT_PASSWORD",
+    "LocalDatabase",
+    "LocalResponse",
+    "LocalSupabaseClient",
+    "SEED_SIZES",
+    "create_local_client",
+    "seed_database",
+]
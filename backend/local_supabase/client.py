@@ -0,0 +1,691 @@
+"""
+In-memory stand-in for the Supabase client.
+
+Implements the part of the PostgREST query builder the services use:
+table/select (with count and embedded resources such as
+"*,user:users(email)" or "products(name)"), eq/neq/gt/gte/lt/lte/like/
+ilike/in_/is_/or_/filter, order/range/limit/single, insert/update/upsert/
+delete, and rpc for the database functions the app calls. Database
+triggers the app relies on (the revenue rollup, data version counters)
+run as Python twins after each write. Rows are plain dicts shaped like
+PostgREST JSON (uuids and timestamps as strings).
+
+Every execute() sleeps for the configured latency to stand in for the
+network round trip, so round-trip counts show up in timings the way they
+do against a real project.
+"""
+import copy
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from postgrest.exceptions import APIError
+
+UNIQUE_VIOLATION = "23505"
+NO_DATA_FOUND = "P0002"
+
+# Primary key per table; int keys are generated from a sequence, others as uuids
+PRIMARY_KEYS = {
+    "users": "user_id",
+    "dealers": "dealer_id",
+    "products": "product_id",
+    "purchase_orders": "po_id",
+    "purchase_order_items": "po_item_id",
+    "invoices": "invoice_id",
+    "invoice_items": "invoice_item_id",
+    "app_settings": "key",
+    "data_versions": "name",
+    "idempotency_keys": "key",
+}
+SERIAL_KEYS = {"po_id", "po_item_id", "invoice_id", "invoice_item_id"}
+# Tables using models.base.TimestampMixin (updated_at is NULL until the first update)
+TIMESTAMPED_TABLES = {"users", "dealers", "products", "purchase_orders"}
+UNIQUE_COLUMNS = {
+    "users": ["email"], "dealers": ["customer_code"], "purchase_orders": ["po_number"], "products": ["product_key"],
+}
+# Tables with a data_versions counter (migrations f1a6c3e9d024, e3f7b1c8a592)
+VERSIONED_TABLES = (
+    "products", "dealers", "purchase_orders", "purchase_order_items",
+    "invoices", "invoice_items", "app_settings",
+)
+
+
+def _product_key(row: Dict[str, Any]) -> Optional[str]:
+    if row.get("name") is None:
+        return None
+    return f"{str(row['name']).strip().lower()}|{str(row.get('pack_size') or '').strip().lower()}"
+
+
+# Stored generated columns per table (products.product_key, migration c9e2a4f7d315)
+GENERATED_COLUMNS: Dict[str, Dict[str, Callable[[Dict[str, Any]], Any]]] = {
+    "products": {"product_key": _product_key},
+}
+
+
+def _generate(table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in the table's generated columns of row (in place)."""
+    for column, expression in GENERATED_COLUMNS.get(table, {}).items():
+        row[column] = expression(row)
+    return row
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _norm(value) -> str:
+    return "null" if value is None else str(value).lower() if isinstance(value, bool) else str(value)
+
+
+def _as_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _compare(left, right) -> int:
+    """Order two column values the way Postgres would for numbers and ISO strings."""
+    a, b = _as_number(left), _as_number(right)
+    if a is None or b is None:
+        a, b = _norm(left), _norm(right)
+    return (a > b) - (a < b)
+
+
+def _pattern(value: str, flags=0):
+    parts = (re.escape(p) for p in str(value).split("%"))
+    return re.compile("^" + ".*".join(p.replace("_", ".") for p in parts) + "$", flags | re.DOTALL)
+
+
+def _match(row_value, op: str, value) -> bool:
+    if op == "eq":
+        return row_value is not None and _norm(row_value) == _norm(value)
+    if op == "neq":
+        return row_value is not None and _norm(row_value) != _norm(value)
+    if op in ("gt", "gte", "lt", "lte"):
+        if row_value is None:
+            return False
+        c = _compare(row_value, value)
+        return {"gt": c > 0, "gte": c >= 0, "lt": c < 0, "lte": c <= 0}[op]
+    if op == "like":
+        return row_value is not None and bool(_pattern(value).match(str(row_value)))
+    if op == "ilike":
+        return row_value is not None and bool(_pattern(value, re.IGNORECASE).match(str(row_value)))
+    if op == "in":
+        values = value if isinstance(value, (set, frozenset)) else {_norm(v) for v in value}
+        return row_value is not None and _norm(row_value) in values
+    if op == "is":
+        return _norm(row_value) == _norm(value)
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, current, quoted, escaped = [], 0, "", False, False
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif quoted and ch == "\\":
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif quoted:
+            pass
+        elif ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        else:
+            depth += ch == "("
+            depth -= ch == ")"
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _parse_or(expression: str) -> List[tuple]:
+    """'a.ilike."%x%",b.eq.1' -> [("a", "ilike", "%x%"), ("b", "eq", "1")]."""
+    conditions = []
+    for part in _split_top_level(expression):
+        column, op, value = part.split(".", 2)
+        if op == "in":
+            value = [v.strip().strip('"') for v in value.strip("()").split(",")]
+        elif len(value) >= 2 and value[0] == value[-1] == '"':
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        conditions.append((column, op, value))
+    return conditions
+
+
+class LocalResponse:
+    """Mirrors postgrest's APIResponse: .data and .count."""
+
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self):
+        return f"LocalResponse(data={self.data!r}, count={self.count!r})"
+
+
+class LocalDatabase:
+    """Tables of row dicts plus the sequences and functions of the local project."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in PRIMARY_KEYS}
+        self.lock = threading.RLock()
+        # Swapped for a seeded generator while seeding, so every process
+        # seeded with the same seed agrees on ids
+        self.uuid_factory: Callable[[], uuid.UUID] = uuid.uuid4
+        self._sequences: Dict[str, int] = {}
+        self._unique_index: Dict[tuple, set] = {}
+        self._eq_index: Dict[tuple, Dict[str, List[Dict[str, Any]]]] = {}
+        self.functions: Dict[str, Callable[["LocalDatabase", Dict[str, Any]], Any]] = {
+            "create_dealer_with_user": _create_dealer_with_user,
+            "consolidate_purchase_orders": _consolidate_purchase_orders,
+        }
+        # Row triggers, called with (db, old_row, new_row) after every write
+        self.triggers: Dict[str, List[Callable[["LocalDatabase", Optional[dict], Optional[dict]], None]]] = {
+            "purchase_orders": [_purchase_orders_revenue_rollup],
+        }
+        for name in VERSIONED_TABLES:
+            self.triggers.setdefault(name, []).append(_data_versions_bump(name))
+
+    def round_trip(self) -> None:
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def next_value(self, sequence: str) -> int:
+        self._sequences[sequence] = self._sequences.get(sequence, 0) + 1
+        return self._sequences[sequence]
+
+    def table(self, name: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(name, [])
+
+    def insert_row(self, table: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply defaults and constraints, then store a copy of the row."""
+        row = dict(values)
+        pk = PRIMARY_KEYS.get(table)
+        if pk and row.get(pk) is None:
+            row[pk] = self.next_value(f"{table}.{pk}") if pk in SERIAL_KEYS else str(self.uuid_factory())
+        elif pk in SERIAL_KEYS:
+            # keep the sequence ahead of explicitly supplied ids (seeding)
+            self._sequences[f"{table}.{pk}"] = max(self._sequences.get(f"{table}.{pk}", 0), int(row[pk]))
+        row.setdefault("created_at", _now())
+        _generate(table, row)
+        if table in TIMESTAMPED_TABLES:
+            row.setdefault("updated_at", None)
+        unique = UNIQUE_COLUMNS.get(table, []) + ([pk] if pk else [])
+        for column in unique:
+            if row.get(column) is not None and _norm(row[column]) in self._unique_values(table, column):
+                raise APIError({
+                    "code": UNIQUE_VIOLATION,
+                    "message": f'duplicate key value violates unique constraint "{table}_{column}_key"',
+                    "details": f"Key ({column})=({row[column]}) already exists.",
+                    "hint": None,
+                })
+        for column in unique:
+            if row.get(column) is not None:
+                self._unique_values(table, column).add(_norm(row[column]))
+        for (indexed_table, column), index in self._eq_index.items():
+            if indexed_table == table:
+                index.setdefault(_norm(row.get(column)), []).append(row)
+        self.table(table).append(row)
+        self.fire_triggers(table, None, row)
+        return row
+
+    def fire_triggers(self, table: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        for trigger in self.triggers.get(table, ()):
+            trigger(self, old, new)
+
+    def rows_where(self, table: str, column: str, value) -> List[Dict[str, Any]]:
+        """Rows whose column equals value, through a hash index built on first use."""
+        key = (table, column)
+        if key not in self._eq_index:
+            index: Dict[str, List[Dict[str, Any]]] = {}
+            for r in self.table(table):
+                index.setdefault(_norm(r.get(column)), []).append(r)
+            self._eq_index[key] = index
+        return self._eq_index[key].get(_norm(value), [])
+
+    def _unique_values(self, table: str, column: str) -> set:
+        """Values of a unique column, indexed on first use."""
+        key = (table, column)
+        if key not in self._unique_index:
+            self._unique_index[key] = {_norm(r.get(column)) for r in self.table(table) if r.get(column) is not None}
+        return self._unique_index[key]
+
+    def invalidate_indexes(self, table: str) -> None:
+        """Forget indexes after rows of table were changed or removed."""
+        for indexes in (self._unique_index, self._eq_index):
+            for key in [k for k in indexes if k[0] == table]:
+                del indexes[key]
+
+
+class LocalQueryBuilder:
+    """One PostgREST request against a LocalDatabase table."""
+
+    def __init__(self, db: LocalDatabase, table: str):
+        self._db = db
+        self._table = table
+        self._operation = "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self._eq_filters: List[tuple] = []
+        self._in_filters: List[tuple] = []
+        self._order: List[tuple] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single = False
+
+    # --- operations -------------------------------------------------------
+    def select(self, *columns, count: Optional[str] = None, **_):
+        self._operation = "select"
+        self._columns = ",".join(columns) if columns else "*"
+        self._count = count
+        return self
+
+    def insert(self, json, count: Optional[str] = None, returning=None, upsert: bool = False, **_):
+        self._operation = "upsert" if upsert else "insert"
+        self._payload = json
+        self._count = count
+        return self
+
+    def upsert(self, json, count: Optional[str] = None, returning=None, ignore_duplicates: bool = False,
+               on_conflict: str = "", **_):
+        self._operation = "upsert"
+        self._payload = json
+        self._count = count
+        self._on_conflict = on_conflict or None
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json, count: Optional[str] = None, **_):
+        self._operation = "update"
+        self._payload = json
+        self._count = count
+        return self
+
+    def delete(self, count: Optional[str] = None, **_):
+        self._operation = "delete"
+        self._count = count
+        return self
+
+    # --- filters ----------------------------------------------------------
+    def _add(self, column: str, op: str, value):
+        self._filters.append(lambda row: _match(row.get(column), op, value))
+        return self
+
+    def eq(self, column, value):
+        self._eq_filters.append((column, value))
+        return self._add(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._add(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._add(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._add(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._add(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._add(column, "lte", value)
+
+    def like(self, column, pattern):
+        return self._add(column, "like", pattern)
+
+    def ilike(self, column, pattern):
+        return self._add(column, "ilike", pattern)
+
+    def in_(self, column, values):
+        values = frozenset(_norm(v) for v in values)
+        self._in_filters.append((column, values))
+        return self._add(column, "in", values)
+
+    def is_(self, column, value):
+        return self._add(column, "is", value)
+
+    def filter(self, column, operator, criteria):
+        if operator == "in" and isinstance(criteria, str):
+            criteria = [v.strip().strip('"') for v in criteria.strip("()").split(",")]
+        return self._add(column, operator, criteria)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None):
+        conditions = _parse_or(filters)
+        self._filters.append(lambda row: any(_match(row.get(c), op, v) for c, op, v in conditions))
+        return self
+
+    # --- modifiers --------------------------------------------------------
+    def order(self, column, *, desc: bool = False, nullsfirst: bool = False, foreign_table=None):
+        self._order.append((column, desc, nullsfirst))
+        return self
+
+    def range(self, start: int, end: int, foreign_table=None):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def limit(self, size: int, *, foreign_table=None):
+        self._limit = size
+        return self
+
+    def offset(self, size: int):
+        self._offset = size
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._single = True
+        return self
+
+    # --- execution --------------------------------------------------------
+    def _matching(self) -> List[Dict[str, Any]]:
+        if self._eq_filters:
+            column, value = self._eq_filters[0]
+            candidates = self._db.rows_where(self._table, column, value)
+        elif self._in_filters:
+            column, values = self._in_filters[0]
+            candidates = [row for value in values for row in self._db.rows_where(self._table, column, value)]
+        else:
+            candidates = self._db.table(self._table)
+        return [row for row in candidates if all(f(row) for f in self._filters)]
+
+    def _sorted(self, rows):
+        for column, desc, nullsfirst in reversed(self._order):
+            present = sorted((r for r in rows if r.get(column) is not None),
+                             key=lambda r: _SortKey(r.get(column)), reverse=desc)
+            nulls = [r for r in rows if r.get(column) is None]
+            # Postgres puts NULLs last ascending and first descending by default
+            rows = nulls + present if (nullsfirst or desc) else present + nulls
+        return rows
+
+    def execute(self) -> LocalResponse:
+        self._db.round_trip()
+        with self._db.lock:
+            if self._operation == "select":
+                return self._execute_select()
+            if self._operation in ("insert", "upsert"):
+                return self._execute_insert()
+            if self._operation == "update":
+                return self._execute_update()
+            return self._execute_delete()
+
+    def _execute_select(self) -> LocalResponse:
+        rows = self._sorted(self._matching())
+        count = len(rows) if self._count else None
+        end = None if self._limit is None else self._offset + self._limit
+        rows = rows[self._offset:end]
+        data = [_project(self._db, self._table, row, self._columns) for row in rows]
+        if self._single:
+            if len(data) != 1:
+                raise APIError({"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned",
+                                "details": f"The result contains {len(data)} rows", "hint": None})
+            return LocalResponse(data[0], count)
+        return LocalResponse(data, count)
+
+    def _execute_insert(self) -> LocalResponse:
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        pk = PRIMARY_KEYS.get(self._table)
+        conflict = self._on_conflict or pk
+        out = []
+        for values in payload:
+            target = _generate(self._table, dict(values)).get(conflict)
+            if self._operation == "upsert" and target is not None:
+                existing = next(iter(self._db.rows_where(self._table, conflict, target)), None)
+                if existing is not None and self._ignore_duplicates:
+                    continue
+                if existing is not None:
+                    old = dict(existing)
+                    existing.update(copy.deepcopy(values))
+                    _generate(self._table, existing)
+                    self._db.invalidate_indexes(self._table)
+                    self._db.fire_triggers(self._table, old, existing)
+                    out.append(copy.deepcopy(existing))
+                    continue
+            out.append(copy.deepcopy(self._db.insert_row(self._table, copy.deepcopy(values))))
+        return LocalResponse(out, len(out) if self._count else None)
+
+    def _execute_update(self) -> LocalResponse:
+        rows = self._matching()
+        changes = []
+        for row in rows:
+            changes.append((dict(row), row))
+            row.update(copy.deepcopy(self._payload))
+            _generate(self._table, row)
+            if "updated_at" in row:
+                row["updated_at"] = _now()
+        self._db.invalidate_indexes(self._table)
+        for old, new in changes:
+            self._db.fire_triggers(self._table, old, new)
+        return LocalResponse(copy.deepcopy(rows), len(rows) if self._count else None)
+
+    def _execute_delete(self) -> LocalResponse:
+        rows = self._matching()
+        doomed = {id(r) for r in rows}
+        self._db.tables[self._table] = [r for r in self._db.table(self._table) if id(r) not in doomed]
+        self._db.invalidate_indexes(self._table)
+        for row in rows:
+            self._db.fire_triggers(self._table, row, None)
+        return LocalResponse(copy.deepcopy(rows), len(rows) if self._count else None)
+
+
+class _SortKey:
+    """Sort key ordering numbers numerically and everything else as text."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return _compare(self.value, other.value) < 0
+
+
+def _project(db: LocalDatabase, table: str, row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+    """Apply a PostgREST select list to one row, resolving embedded resources."""
+    out: Dict[str, Any] = {}
+    for item in _split_top_level(columns or "*"):
+        if "(" in item:
+            head, inner = item.split("(", 1)
+            inner = inner[:-1]
+            alias, _, relation = head.partition(":")
+            relation = (relation or alias).split("!")[0].strip()
+            out[alias.strip()] = _embed(db, table, row, relation, inner)
+        elif item == "*":
+            out.update(copy.deepcopy(row))
+        else:
+            alias, _, column = item.partition(":")
+            column = (column or alias).split("::")[0].strip()
+            out[alias.strip()] = copy.deepcopy(row.get(column))
+    return out
+
+
+def _embed(db: LocalDatabase, table: str, row: Dict[str, Any], relation: str, columns: str):
+    """Many-to-one when row holds the related key, one-to-many when related rows hold ours."""
+    related_pk = PRIMARY_KEYS.get(relation)
+    if related_pk and related_pk in row:
+        matches = db.rows_where(relation, related_pk, row[related_pk]) if row[related_pk] is not None else []
+        return _project(db, relation, matches[0], columns) if matches else None
+    own_pk = PRIMARY_KEYS.get(table)
+    children = db.rows_where(relation, own_pk, row.get(own_pk)) if own_pk else []
+    return [_project(db, relation, r, columns) for r in children]
+
+
+class LocalRPCBuilder:
+    """Deferred call of a local database function."""
+
+    def __init__(self, db: LocalDatabase, fn: str, params: Dict[str, Any]):
+        if fn not in db.functions:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{fn}",
+                            "details": None, "hint": None})
+        self._db = db
+        self._fn = fn
+        self._params = params
+
+    def execute(self) -> LocalResponse:
+        self._db.round_trip()
+        with self._db.lock:
+            return LocalResponse(copy.deepcopy(self._db.functions[self._fn](self._db, self._params)))
+
+
+class LocalSupabaseClient:
+    """Drop-in for supabase.Client covering table(), from_() and rpc()."""
+
+    def __init__(self, db: Optional[LocalDatabase] = None, latency: float = 0.0, jitter: float = 0.0):
+        self.db = db or LocalDatabase(latency=latency, jitter=jitter)
+
+    def table(self, table_name: str) -> LocalQueryBuilder:
+        return LocalQueryBuilder(self.db, table_name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None, *args, **kwargs) -> LocalRPCBuilder:
+        return LocalRPCBuilder(self.db, fn, params or {})
+
+
+def _create_dealer_with_user(db: LocalDatabase, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Python twin of the create_dealer_with_user SQL function (one transaction under db.lock)."""
+    user = db.insert_row("users", {
+        "email": params["p_email"],
+        "password_hash": params["p_password_hash"],
+        "full_name": params["p_full_name"],
+        "contact_number": params.get("p_user_contact_number"),
+        "role": "buyer",
+        "status": "active",
+    })
+    try:
+        taken = {d.get("customer_code") for d in db.table("dealers")}
+        while True:
+            code = str(db.next_value("dealer_customer_code_seq"))
+            if code not in taken:
+                break
+        dealer = db.insert_row("dealers", {
+            "user_id": user["user_id"],
+            "customer_code": code,
+            "company_name": params["p_company_name"],
+            "contact_person": params.get("p_contact_person"),
+            "contact_number": params.get("p_contact_number"),
+            "billing_address": params.get("p_billing_address"),
+            "shipping_address": params.get("p_shipping_address"),
+        })
+    except Exception:
+        db.tables["users"] = [u for u in db.table("users") if u is not user]
+        db.invalidate_indexes("users")
+        raise
+    return {"user": {k: v for k, v in user.items() if k != "password_hash"}, "dealer": dealer}
+
+
+def _consolidate_purchase_orders(db: LocalDatabase, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Python twin of the consolidate_purchase_orders SQL function (one transaction under db.lock)."""
+    po_ids = params.get("p_po_ids")
+    start, end = params.get("p_start"), params.get("p_end")
+    members = sorted(
+        (o for o in db.rows_where("purchase_orders", "status", "approved")
+         if o.get("combined_po_id") is None
+         and (po_ids is None or o["po_id"] in po_ids)
+         and (start is None or _match(o.get("po_date"), "gte", start))
+         and (end is None or _match(o.get("po_date"), "lt", end))),
+        key=lambda o: o["po_id"],
+    )
+    if not members:
+        raise APIError({"code": NO_DATA_FOUND, "message": "No approved purchase orders to consolidate",
+                        "details": None, "hint": None})
+
+    ex_vat = sum((Decimal(str(o.get("total_tp") or 0)) for o in members), Decimal("0"))
+    vat = sum((Decimal(str(o.get("total_vat") or 0)) for o in members), Decimal("0"))
+    po_id = db.next_value("purchase_orders.po_id")
+    combined = db.insert_row("purchase_orders", {
+        "po_id": po_id,
+        "po_number": f"CPO-{datetime.now(timezone.utc):%Y%m%d}-{po_id}",
+        "dealer_id": None,
+        "created_by_user": params["p_created_by"],
+        "po_date": _now(),
+        "status": "combined",
+        "total_tp": str(ex_vat),
+        "total_vat": str(vat),
+        "vat_percent": str((vat * 100 / ex_vat).quantize(Decimal("0.01")) if ex_vat else Decimal("0")),
+        "approved_at": None,
+        "combined_po_id": None,
+    })
+
+    lines: Dict[str, Dict[str, Any]] = {}
+    for order in members:
+        for item in db.rows_where("purchase_order_items", "po_id", order["po_id"]):
+            line = lines.setdefault(item["product_id"], {"quantity": 0, "total": Decimal("0"), "pack_size": None})
+            line["quantity"] += item["quantity"]
+            line["total"] += Decimal(str(item.get("total_price") or 0))
+            line["pack_size"] = max(filter(None, (line["pack_size"], item.get("pack_size_snapshot"))), default=None)
+    for product_id, line in lines.items():
+        db.insert_row("purchase_order_items", {
+            "po_id": po_id,
+            "product_id": product_id,
+            "pack_size_snapshot": line["pack_size"],
+            "quantity": line["quantity"],
+            "unit_price": float((line["total"] / line["quantity"]).quantize(Decimal("0.01"))),
+            "total_price": float(line["total"]),
+        })
+
+    for order in members:
+        old = dict(order)
+        order["combined_po_id"] = po_id
+        db.fire_triggers("purchase_orders", old, order)
+    db.invalidate_indexes("purchase_orders")
+
+    return {
+        "po_id": po_id,
+        "po_number": combined["po_number"],
+        "po_ids": [o["po_id"] for o in members],
+        "line_count": len(lines),
+        "total_quantity": sum(line["quantity"] for line in lines.values()),
+        "total_tp": float(ex_vat),
+        "total_vat": float(vat),
+    }
+
+
+def _purchase_orders_revenue_rollup(db: LocalDatabase, old: Optional[dict], new: Optional[dict]) -> None:
+    """Python twin of the purchase_orders_revenue_rollup trigger: keep dealer_monthly_revenue current."""
+    for row, sign in ((old, -1), (new, 1)):
+        if not row or row.get("status") != "approved" or not row.get("po_date"):
+            continue
+        po_date = datetime.fromisoformat(str(row["po_date"]).replace("Z", "+00:00"))
+        bucket = next((r for r in db.rows_where("dealer_monthly_revenue", "dealer_id", row.get("dealer_id"))
+                       if r["year"] == po_date.year and r["month"] == po_date.month), None)
+        if bucket is None:
+            bucket = db.insert_row("dealer_monthly_revenue", {
+                "year": po_date.year, "month": po_date.month, "dealer_id": row.get("dealer_id"),
+                "order_count": 0, "revenue_ex_vat": 0.0, "revenue_vat": 0.0,
+            })
+        bucket["order_count"] += sign
+        bucket["revenue_ex_vat"] = round(bucket["revenue_ex_vat"] + sign * float(row.get("total_tp") or 0), 2)
+        bucket["revenue_vat"] = round(bucket["revenue_vat"] + sign * float(row.get("total_vat") or 0), 2)
+
+
+def _data_versions_bump(table: str) -> Callable[[LocalDatabase, Optional[dict], Optional[dict]], None]:
+    """Python twin of the data_versions_bump trigger on one table (bumped per row here, not per transaction)."""
+    def bump(db: LocalDatabase, old: Optional[dict], new: Optional[dict]) -> None:
+        counter = next(iter(db.rows_where("data_versions", "name", table)), None)
+        if counter is None:
+            db.insert_row("data_versions", {"name": table, "version": 1, "updated_at": _now()})
+        else:
+            counter["version"] += 1
+            counter["updated_at"] = _now()
+    return bump
@@ -0,0 +1,154 @@
+"""
+Seeding fixtures for the local Supabase stand-in.
+
+seed_database() fills a LocalDatabase with an admin, one buyer user per
+dealer, a product catalog, purchase orders with items spread over the last
+year and the invoice settings row. Row contents are deterministic for a
+given seed, ids included, so separately seeded workers agree on them.
+All seeded users share one password so benchmarks can log in as anyone.
+"""
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict
+
+from core.security import hash_password
+from local_supabase.client import LocalDatabase, _create_dealer_with_user
+
+ADMIN_EMAIL = "admin@example.com"
+DEFAULT_PASSWORD = "password123"
+
+PACK_SIZES = ["10's", "20's", "30's", "50's", "100 ml", "200 ml", "1 x 10"]
+# Rough production mix of order states
+STATUS_WEIGHTS = {"draft": 15, "submitted": 25, "approved": 60}
+VAT_RATE = Decimal("0.15")
+
+
+def _initials(name: str) -> str:
+    return "".join(word[0].upper() for word in name.split() if word) or "XX"
+
+
+def seed_database(
+    db: LocalDatabase,
+    dealers: int = 20,
+    products: int = 200,
+    purchase_orders: int = 2000,
+    max_items: int = 12,
+    seed: int = 42,
+    password: str = DEFAULT_PASSWORD,
+) -> Dict[str, Any]:
+    """
+    Populate db and return the seeded admin, dealers and product ids.
+    Rows are written directly, without simulated latency.
+    """
+    rng = random.Random(seed)
+    password_hash = hash_password(password)
+    now = datetime.now(timezone.utc)
+
+    db.uuid_factory = lambda: uuid.UUID(int=rng.getrandbits(128), version=4)
+    try:
+        with db.lock:
+            db.insert_row("app_settings", {
+                "key": "invoice",
+                "value": json.dumps({"vat": float(VAT_RATE), "commission": 0.15, "version": 1}),
+            })
+
+            admin = db.insert_row("users", {
+                "email": ADMIN_EMAIL,
+                "password_hash": password_hash,
+                "full_name": "Local Admin",
+                "role": "admin",
+                "status": "active",
+            })
+
+            dealer_rows = []
+            for i in range(1, dealers + 1):
+                contact = f"{rng.choice(['Ahnaf', 'Rahim', 'Karim', 'Nusrat', 'Farhana', 'Tanvir'])} " \
+                          f"{rng.choice(['Hassan', 'Hossain', 'Ahmed', 'Chowdhury', 'Islam'])}"
+                created = _create_dealer_with_user(db, {
+                    "p_email": f"dealer{i:03d}@example.com",
+                    "p_password_hash": password_hash,
+                    "p_full_name": contact,
+                    "p_user_contact_number": f"017{i:08d}",
+                    "p_company_name": f"Dealer Pharmacy {i:03d}",
+                    "p_contact_person": contact,
+                    "p_contact_number": f"018{i:08d}",
+                    "p_billing_address": f"{i} Road, Dhaka",
+                    "p_shipping_address": f"{i} Road, Dhaka",
+                })
+                dealer_rows.append(created["dealer"])
+
+            product_rows = []
+            for i in range(1, products + 1):
+                price = Decimal(rng.randint(2000, 200000)) / 100
+                product_rows.append(db.insert_row("products", {
+                    "name": f"Product {i:04d}",
+                    "pack_size": rng.choice(PACK_SIZES),
+                    "trade_price_incl_vat": float(price),
+                    "TP": float((price / (1 + VAT_RATE)).quantize(Decimal("0.01"))),
+                    "VAT": float(VAT_RATE * 100),
+                    "MRP": float((price * Decimal("1.2")).quantize(Decimal("0.01"))),
+                    "stock_qty": 0,
+                    "status": "active" if rng.random() > 0.05 else "discontinued",
+                    "image": None,
+                }))
+
+            # PO number prefixes as PurchaseOrderServiceSB assigns them: initials,
+            # plus a collision index for later dealers sharing the same initials
+            by_initials: Dict[str, list] = {}
+            for dealer in dealer_rows:
+                by_initials.setdefault(_initials(dealer["contact_person"]), []).append(dealer["dealer_id"])
+            prefixes = {}
+            for initials, ids in by_initials.items():
+                for index, dealer_id in enumerate(sorted(ids)):
+                    prefixes[dealer_id] = initials if index == 0 else f"{initials}{index}"
+
+            statuses = list(STATUS_WEIGHTS)
+            weights = list(STATUS_WEIGHTS.values())
+            sequence: Dict[str, int] = {}
+            for _ in range(purchase_orders if dealer_rows and product_rows else 0):
+                dealer = rng.choice(dealer_rows)
+                sequence[dealer["dealer_id"]] = sequence.get(dealer["dealer_id"], 0) + 1
+                po_date = now - timedelta(days=rng.uniform(0, 365))
+                status = rng.choices(statuses, weights)[0]
+
+                lines = []
+                total = Decimal("0.00")
+                for product in rng.sample(product_rows, rng.randint(1, min(max_items, len(product_rows)))):
+                    quantity = rng.randint(1, 50)
+                    unit_price = Decimal(str(product["trade_price_incl_vat"]))
+                    line_total = unit_price * quantity
+                    total += line_total
+                    lines.append({
+                        "product_id": product["product_id"],
+                        "quantity": quantity,
+                        "unit_price": float(unit_price),
+                        "total_price": float(line_total),
+                        "pack_size_snapshot": product["pack_size"],
+                    })
+
+                order = db.insert_row("purchase_orders", {
+                    "po_number": f"{prefixes[dealer['dealer_id']]}-{sequence[dealer['dealer_id']]:03d}",
+                    "dealer_id": dealer["dealer_id"],
+                    "created_by_user": dealer["user_id"],
+                    "po_date": po_date.isoformat(),
+                    "status": status,
+                    "total_tp": str(total.quantize(Decimal("0.01"))),
+                    "total_vat": str((total * VAT_RATE).quantize(Decimal("0.01"))),
+                    "vat_percent": str((VAT_RATE * 100).quantize(Decimal("0.01"))),
+                    "approved_at": (po_date + timedelta(days=1)).isoformat() if status == "approved" else None,
+                    "combined_po_id": None,
+                })
+                for line in lines:
+                    db.insert_row("purchase_order_items", {**line, "po_id": order["po_id"]})
+    finally:
+        db.uuid_factory = uuid.uuid4
+
+    return {
+        "admin": {k: v for k, v in admin.items() if k != "password_hash"},
+        "password": password,
+        "dealers": dealer_rows,
+        "product_ids": [p["product_id"] for p in product_rows if p["status"] == "active"],
+    }
@@ -1,9 +1,35 @@
-from fastapi import FastAPI
-from api.v1 import users, dealers, products, purchase_orders, settings, dashboard
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from api.v1 import users, dealers, products, purchase_orders, settings, dashboard, health, reports
 from fastapi.middleware.cors import CORSMiddleware
+from core.compression import CompressionMiddleware
+from core.config import settings as app_settings
+from core.document_pool import shutdown_document_pool, start_document_pool
+from core.logging import RequestIdMiddleware, get_logger
+from core.metrics import MetricsMiddleware, metrics_response
+from core.query_budget import QueryBudgetMiddleware
+from core.tracing import setup_tracing
+from services.settings_service_supabase import SettingsServiceSB
 import os
 
-app = FastAPI(title="ASK Intl Dealer Management Platform", version="1.0")
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the settings cache and the document pool before taking traffic
+    try:
+        await run_in_threadpool(SettingsServiceSB.get_settings)
+    except HTTPException as e:
+        logger.warning("Could not warm the settings cache at startup: %s", e.detail)
+    await run_in_threadpool(start_document_pool)
+    yield
+    await run_in_threadpool(shutdown_document_pool)
+
+
+app = FastAPI(title="ASK Intl Dealer Management Platform", version="1.0", lifespan=lifespan)
 
 # Configure CORS
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5174,https://dealer.askgroup-bd.com").split(",")
@@ -15,10 +41,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=app_settings.COMPRESSION_MINIMUM_SIZE)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
+setup_tracing(app)
 
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(dealers.router, prefix="/api/v1/dealers", tags=["Dealers"])
 app.include_router(products.router, prefix="/api/v1/products", tags=["Products"])
 app.include_router(purchase_orders.router, prefix="/api/v1/purchase-orders", tags=["Purchase Orders"])
 app.include_router(settings.router, prefix="/api/v1/settings", tags=["Settings"])
-app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
\ No newline at end of file
+app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
+app.include_router(reports.router, prefix="/api/v1/reports", tags=["Reports"])
+app.include_router(health.router, prefix="/health", tags=["Health"])
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return metrics_response()
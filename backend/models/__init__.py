@@ -5,6 +5,8 @@ from .dealer import Dealer
 from .product import Product
 from .purchase_order import PurchaseOrder
 from .purchase_order_item import PurchaseOrderItem
+from .dealer_monthly_revenue import DealerMonthlyRevenue
+from .idempotency_key import IdempotencyKey
 
 
 __all__ = [
@@ -14,4 +16,6 @@ __all__ = [
     "Product",
     "PurchaseOrder",
     "PurchaseOrderItem",
+    "DealerMonthlyRevenue",
+    "IdempotencyKey",
 ]
@@ -0,0 +1,19 @@
+# backend/models/dealer_monthly_revenue.py
+from sqlalchemy import Column, SmallInteger, Integer, Numeric, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+
+class DealerMonthlyRevenue(Base):
+    """
+    Approved-order revenue per dealer and calendar month. Maintained by
+    triggers on purchase_orders (migration e5b2c8d7f190), never written by
+    the application.
+    """
+    __tablename__ = "dealer_monthly_revenue"
+
+    year = Column(SmallInteger, primary_key=True)
+    month = Column(SmallInteger, primary_key=True)
+    dealer_id = Column(UUID(as_uuid=True), ForeignKey("dealers.dealer_id", ondelete="CASCADE"), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue_ex_vat = Column(Numeric(14, 2), nullable=False, default=0)
+    revenue_vat = Column(Numeric(14, 2), nullable=False, default=0)
@@ -0,0 +1,19 @@
+# backend/models/idempotency_key.py
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from .base import Base
+
+class IdempotencyKey(Base):
+    """
+    A claimed Idempotency-Key ("<scope>:<client key>") and, once the
+    request finished, its response (migration b8d3f6a1c024). Written by
+    core.idempotency only.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(Text, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    response = Column(JSONB)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
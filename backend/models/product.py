@@ -1,6 +1,6 @@
 """
 Product model for managing inventory items."""
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, Enum
+from sqlalchemy import Column, Computed, String, Integer, Numeric, DateTime, Enum, Index, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from .base import Base, TimestampMixin
@@ -25,6 +25,23 @@ class Product(Base, TimestampMixin):
     vat = Column(Numeric(5, 2))
     mrp = Column(Numeric(12, 2))
     tp = Column(Numeric(12, 2))
+    # Catalog import identity, unique so a retried import batch can't insert
+    # a product twice (migration c9e2a4f7d315)
+    product_key = Column(
+        Text,
+        Computed("lower(btrim(name)) || '|' || lower(btrim(coalesce(pack_size, '')))", persisted=True),
+    )
+
+    # Trigram index for name ILIKE '%term%' over active products (migration c3d8f2a61e47)
+    __table_args__ = (
+        Index(
+            "ix_products_active_name_trgm", name,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_where=status == ProductStatus.ACTIVE,
+        ),
+        Index("ux_products_product_key", product_key, unique=True),
+    )
 
     purchase_order_items = relationship(
         "PurchaseOrderItem", 
@@ -1,6 +1,6 @@
 # backend/models/purchase_order.py
 import uuid
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, Enum, ForeignKey
+from sqlalchemy import CheckConstraint, Column, String, Integer, Numeric, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base, TimestampMixin
@@ -12,14 +12,17 @@ class PurchaseOrderStatus(str, enum.Enum):
     APPROVED = "approved"
     INVOICED = "invoiced"
     CANCELLED = "cancelled"
+    # Supplier PO combining approved dealer orders (their combined_po_id)
+    COMBINED = "combined"
 
 class PurchaseOrder(Base, TimestampMixin):
     __tablename__ = "purchase_orders"
 
     po_id = Column(Integer, primary_key=True, index=True)
     po_number = Column(String(50), unique=True, nullable=False, index=True)
-    dealer_id = Column(UUID(as_uuid=True), ForeignKey("dealers.dealer_id"), nullable=False, index=True)
-    created_by_user = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False, index=True)
+    # NULL only on combined orders
+    dealer_id = Column(UUID(as_uuid=True), ForeignKey("dealers.dealer_id"), nullable=True, index=True)
+    created_by_user = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False)
     external_ref_code = Column(String(100))
     po_date = Column(DateTime, nullable=False)
     status = Column(Enum(PurchaseOrderStatus), default=PurchaseOrderStatus.DRAFT, nullable=False)
@@ -30,6 +33,21 @@ class PurchaseOrder(Base, TimestampMixin):
     approved_at = Column(DateTime)
     combined_po_id = Column(Integer, ForeignKey("purchase_orders.po_id"), nullable=True)
 
+    # Indexes for the list/count/dashboard query shapes (migration c3d8f2a61e47)
+    __table_args__ = (
+        Index("ix_purchase_orders_created_by_user_po_id", created_by_user, po_id.desc()),
+        Index("ix_purchase_orders_created_by_user_status_po_id", created_by_user, status, po_id.desc()),
+        Index("ix_purchase_orders_status_po_date", status, po_date.desc()),
+        Index(
+            "ix_purchase_orders_approved_dealer_id_po_date", dealer_id, po_date,
+            postgresql_where=status == PurchaseOrderStatus.APPROVED,
+        ),
+        Index("ix_purchase_orders_po_date", po_date.desc()),
+        # Members of a combined order (migration a7c2d5e8b913)
+        Index("ix_purchase_orders_combined_po_id", combined_po_id, postgresql_where=combined_po_id.isnot(None)),
+        CheckConstraint("dealer_id IS NOT NULL OR status = 'COMBINED'", name="ck_purchase_orders_dealer_id"),
+    )
+
     dealer = relationship(
         "Dealer", 
         back_populates="purchase_orders",
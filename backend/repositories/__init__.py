@@ -0,0 +1,45 @@
+# Repositories package
+from typing import Optional
+
+from core.config import settings
+from .base import PurchaseOrderRepository
+
+_purchase_order_repository: Optional[PurchaseOrderRepository] = None
+_async_purchase_order_repository = None
+
+
+def get_purchase_order_repository() -> PurchaseOrderRepository:
+    """
+    Return the purchase order repository selected by DATA_BACKEND:
+    "supabase" (PostgREST over HTTP, default) or "postgres" (direct SQL).
+    """
+    global _purchase_order_repository
+    if _purchase_order_repository is None:
+        if settings.DATA_BACKEND == "postgres":
+            from .sql_repository import SQLPurchaseOrderRepository
+            _purchase_order_repository = SQLPurchaseOrderRepository()
+        elif settings.DATA_BACKEND == "supabase":
+            from .supabase_repository import SupabasePurchaseOrderRepository
+            _purchase_order_repository = SupabasePurchaseOrderRepository()
+        else:
+            raise RuntimeError(f"Unknown DATA_BACKEND: {settings.DATA_BACKEND!r} (expected 'supabase' or 'postgres')")
+    return _purchase_order_repository
+
+
+def get_async_purchase_order_repository():
+    """
+    The async (asyncpg) purchase order reader when DATA_BACKEND is
+    "postgres", None otherwise; PostgREST has no async client here.
+    """
+    global _async_purchase_order_repository
+    if _async_purchase_order_repository is None and settings.DATA_BACKEND == "postgres":
+        from .sql_repository import AsyncSQLPurchaseOrderRepository
+        _async_purchase_order_repository = AsyncSQLPurchaseOrderRepository()
+    return _async_purchase_order_repository
+
+
+__all__ = [
+    "PurchaseOrderRepository",
+    "get_async_purchase_order_repository",
+    "get_purchase_order_repository",
+]
@@ -0,0 +1,119 @@
+"""
+Repository interface for the purchase order aggregate.
+
+Services talk to this interface instead of a concrete client, so the same
+business logic runs against Supabase (PostgREST over HTTP) or directly
+against Postgres through SQLAlchemy. Orders are returned as plain dicts in
+the shape the Supabase tables use, with the dealer nested under "dealer"
+and items (each with a nested "product") under "items". Lists, counts and
+exports leave out combined (supplier) orders unless status="combined" is
+asked for.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class PurchaseOrderRepository(ABC):
+    """Data access for purchase orders and their items."""
+
+    @abstractmethod
+    def get_order(
+        self,
+        po_id: int,
+        created_by_user: Optional[str] = None,
+        dealer_id: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch one hydrated order, optionally scoped to a creator or dealer."""
+
+    @abstractmethod
+    def list_orders(
+        self,
+        created_by_user: Optional[str] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """List hydrated orders, newest first."""
+
+    @abstractmethod
+    def list_order_columns(
+        self,
+        columns: List[str],
+        created_by_user: Optional[str] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Only the given order columns (Supabase names), newest first, with no
+        dealer or item hydration, and the count of all matching orders.
+        """
+
+    @abstractmethod
+    def count_orders(
+        self,
+        created_by_user: Optional[str] = None,
+        status: Optional[str] = None,
+        dealer_id: Optional[str] = None,
+    ) -> int:
+        """Count orders matching the filters."""
+
+    @abstractmethod
+    def iter_orders(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        status: Optional[str] = None,
+        dealer_id: Optional[str] = None,
+        chunk_size: int = 200,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield all matching hydrated orders in po_id order, chunk_size at a
+        time, without holding more than one chunk in memory. start/end are
+        ISO dates bounding po_date (start inclusive, end exclusive).
+        """
+
+    @abstractmethod
+    def get_orders(self, po_ids: List[int]) -> List[Dict[str, Any]]:
+        """Hydrated orders for po_ids (missing ids are skipped), loaded in batches."""
+
+    @abstractmethod
+    def get_order_states(self, po_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Current status and combined_po_id of each existing order among po_ids."""
+
+    @abstractmethod
+    def transition_orders(self, po_ids: List[int], from_statuses: List[str], values: Dict[str, Any]) -> List[int]:
+        """
+        Set values on the orders among po_ids whose status is still one of
+        from_statuses and that are not part of a combined order, in one
+        set-based update. Returns the po_ids updated.
+        """
+
+    @abstractmethod
+    def consolidate_orders(
+        self,
+        created_by_user: str,
+        po_ids: Optional[List[int]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Combine the approved, not yet combined orders among po_ids and/or
+        with po_date in [start, end) into one combined order, its lines
+        summed per product (database function consolidate_purchase_orders).
+        Returns po_id, po_number, po_ids, line_count, total_quantity,
+        total_tp and total_vat of the combined order, or None when no
+        order qualified.
+        """
+
+    @abstractmethod
+    def create_order(self, order: Dict[str, Any], items: List[Dict[str, Any]]) -> int:
+        """Insert an order and its items; returns the new po_id."""
+
+    @abstractmethod
+    def replace_items(self, po_id: int, items: List[Dict[str, Any]], totals: Dict[str, Any]) -> None:
+        """Replace an order's items and stored totals."""
+
+    @abstractmethod
+    def update_order(self, po_id: int, values: Dict[str, Any], dealer_id: Optional[str] = None) -> None:
+        """Update order columns, optionally scoped to a dealer."""
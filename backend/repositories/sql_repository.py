@@ -0,0 +1,292 @@
+"""
+Purchase order repository backed directly by Postgres through SQLAlchemy.
+
+Uses the pooled engine from core.database and the ORM models, whose
+relationships already eager-load the dealer, items and item products with
+joins, so one order or one page of orders is a single SQL round trip.
+Writes run inside a real transaction. AsyncSQLPurchaseOrderRepository runs
+the same read statements over the asyncpg engine for async endpoints.
+"""
+import enum
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, inspect, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import joinedload, selectinload
+
+from core.database import SessionLocal, get_async_session_factory
+from models.purchase_order import PurchaseOrder, PurchaseOrderStatus
+from models.purchase_order_item import PurchaseOrderItem
+from repositories.base import PurchaseOrderRepository
+
+# Supabase column names used by the services, mapped to the model columns
+_ORDER_COLUMN_ALIASES = {"total_tp": "total_ex_vat", "total_vat": "vat_amount"}
+
+# Raised by consolidate_purchase_orders when no order qualifies
+_NO_DATA_FOUND = "P0002"
+
+_UUID_COLUMNS = {"dealer_id", "created_by_user", "product_id"}
+_DATETIME_COLUMNS = {"po_date", "approved_at"}
+
+
+def _json_value(value):
+    """Convert column values to the JSON-style values PostgREST returns."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _row_to_dict(obj) -> Optional[Dict[str, Any]]:
+    if obj is None:
+        return None
+    return {attr.key: _json_value(getattr(obj, attr.key)) for attr in inspect(obj).mapper.column_attrs}
+
+
+def _order_to_dict(po: PurchaseOrder, products: Optional[Dict[Any, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """products, when given, caches product dicts by id across the orders of a batch."""
+    order = _row_to_dict(po)
+    # Keep the Supabase-side names available so services see one shape
+    order["total_tp"] = order.get("total_ex_vat")
+    order["total_vat"] = order.get("vat_amount")
+    order["dealer"] = _row_to_dict(po.dealer)
+    if products is None:
+        order["items"] = [{**_row_to_dict(it), "product": _row_to_dict(it.product)} for it in po.items]
+    else:
+        order["items"] = []
+        for it in po.items:
+            if it.product_id not in products:
+                products[it.product_id] = _row_to_dict(it.product)
+            order["items"].append({**_row_to_dict(it), "product": products[it.product_id]})
+    return order
+
+
+def _coerce(key: str, value):
+    """Convert JSON-style service values back to column types."""
+    if isinstance(value, str):
+        if key in _UUID_COLUMNS:
+            return uuid.UUID(value)
+        if key in _DATETIME_COLUMNS:
+            return datetime.fromisoformat(value)
+        if key == "status":
+            return PurchaseOrderStatus(value)
+    return value
+
+
+def _order_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate service-side order fields to model columns."""
+    out = {}
+    for key, value in values.items():
+        key = _ORDER_COLUMN_ALIASES.get(key, key)
+        out[key] = _coerce(key, value)
+    return out
+
+
+def _item_values(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: _coerce(key, value) for key, value in item.items()}
+
+
+def _order_filters(created_by_user=None, status=None, dealer_id=None):
+    filters = []
+    if created_by_user is not None:
+        filters.append(PurchaseOrder.created_by_user == uuid.UUID(str(created_by_user)))
+    if status is not None:
+        filters.append(PurchaseOrder.status == PurchaseOrderStatus(status))
+    if dealer_id is not None:
+        filters.append(PurchaseOrder.dealer_id == uuid.UUID(str(dealer_id)))
+    return filters
+
+
+def _listing_filters(created_by_user=None, status=None, dealer_id=None):
+    """_order_filters for lists and counts, which leave out combined (supplier) orders unless asked for."""
+    filters = _order_filters(created_by_user, status, dealer_id)
+    if status is None:
+        filters.append(PurchaseOrder.status != PurchaseOrderStatus.COMBINED)
+    return filters
+
+
+def _totals(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill the derived total columns the model requires."""
+    values = _order_values(values)
+    ex_vat = Decimal(str(values.get("total_ex_vat", 0)))
+    vat = Decimal(str(values.get("vat_amount", 0)))
+    values.setdefault("vat_percent", Decimal("0") if not ex_vat else (vat * 100 / ex_vat).quantize(Decimal("0.01")))
+    values["total_inc_vat"] = ex_vat + vat
+    return values
+
+
+def _order_query():
+    return select(PurchaseOrder) \
+        .options(joinedload(PurchaseOrder.dealer), joinedload(PurchaseOrder.items).joinedload(PurchaseOrderItem.product))
+
+
+def _get_order_stmt(po_id, created_by_user=None, dealer_id=None):
+    return _order_query().where(PurchaseOrder.po_id == po_id, *_order_filters(created_by_user, dealer_id=dealer_id))
+
+
+def _list_orders_stmt(created_by_user=None, status=None, skip=0, limit=100):
+    return _order_query() \
+        .where(*_listing_filters(created_by_user, status)) \
+        .order_by(PurchaseOrder.po_id.desc()) \
+        .offset(skip) \
+        .limit(limit)
+
+
+def _order_columns_stmt(columns, created_by_user=None, status=None, skip=0, limit=100):
+    selected = [getattr(PurchaseOrder, _ORDER_COLUMN_ALIASES.get(c, c)).label(c) for c in columns]
+    return select(*selected, func.count().over().label("_total")) \
+        .where(*_listing_filters(created_by_user, status)) \
+        .order_by(PurchaseOrder.po_id.desc()) \
+        .offset(skip) \
+        .limit(limit)
+
+
+def _count_orders_stmt(created_by_user=None, status=None, dealer_id=None):
+    return select(func.count(PurchaseOrder.po_id)).where(*_listing_filters(created_by_user, status, dealer_id))
+
+
+class SQLPurchaseOrderRepository(PurchaseOrderRepository):
+    """Purchase order data access over a pooled SQLAlchemy engine."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+
+    def get_order(self, po_id, created_by_user=None, dealer_id=None):
+        with self._session_factory() as session:
+            po = session.execute(_get_order_stmt(po_id, created_by_user, dealer_id)).unique().scalar_one_or_none()
+            return _order_to_dict(po) if po else None
+
+    def list_orders(self, created_by_user=None, status=None, skip=0, limit=100):
+        stmt = _list_orders_stmt(created_by_user, status, skip, limit)
+        with self._session_factory() as session:
+            return [_order_to_dict(po) for po in session.execute(stmt).unique().scalars()]
+
+    def list_order_columns(self, columns, created_by_user=None, status=None, skip=0, limit=100) -> Tuple[List[dict], int]:
+        stmt = _order_columns_stmt(columns, created_by_user, status, skip, limit)
+        with self._session_factory() as session:
+            rows = session.execute(stmt).mappings().all()
+            # The window count rides along with the page; past the last page
+            # there are no rows to carry it
+            if rows:
+                total = rows[0]["_total"]
+            else:
+                total = session.execute(_count_orders_stmt(created_by_user, status)).scalar_one()
+        return [{c: _json_value(row[c]) for c in columns} for row in rows], total
+
+    def count_orders(self, created_by_user=None, status=None, dealer_id=None):
+        with self._session_factory() as session:
+            return session.execute(_count_orders_stmt(created_by_user, status, dealer_id)).scalar_one()
+
+    def iter_orders(self, start=None, end=None, status=None, dealer_id=None, chunk_size=200):
+        filters = _listing_filters(status=status, dealer_id=dealer_id)
+        if start is not None:
+            filters.append(PurchaseOrder.po_date >= _coerce("po_date", start))
+        if end is not None:
+            filters.append(PurchaseOrder.po_date < _coerce("po_date", end))
+        # yield_per streams from a server-side cursor; items are loaded per
+        # batch with selectinload, since a joined collection can't be batched
+        stmt = select(PurchaseOrder) \
+            .options(joinedload(PurchaseOrder.dealer),
+                     selectinload(PurchaseOrder.items).joinedload(PurchaseOrderItem.product)) \
+            .where(*filters) \
+            .order_by(PurchaseOrder.po_id) \
+            .execution_options(yield_per=chunk_size)
+        with self._session_factory() as session:
+            for batch in session.execute(stmt).scalars().partitions():
+                # The identity map holds weak references, so a batch is
+                # freed once its dicts have been handed out
+                products = {}
+                yield [_order_to_dict(po, products) for po in batch]
+
+    def get_orders(self, po_ids):
+        stmt = _order_query().where(PurchaseOrder.po_id.in_(list(po_ids)))
+        with self._session_factory() as session:
+            orders = {po.po_id: _order_to_dict(po) for po in session.execute(stmt).unique().scalars()}
+        return [orders[po_id] for po_id in po_ids if po_id in orders]
+
+    def get_order_states(self, po_ids):
+        stmt = select(PurchaseOrder.po_id, PurchaseOrder.status, PurchaseOrder.combined_po_id) \
+            .where(PurchaseOrder.po_id.in_(list(po_ids)))
+        with self._session_factory() as session:
+            return {
+                po_id: {"po_id": po_id, "status": _json_value(status), "combined_po_id": combined_po_id}
+                for po_id, status, combined_po_id in session.execute(stmt)
+            }
+
+    def transition_orders(self, po_ids, from_statuses, values):
+        stmt = update(PurchaseOrder) \
+            .where(PurchaseOrder.po_id.in_(list(po_ids)),
+                   PurchaseOrder.status.in_([PurchaseOrderStatus(s) for s in from_statuses]),
+                   PurchaseOrder.combined_po_id.is_(None)) \
+            .values(**_order_values(values)) \
+            .returning(PurchaseOrder.po_id)
+        with self._session_factory.begin() as session:
+            return list(session.execute(stmt).scalars())
+
+    def consolidate_orders(self, created_by_user, po_ids=None, start=None, end=None):
+        # Same database function as the Supabase backend calls over RPC
+        stmt = text("SELECT consolidate_purchase_orders(:created_by, :po_ids, :start, :end)")
+        params = {"created_by": str(created_by_user), "po_ids": po_ids, "start": start, "end": end}
+        try:
+            with self._session_factory.begin() as session:
+                return session.execute(stmt, params).scalar_one()
+        except DBAPIError as e:
+            if getattr(e.orig, "pgcode", None) == _NO_DATA_FOUND:
+                return None
+            raise
+
+    def create_order(self, order: Dict[str, Any], items: List[Dict[str, Any]]) -> int:
+        with self._session_factory.begin() as session:
+            po = PurchaseOrder(**_totals(order))
+            po.items = [PurchaseOrderItem(**_item_values(it)) for it in items]
+            session.add(po)
+            session.flush()
+            return po.po_id
+
+    def replace_items(self, po_id: int, items: List[Dict[str, Any]], totals: Dict[str, Any]) -> None:
+        with self._session_factory.begin() as session:
+            session.execute(delete(PurchaseOrderItem).where(PurchaseOrderItem.po_id == po_id))
+            session.add_all(PurchaseOrderItem(po_id=po_id, **_item_values(it)) for it in items)
+            session.execute(update(PurchaseOrder).where(PurchaseOrder.po_id == po_id).values(**_totals(totals)))
+
+    def update_order(self, po_id: int, values: Dict[str, Any], dealer_id: Optional[str] = None) -> None:
+        stmt = update(PurchaseOrder) \
+            .where(PurchaseOrder.po_id == po_id, *_order_filters(dealer_id=dealer_id)) \
+            .values(**_order_values(values))
+        with self._session_factory.begin() as session:
+            session.execute(stmt)
+
+
+class AsyncSQLPurchaseOrderRepository:
+    """
+    Read-only purchase order access over the asyncpg engine.
+    Each call uses its own session, so independent reads can be awaited
+    together (e.g. with asyncio.gather) on separate pooled connections.
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or get_async_session_factory()
+
+    async def get_order(self, po_id, created_by_user=None, dealer_id=None):
+        async with self._session_factory() as session:
+            result = await session.execute(_get_order_stmt(po_id, created_by_user, dealer_id))
+            po = result.unique().scalar_one_or_none()
+            return _order_to_dict(po) if po else None
+
+    async def list_orders(self, created_by_user=None, status=None, skip=0, limit=100):
+        async with self._session_factory() as session:
+            result = await session.execute(_list_orders_stmt(created_by_user, status, skip, limit))
+            return [_order_to_dict(po) for po in result.unique().scalars()]
+
+    async def count_orders(self, created_by_user=None, status=None, dealer_id=None):
+        async with self._session_factory() as session:
+            result = await session.execute(_count_orders_stmt(created_by_user, status, dealer_id))
+            return result.scalar_one()
@@ -0,0 +1,188 @@
+"""
+Purchase order repository backed by Supabase (PostgREST over HTTP).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from core.database import supabase
+from repositories.base import PurchaseOrderRepository
+
+# PostgREST caps each response at max-rows (1000 by default), and long
+# in_() lists make request URLs that proxies reject
+PAGE_SIZE = 1000
+IN_FILTER_CHUNK = 100
+
+# Raised by consolidate_purchase_orders when no order qualifies
+NO_DATA_FOUND = "P0002"
+COMBINED = "combined"
+
+
+def _status_filter(q, status: Optional[str]):
+    """Orders in status; without one, every order but the combined (supplier) ones."""
+    return q.eq("status", status) if status is not None else q.neq("status", COMBINED)
+
+
+def _fetch_in(table: str, column: str, ids: list) -> List[dict]:
+    """Rows of table whose column is in ids, a bounded in_() list per request."""
+    rows = []
+    for i in range(0, len(ids), IN_FILTER_CHUNK):
+        rows.extend(supabase.table(table).select("*").in_(column, ids[i:i + IN_FILTER_CHUNK]).execute().data or [])
+    return rows
+
+
+def _hydrate_chunk(orders: List[dict]) -> List[dict]:
+    """
+    Attach the dealer, items and each item's product to a batch of orders,
+    with a few set-based queries (about three per IN_FILTER_CHUNK orders)
+    instead of three per order.
+    """
+    dealer_ids = list({o["dealer_id"] for o in orders if o.get("dealer_id")})
+    dealer_map = {d["dealer_id"]: d for d in _fetch_in("dealers", "dealer_id", dealer_ids)}
+
+    po_ids = [o["po_id"] for o in orders]
+    items_by_order: Dict[int, List[dict]] = {po_id: [] for po_id in po_ids}
+    for i in range(0, len(po_ids), IN_FILTER_CHUNK):
+        # Keyset paging: a chunk of orders can have more lines than one response holds
+        last = None
+        while True:
+            q = supabase.table("purchase_order_items").select("*").in_("po_id", po_ids[i:i + IN_FILTER_CHUNK])
+            if last is not None:
+                q = q.gt("po_item_id", last)
+            page = q.order("po_item_id").limit(PAGE_SIZE).execute().data or []
+            for it in page:
+                items_by_order[it["po_id"]].append(it)
+            if len(page) < PAGE_SIZE:
+                break
+            last = page[-1]["po_item_id"]
+
+    product_ids = list({it["product_id"] for items in items_by_order.values() for it in items if it.get("product_id")})
+    product_map = {p["product_id"]: p for p in _fetch_in("products", "product_id", product_ids)}
+    for items in items_by_order.values():
+        for it in items:
+            it["product"] = product_map.get(it.get("product_id"))
+
+    return [
+        {**o, "dealer": dealer_map.get(o.get("dealer_id")), "items": items_by_order[o["po_id"]]}
+        for o in orders
+    ]
+
+
+class SupabasePurchaseOrderRepository(PurchaseOrderRepository):
+    """Purchase order data access through the shared Supabase client."""
+
+    def get_order(self, po_id, created_by_user=None, dealer_id=None):
+        q = supabase.table("purchase_orders").select("*").eq("po_id", po_id)
+        if created_by_user is not None:
+            q = q.eq("created_by_user", str(created_by_user))
+        if dealer_id is not None:
+            q = q.eq("dealer_id", str(dealer_id))
+        res = q.execute()
+        return _hydrate_chunk(res.data)[0] if res.data else None
+
+    def list_orders(self, created_by_user=None, status=None, skip=0, limit=100):
+        q = supabase.table("purchase_orders").select("*")
+        if created_by_user is not None:
+            q = q.eq("created_by_user", str(created_by_user))
+        q = _status_filter(q, status)
+        res = q.order("po_id", desc=True).range(skip, skip + limit - 1).execute()
+        return _hydrate_chunk(res.data or [])
+
+    def list_order_columns(self, columns, created_by_user=None, status=None, skip=0, limit=100) -> Tuple[List[dict], int]:
+        # The count comes back with the page, so this is a single request
+        q = supabase.table("purchase_orders").select(",".join(columns), count="exact")
+        if created_by_user is not None:
+            q = q.eq("created_by_user", str(created_by_user))
+        q = _status_filter(q, status)
+        res = q.order("po_id", desc=True).range(skip, skip + limit - 1).execute()
+        return res.data or [], res.count or 0
+
+    def count_orders(self, created_by_user=None, status=None, dealer_id=None):
+        q = supabase.table("purchase_orders").select("po_id", count="exact")
+        if created_by_user is not None:
+            q = q.eq("created_by_user", str(created_by_user))
+        q = _status_filter(q, status)
+        if dealer_id is not None:
+            q = q.eq("dealer_id", str(dealer_id))
+        return q.limit(1).execute().count or 0
+
+    def iter_orders(self, start=None, end=None, status=None, dealer_id=None, chunk_size=200):
+        # Keyset pagination on po_id: each page costs the same however deep
+        # the export is, unlike offset ranges
+        chunk_size = min(chunk_size, PAGE_SIZE)
+        last = None
+        while True:
+            q = supabase.table("purchase_orders").select("*")
+            if start is not None:
+                q = q.gte("po_date", start)
+            if end is not None:
+                q = q.lt("po_date", end)
+            q = _status_filter(q, status)
+            if dealer_id is not None:
+                q = q.eq("dealer_id", str(dealer_id))
+            if last is not None:
+                q = q.gt("po_id", last)
+            orders = q.order("po_id").limit(chunk_size).execute().data or []
+            if not orders:
+                return
+            yield _hydrate_chunk(orders)
+            if len(orders) < chunk_size:
+                return
+            last = orders[-1]["po_id"]
+
+    def get_orders(self, po_ids):
+        orders = {o["po_id"]: o for o in _hydrate_chunk(_fetch_in("purchase_orders", "po_id", list(po_ids)))}
+        return [orders[po_id] for po_id in po_ids if po_id in orders]
+
+    def get_order_states(self, po_ids):
+        # Integer ids keep the in_() list short enough for one request per bulk call
+        res = supabase.table("purchase_orders").select("po_id,status,combined_po_id").in_("po_id", list(po_ids)).execute()
+        return {row["po_id"]: row for row in (res.data or [])}
+
+    def transition_orders(self, po_ids, from_statuses, values):
+        # The guards make the update safe against concurrent changes (or a
+        # consolidation) since the states were read
+        res = supabase.table("purchase_orders").update(values) \
+            .in_("po_id", list(po_ids)) \
+            .in_("status", list(from_statuses)) \
+            .is_("combined_po_id", "null") \
+            .execute()
+        return [row["po_id"] for row in (res.data or [])]
+
+    def consolidate_orders(self, created_by_user, po_ids=None, start=None, end=None):
+        params = {"p_created_by": str(created_by_user), "p_po_ids": po_ids, "p_start": start, "p_end": end}
+        try:
+            return supabase.rpc("consolidate_purchase_orders", params).execute().data
+        except APIError as e:
+            if getattr(e, "code", None) == NO_DATA_FOUND:
+                return None
+            raise
+
+    def create_order(self, order: Dict[str, Any], items: List[Dict[str, Any]]) -> int:
+        # PostgREST has no multi-statement transaction; remove the order if
+        # its items cannot be written so no empty draft is left behind
+        po_res = supabase.table("purchase_orders").insert(order).execute()
+        if not po_res.data:
+            raise HTTPException(status_code=500, detail="Failed to create purchase order")
+        po_id = po_res.data[0]["po_id"]
+
+        if items:
+            try:
+                supabase.table("purchase_order_items").insert([{**it, "po_id": po_id} for it in items]).execute()
+            except Exception:
+                supabase.table("purchase_orders").delete().eq("po_id", po_id).execute()
+                raise
+        return po_id
+
+    def replace_items(self, po_id: int, items: List[Dict[str, Any]], totals: Dict[str, Any]) -> None:
+        supabase.table("purchase_order_items").delete().eq("po_id", po_id).execute()
+        if items:
+            supabase.table("purchase_order_items").insert([{**it, "po_id": po_id} for it in items]).execute()
+        supabase.table("purchase_orders").update(totals).eq("po_id", po_id).execute()
+
+    def update_order(self, po_id: int, values: Dict[str, Any], dealer_id: Optional[str] = None) -> None:
+        q = supabase.table("purchase_orders").update(values).eq("po_id", po_id)
+        if dealer_id is not None:
+            q = q.eq("dealer_id", str(dealer_id))
+        q.execute()
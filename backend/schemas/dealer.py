@@ -72,6 +72,16 @@ class DealerWithUserRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class DealerList(BaseModel):
+    """Schema for a list of dealers with pagination info."""
+    items: list[DealerWithUserRead]
+    total: int
+    skip: int
+    limit: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 __all__ = [
     "DealerBase",
     "DealerCreate",
@@ -79,5 +89,6 @@ __all__ = [
     "DealerRead",
     "DealerWithUserCreate",
     "DealerWithUserRead",
+    "DealerList",
 ]
 
@@ -25,6 +25,17 @@ class ProductBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductSummary(BaseModel):
+    """Product as shown on an order line."""
+    product_id: UUID
+    name: str
+    pack_size: Optional[str] = None
+    trade_price_incl_vat: float
+    mrp: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class ProductCreate(ProductBase):
     """Schema for creating a new product."""
     pass
@@ -73,6 +84,7 @@ class ProductSearch(BaseModel):
 
 __all__ = [
     "ProductBase",
+    "ProductSummary",
     "ProductCreate",
     "ProductUpdate",
     "ProductRead",
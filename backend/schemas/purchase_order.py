@@ -1,10 +1,11 @@
 # backend/schemas/purchase_order.py
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Literal, Optional, Dict, Any
+from datetime import date, datetime
 import uuid
 from models.purchase_order import PurchaseOrderStatus
-from models.dealer import Dealer as DealerModel
+from schemas.dealer import DealerBase
+from schemas.product import ProductSummary
 
 class DocumentSchema(BaseModel):
     document_id: uuid.UUID
@@ -13,17 +14,6 @@ class DocumentSchema(BaseModel):
     document_url: str
     
 
-class ProductBase(BaseModel):
-    product_id: uuid.UUID
-    name: str
-    pack_size: Optional[str] = None
-    trade_price_incl_vat: float
-    mrp: Optional[float] = None
-
-    class Config:
-        orm_mode = True
-        populate_by_name = True
-
 class PurchaseOrderItemBase(BaseModel):
     product_id: uuid.UUID
     quantity: int = Field(..., gt=0)
@@ -39,10 +29,9 @@ class PurchaseOrderItem(BaseModel):
     pack_size_snapshot: Optional[str] = None
     unit_price: float
     total_price: float
-    product: Optional[ProductBase] = None
+    product: Optional[ProductSummary] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PurchaseOrderBase(BaseModel):
     pass
@@ -54,22 +43,11 @@ class PurchaseOrderCreate(BaseModel):
 class PurchaseOrderUpdate(BaseModel):
     items: List[PurchaseOrderItemCreate]
 
-class DealerBase(BaseModel):
-    dealer_id: uuid.UUID
-    company_name: str
-    contact_person: str
-    contact_number: str
-    email: Optional[str] = None
-    billing_address: str
-    shipping_address: str
-
-    class Config:
-        orm_mode = True
-
 class PurchaseOrder(BaseModel):
     po_id: int
     po_number: str
-    dealer_id: uuid.UUID
+    # None on combined (supplier) orders
+    dealer_id: Optional[uuid.UUID] = None
     dealer: Optional[DealerBase] = None
     created_by_user: uuid.UUID
     po_date: datetime
@@ -77,6 +55,7 @@ class PurchaseOrder(BaseModel):
     total_tp: Optional[float] = None
     total_vat: Optional[float] = None
     approved_at: Optional[datetime] = None
+    combined_po_id: Optional[int] = None
     # Calculated fields (not in DB, computed from items)
     total_ex_vat: Optional[float] = None
     vat_percent: Optional[float] = None
@@ -86,8 +65,7 @@ class PurchaseOrder(BaseModel):
     updated_at: Optional[datetime] = None
     items: List[PurchaseOrderItem] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PurchaseOrderList(BaseModel):
@@ -97,5 +75,79 @@ class PurchaseOrderList(BaseModel):
     skip: int
     limit: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PurchaseOrderSummary(BaseModel):
+    """
+    Order row without dealer or items (view=summary). Only the requested
+    fields are present in responses.
+    """
+    po_id: int
+    po_number: Optional[str] = None
+    po_date: Optional[datetime] = None
+    status: Optional[PurchaseOrderStatus] = None
+    dealer_id: Optional[uuid.UUID] = None
+    created_by_user: Optional[uuid.UUID] = None
+    approved_at: Optional[datetime] = None
+    combined_po_id: Optional[int] = None
+    total_tp: Optional[float] = None
+    total_vat: Optional[float] = None
+    vat_percent: Optional[float] = None
+    total_inc_vat: Optional[float] = None
+
+
+class PurchaseOrderSummaryList(BaseModel):
+    """Schema for a list of order summaries with pagination info."""
+    items: List[PurchaseOrderSummary]
+    total: int
+    skip: int
+    limit: int
+
+
+# Largest bulk status change accepted in one request
+MAX_BULK_STATUS_IDS = 500
+
+
+class PurchaseOrderBulkStatusUpdate(BaseModel):
+    po_ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_STATUS_IDS)
+    status: PurchaseOrderStatus
+    include_orders: bool = Field(False, description="Return each updated order in full (costs extra queries)")
+
+
+class PurchaseOrderStatusResult(BaseModel):
+    """Outcome for one id of a bulk status change."""
+    po_id: int
+    result: Literal["updated", "unchanged", "not_found", "invalid_transition", "conflict"]
+    previous_status: Optional[PurchaseOrderStatus] = None
+    status: Optional[PurchaseOrderStatus] = None
+    detail: Optional[str] = None
+    order: Optional[PurchaseOrder] = None
+
+
+class PurchaseOrderBulkStatusResult(BaseModel):
+    updated: int
+    results: List[PurchaseOrderStatusResult]
+
+
+class PurchaseOrderConsolidate(BaseModel):
+    """
+    Approved dealer orders to combine into one supplier order: the given
+    ids, or those dated in [start, end), or both. Without either, every
+    approved order not combined yet.
+    """
+    po_ids: Optional[List[int]] = Field(None, min_length=1)
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+
+class PurchaseOrderConsolidation(BaseModel):
+    """The combined order created by a consolidation."""
+    po_id: int
+    po_number: str
+    po_ids: List[int]
+    line_count: int
+    total_quantity: int
+    total_tp: float
+    total_vat: float
+    total_inc_vat: float
@@ -10,3 +10,5 @@ class AppSettingsUpdate(BaseModel):
 class AppSettingsRead(BaseModel):
     vat: float
     commission: float
+    # Stamp bumped on every update; lets workers detect stale cached copies
+    version: int = 0
@@ -1,12 +1,17 @@
 # scripts/populate_products_from_excel.py
 
 import argparse
+import csv
+import json
 import os
 import sys
-import re
-from decimal import Decimal
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Tuple, Iterator, Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -23,178 +28,532 @@ def _create_supabase_client() -> Client:
 # Shared Supabase client
 supabase: Client = _create_supabase_client()
 
+# Columns written by the import (image filenames are derived from the name)
+PRODUCT_FIELDS = ["name", "pack_size", "trade_price_incl_vat", "image", "VAT", "MRP", "TP", "status"]
 
-def slugify_for_filename(text: str) -> str:
-    """Make a filesystem-safe slug from product name."""
-    text = str(text or "").strip()
-    if not text:
-        return ""
-    slug = re.sub(r"[^A-Za-z0-9]+", "_", text)
-    slug = slug.strip("_")
-    return slug[:80] or ""
-
-
-def get_image_filename(product_name: str, used_slugs: set) -> str:
-    """Generate image filename based on product name."""
-    if not product_name:
-        return None
-    
-    slug = slugify_for_filename(product_name)
-    if not slug:
-        return None
-    
-    final_slug = slug
-    counter = 2
-    while final_slug in used_slugs:
-        final_slug = f"{slug}_{counter}"
-        counter += 1
-    
-    used_slugs.add(final_slug)
-    return f"{final_slug}.png"
-
-
-def clean_decimal_value(value) -> float | None:
-    """Clean and convert value to float, handling NaN and invalid values."""
-    if pd.isna(value):
-        return None
-    try:
-        return float(Decimal(str(value).strip()))
-    except:
-        return None
+# Fields compared against the live catalog to decide whether a row changed
+PRICE_FIELDS = ["trade_price_incl_vat", "VAT", "MRP", "TP"]
+TEXT_FIELDS = ["name", "pack_size", "image", "status"]
 
+# Supabase caps a single select at 1000 rows
+CATALOG_PAGE_SIZE = 1000
 
-def clean_text_value(value) -> str | None:
-    """Clean text value, handling NaN and stripping whitespace."""
-    if pd.isna(value):
-        return None
-    text = str(value).strip()
-    return text if text else None
 
+def slugify_series(names: pd.Series) -> pd.Series:
+    """Make filesystem-safe slugs from product names."""
+    return (
+        names.fillna("")
+        .astype(str)
+        .str.strip()
+        .str.replace(r"[^A-Za-z0-9]+", "_", regex=True)
+        .str.strip("_")
+        .str[:80]
+    )
 
-def read_products_from_excel(excel_path: str) -> List[Dict]:
+
+def image_filenames(names: pd.Series, seen: Optional[Dict[str, int]] = None) -> pd.Series:
     """
-    Read product data from Excel and prepare for database insertion.
-    
-    Returns list of dictionaries ready for Supabase insertion.
+    Generate image filenames based on product names.
+    Repeated slugs get a numeric suffix: Foo.png, Foo_2.png, Foo_3.png ...
+    `seen` carries slug counts across chunks when streaming and is updated.
     """
-    print(f"Reading Excel: {excel_path}")
-    
-    # Read Excel (header in row 3, data starts from row 5)
-    df = pd.read_excel(excel_path, sheet_name=0, engine="openpyxl", header=2, skiprows=[3])
-    
-    print(f"Found {len(df)} rows in Excel")
-    
-    # Find column names (case-insensitive)
-    col_product_name = None
-    col_pack_size = None
-    col_tp_vat = None
-    col_vat = None
-    col_mrp = None
-    col_tp = None
-    
+    slugs = slugify_series(names)
+    occurrence = slugs.groupby(slugs).cumcount()
+    if seen is not None:
+        occurrence = occurrence + slugs.map(seen).fillna(0).astype(int)
+        for slug, count in slugs.value_counts().items():
+            seen[slug] = seen.get(slug, 0) + int(count)
+    suffix = (occurrence + 1).astype(str).radd("_").where(occurrence > 0, "")
+    return (slugs + suffix + ".png").where(slugs != "")
+
+
+def clean_decimal_series(values: pd.Series) -> pd.Series:
+    """Convert a column to floats; blanks and invalid values become NaN."""
+    return pd.to_numeric(values.astype("string").str.strip(), errors="coerce").astype("float64")
+
+
+def clean_text_series(values: pd.Series) -> pd.Series:
+    """Strip a text column; blanks become NA."""
+    text = values.astype("string").str.strip()
+    return text.mask(text == "")
+
+
+def product_keys(frame: pd.DataFrame) -> pd.Series:
+    """
+    Stable product identity used to match sheet rows to catalog rows:
+    case-insensitive name plus pack size.
+    """
+    name = frame["name"].astype("string").str.strip().str.casefold()
+    pack = frame["pack_size"].astype("string").fillna("").str.strip().str.casefold()
+    return name + "|" + pack
+
+
+def find_columns(df: pd.DataFrame) -> Dict[str, str]:
+    """Map sheet columns (case-insensitive) to product fields."""
+    columns = {}
     for col in df.columns:
-        cl = col.lower()
+        cl = str(col).lower()
         if "product" in cl and "name" in cl:
-            col_product_name = col
+            columns["name"] = col
         elif "pack" in cl and "size" in cl:
-            col_pack_size = col
+            columns["pack_size"] = col
         elif cl == "tp+vat":
-            col_tp_vat = col
+            columns["trade_price_incl_vat"] = col
         elif cl == "vat":
-            col_vat = col
+            columns["VAT"] = col
         elif cl == "mrp":
-            col_mrp = col
+            columns["MRP"] = col
         elif cl == "tp":
-            col_tp = col
-    
-    if not col_product_name:
+            columns["TP"] = col
+
+    if "name" not in columns:
         raise ValueError("Could not find 'Product Name' column")
-    if not col_tp_vat:
+    if "trade_price_incl_vat" not in columns:
         raise ValueError("Could not find 'TP+VAT' column")
-    
-    print(f"Found columns: Product Name={col_product_name}, Pack Size={col_pack_size}, TP+VAT={col_tp_vat}")
-    
-    products = []
-    used_slugs = set()
-    skipped = 0
-    
-    for idx, row in df.iterrows():
-        product_name = clean_text_value(row.get(col_product_name))
-        
-        # Skip rows without product name
-        if not product_name:
-            skipped += 1
-            continue
-        
-        pack_size = clean_text_value(row.get(col_pack_size))
-        trade_price_incl_vat = clean_decimal_value(row.get(col_tp_vat))
-        vat = clean_decimal_value(row.get(col_vat))
-        mrp = clean_decimal_value(row.get(col_mrp))
-        tp = clean_decimal_value(row.get(col_tp))
-        
-        # Skip if no trade price
-        if trade_price_incl_vat is None:
-            skipped += 1
-            continue
-        
-        # Generate image filename
-        image_filename = get_image_filename(product_name, used_slugs)
-        
-        product = {
-            "name": product_name,
-            "pack_size": pack_size,
-            "trade_price_incl_vat": trade_price_incl_vat,
-            "image": image_filename,
-            "VAT": vat,
-            "MRP": mrp,
-            "TP": tp,
-            "stock_qty": 0,
-            "status": "active"
-        }
-        
-        products.append(product)
-    
-    print(f"Prepared {len(products)} products for insertion (skipped {skipped} rows)")
+    return columns
+
+
+def prepare_products(df: pd.DataFrame, columns: Dict[str, str], seen_slugs: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+    """Clean raw sheet rows into product rows using column operations."""
+    def column(field):
+        if field in columns:
+            return df[columns[field]]
+        return pd.Series(pd.NA, index=df.index, dtype="object")
+
+    products = pd.DataFrame({
+        "name": clean_text_series(column("name")),
+        "pack_size": clean_text_series(column("pack_size")),
+        "trade_price_incl_vat": clean_decimal_series(column("trade_price_incl_vat")),
+        "VAT": clean_decimal_series(column("VAT")),
+        "MRP": clean_decimal_series(column("MRP")),
+        "TP": clean_decimal_series(column("TP")),
+    })
+
+    # Skip rows without product name or trade price
+    products = products[products["name"].notna() & products["trade_price_incl_vat"].notna()]
+    products = products.assign(image=image_filenames(products["name"], seen_slugs), status="active")
+    return products.reset_index(drop=True)
+
+
+def read_products_frame(excel_path: str) -> pd.DataFrame:
+    """Read and clean the product sheet into a DataFrame."""
+    print(f"Reading Excel: {excel_path}")
+
+    # Read Excel (header in row 3, data starts from row 5)
+    df = pd.read_excel(excel_path, sheet_name=0, engine="openpyxl", header=2, skiprows=[3])
+    print(f"Found {len(df)} rows in Excel")
+
+    columns = find_columns(df)
+    print(f"Found columns: Product Name={columns['name']}, Pack Size={columns.get('pack_size')}, TP+VAT={columns['trade_price_incl_vat']}")
+
+    products = prepare_products(df, columns)
+    print(f"Prepared {len(products)} products (skipped {len(df) - len(products)} rows)")
     return products
 
 
+def to_records(frame: pd.DataFrame) -> List[Dict]:
+    """Convert a product frame to JSON-safe dicts (NaN/NA -> None)."""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def read_products_from_excel(excel_path: str) -> List[Dict]:
+    """
+    Read product data from Excel and prepare for database insertion.
+
+    Returns list of dictionaries ready for Supabase insertion.
+    """
+    products = read_products_frame(excel_path)
+    return [{**p, "stock_qty": 0} for p in to_records(products[PRODUCT_FIELDS])]
+
+
+def fetch_catalog() -> pd.DataFrame:
+    """Load the current product catalog (identity and compared fields only)."""
+    rows = []
+    start = 0
+    while True:
+        res = supabase.table("products") \
+            .select("product_id," + ",".join(PRODUCT_FIELDS)) \
+            .order("product_id") \
+            .range(start, start + CATALOG_PAGE_SIZE - 1) \
+            .execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < CATALOG_PAGE_SIZE:
+            break
+        start += CATALOG_PAGE_SIZE
+
+    catalog = pd.DataFrame(rows, columns=["product_id"] + PRODUCT_FIELDS)
+    for field in PRICE_FIELDS:
+        catalog[field] = pd.to_numeric(catalog[field], errors="coerce")
+    return catalog
+
+
+def diff_catalog(products: pd.DataFrame, catalog: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Compare sheet products against the catalog by product identity.
+    Returns (new_rows, changed_rows, missing_catalog_rows); changed rows carry
+    the existing product_id so they update in place.
+    """
+    products = products.assign(_key=product_keys(products))
+    duplicates = products["_key"].duplicated(keep="last")
+    if duplicates.any():
+        print(f"⚠️  {int(duplicates.sum())} duplicate products in sheet, keeping the last occurrence")
+        products = products[~duplicates]
+
+    catalog = catalog.assign(_key=product_keys(catalog)).drop_duplicates("_key", keep="first")
+
+    merged = products.merge(
+        catalog[["_key", "product_id"] + PRODUCT_FIELDS],
+        on="_key",
+        how="left",
+        suffixes=("", "_current"),
+    )
+    is_new = merged["product_id"].isna()
+
+    changed = pd.Series(False, index=merged.index)
+    for field in PRICE_FIELDS:
+        new, cur = merged[field].round(2), merged[f"{field}_current"].round(2)
+        changed |= ~((new == cur) | (new.isna() & cur.isna()))
+    for field in TEXT_FIELDS:
+        new, cur = merged[field].astype("string"), merged[f"{field}_current"].astype("string")
+        changed |= ~((new == cur).fillna(False) | (new.isna() & cur.isna()))
+
+    new_rows = merged.loc[is_new, PRODUCT_FIELDS]
+    changed_rows = merged.loc[~is_new & changed, ["product_id"] + PRODUCT_FIELDS]
+    missing = catalog[~catalog["_key"].isin(products["_key"])]
+    return new_rows, changed_rows, missing
+
+
+def _send_with_retries(send, batch: List[Dict], retries: int) -> int:
+    """Run one batch request, retrying with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            send(batch)
+            return len(batch)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = 0.5 * (2 ** attempt)
+            print(f"⚠️  Batch of {len(batch)} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+    return 0
+
+
+def send_batches(label: str, rows: List[Dict], send, batch_size: int, workers: int, retries: int) -> int:
+    """Send rows in parallel batches; returns the number of rows written."""
+    if not rows:
+        return 0
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    print(f"{label} {len(rows)} products in {len(batches)} batch(es) with {workers} worker(s)...")
+
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_send_with_retries, send, batch, retries) for batch in batches]
+        for future in as_completed(futures):
+            written += future.result()
+    return written
+
+
+def _insert(batch: List[Dict]):
+    # New rows conflict on the unique product_key (migration c9e2a4f7d315)
+    # and are skipped, so retrying a batch that did commit adds nothing
+    supabase.table("products").upsert(
+        [{**row, "stock_qty": 0} for row in batch], on_conflict="product_key", ignore_duplicates=True
+    ).execute()
+
+
+def _upsert(batch: List[Dict]):
+    # Only the listed columns are updated, so stock_qty is left untouched
+    supabase.table("products").upsert(batch, on_conflict="product_id").execute()
+
+
+def _deactivate(batch: List[Dict]):
+    ids = [row["product_id"] for row in batch]
+    supabase.table("products").update({"status": "discontinued"}).in_("product_id", ids).execute()
+
+
+def sync_products_to_supabase(
+    products: pd.DataFrame,
+    batch_size: int = 500,
+    workers: int = 4,
+    retries: int = 3,
+    deactivate_missing: bool = False,
+    dry_run: bool = False,
+):
+    """
+    Upsert the sheet into the catalog, writing only new and changed rows.
+    Existing products keep their product_id, so purchase order items that
+    reference them stay valid.
+    """
+    started = time.perf_counter()
+    print("Loading current catalog...")
+    catalog = fetch_catalog()
+    print(f"Catalog has {len(catalog)} products")
+
+    new_rows, changed_rows, missing = diff_catalog(products, catalog)
+    unchanged = len(products) - len(new_rows) - len(changed_rows)
+    print(f"Diff: {len(new_rows)} new, {len(changed_rows)} changed, {unchanged} unchanged, {len(missing)} not in sheet")
+
+    if dry_run:
+        print("Dry run - no changes written")
+        return
+
+    inserted = send_batches("Inserting", to_records(new_rows), _insert, batch_size, workers, retries)
+    updated = send_batches("Updating", to_records(changed_rows), _upsert, batch_size, workers, retries)
+
+    deactivated = 0
+    if deactivate_missing:
+        active_missing = missing[missing["status"] == "active"]
+        deactivated = send_batches(
+            "Deactivating", to_records(active_missing[["product_id"]]), _deactivate, batch_size, workers, retries
+        )
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Inserted {inserted}, updated {updated}, deactivated {deactivated} products in {elapsed:.1f}s")
+
+
+class BoundedExecutor:
+    """Thread pool whose submit() blocks once `max_pending` tasks are queued."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, fn, *args):
+        self._slots.acquire()
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+def iter_sheet_rows(path: str) -> Iterator[Dict]:
+    """
+    Yield sheet rows one at a time as {header: value} dicts.
+    .xlsx is read with openpyxl in read-only mode (header in row 3, data from
+    row 5, as in read_products_frame); .csv has its header in the first row.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+        return
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        for _ in range(2):
+            next(rows, None)
+        header = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(next(rows, ()) or ())]
+        next(rows, None)
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        wb.close()
+
+
+def iter_product_chunks(path: str, chunk_size: int) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    Read the sheet incrementally and yield (source_rows, cleaned products) for
+    every `chunk_size` source rows. Only one chunk is held in memory at a time.
+    """
+    columns = None
+    seen_slugs: Dict[str, int] = {}
+    buffer: List[Dict] = []
+
+    def flush():
+        nonlocal columns
+        df = pd.DataFrame(buffer)
+        if columns is None:
+            columns = find_columns(df)
+        return len(buffer), prepare_products(df, columns, seen_slugs)
+
+    for row in iter_sheet_rows(path):
+        buffer.append(row)
+        if len(buffer) >= chunk_size:
+            yield flush()
+            buffer = []
+    if buffer:
+        yield flush()
+
+
+def count_product_keys(path: str, chunk_size: int) -> Counter:
+    """Occurrences of each product key in the sheet, read incrementally."""
+    counts: Counter = Counter()
+    for _, chunk in iter_product_chunks(path, chunk_size):
+        counts.update(product_keys(chunk))
+    return counts
+
+
+class ImportCheckpoint:
+    """
+    Records how many source batches have been committed so a failed stream
+    can resume. Batches complete out of order, so only the contiguous prefix
+    of finished batches counts as committed.
+    """
+
+    def __init__(self, path: Path, source: str, batch_size: int):
+        self.path = path
+        stat = os.stat(source)
+        self.identity = {"source": os.path.abspath(source), "size": stat.st_size, "mtime": stat.st_mtime, "batch_size": batch_size}
+        self.committed = 0
+        self._done = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Return the number of committed batches from a previous run."""
+        if not self.path.exists():
+            return 0
+        state = json.loads(self.path.read_text())
+        if state.get("identity") != self.identity:
+            raise ValueError(f"Checkpoint {self.path} was written for a different file or batch size")
+        self.committed = state["committed_batches"]
+        return self.committed
+
+    def mark_done(self, batch_no: int):
+        with self._lock:
+            self._done.add(batch_no)
+            while self.committed in self._done:
+                self._done.remove(self.committed)
+                self.committed += 1
+            self.path.write_text(json.dumps({"identity": self.identity, "committed_batches": self.committed}))
+
+    def clear(self):
+        if self.path.exists():
+            self.path.unlink()
+
+
+def stream_products_to_supabase(
+    path: str,
+    batch_size: int = 500,
+    workers: int = 4,
+    retries: int = 3,
+    resume: bool = False,
+    checkpoint_path: Optional[str] = None,
+    dry_run: bool = False,
+):
+    """
+    Stream a large price list into the catalog with bounded memory.
+    Rows are read incrementally, diffed against the catalog chunk by chunk and
+    upserted in parallel; at most 2 x workers batches are in flight, so the
+    reader waits for the database rather than buffering the file. A first
+    pass counts product keys so that, as in the in-memory import, the last
+    occurrence of a duplicated product is the one written.
+    """
+    checkpoint = ImportCheckpoint(Path(checkpoint_path or f"{path}.checkpoint.json"), path, batch_size)
+    skip_batches = checkpoint.load() if resume else 0
+    if skip_batches:
+        print(f"Resuming after {skip_batches} committed batch(es)")
+
+    print("Loading current catalog...")
+    catalog = fetch_catalog()
+    print(f"Catalog has {len(catalog)} products")
+
+    started = time.perf_counter()
+    remaining = count_product_keys(path, batch_size)
+    stats = {"read": 0, "new": 0, "changed": 0, "duplicates": 0, "written": 0}
+    stats_lock = threading.Lock()
+
+    def send_chunk(batch_no: int, new_records: List[Dict], changed_records: List[Dict]):
+        written = 0
+        if new_records:
+            written += _send_with_retries(_insert, new_records, retries)
+        if changed_records:
+            written += _send_with_retries(_upsert, changed_records, retries)
+        checkpoint.mark_done(batch_no)
+        with stats_lock:
+            stats["written"] += written
+
+    executor = BoundedExecutor(workers, max_pending=workers * 2)
+    futures = []
+    try:
+        for batch_no, (source_rows, chunk) in enumerate(iter_product_chunks(path, batch_size)):
+            stats["read"] += source_rows
+
+            # Keep a row only if no later row (in this or a later chunk) has its key
+            keys = product_keys(chunk)
+            repeated = keys.map(remaining) > keys.groupby(keys).cumcount() + 1
+            stats["duplicates"] += int(repeated.sum())
+            remaining.subtract(keys)
+            chunk = chunk[~repeated]
+
+            if batch_no < skip_batches:
+                continue
+
+            new_rows, changed_rows, _ = diff_catalog(chunk, catalog)
+            stats["new"] += len(new_rows)
+            stats["changed"] += len(changed_rows)
+            if dry_run:
+                continue
+
+            futures.append(executor.submit(send_chunk, batch_no, to_records(new_rows), to_records(changed_rows)))
+
+            # Drop finished batches, surfacing failures early
+            done = [f for f in futures if f.done()]
+            futures = [f for f in futures if f not in done]
+            for future in done:
+                future.result()
+
+            if batch_no % 20 == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  batch {batch_no}: read {stats['read']} rows ({stats['read'] / elapsed:,.0f} rows/s), wrote {stats['written']}")
+        for future in futures:
+            future.result()
+    finally:
+        executor.shutdown()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Streamed {stats['read']} rows in {elapsed:.1f}s ({stats['read'] / max(elapsed, 1e-9):,.0f} rows/s): "
+        f"{stats['new']} new, {stats['changed']} changed, {stats['duplicates']} duplicates skipped"
+    )
+    if dry_run:
+        print("Dry run - no changes written")
+        return
+    print(f"✅ Wrote {stats['written']} products")
+    checkpoint.clear()
+
+
 def insert_products_to_supabase(products: List[Dict], clear_existing: bool = False):
     """
     Insert products into Supabase database.
-    
+
     Args:
         products: List of product dictionaries
         clear_existing: If True, clear existing products before inserting
     """
     print(f"Connecting to Supabase...")
-    
+
     try:
         if clear_existing:
             print("Clearing existing products...")
             result = supabase.table("products").delete().neq("product_id", "00000000-0000-0000-0000-000000000000").execute()
             print(f"Cleared existing products")
-        
+
         # Insert products in batches (Supabase has limits)
         batch_size = 100
         total_inserted = 0
-        
+
         for i in range(0, len(products), batch_size):
             batch = products[i:i + batch_size]
             print(f"Inserting batch {i//batch_size + 1} ({len(batch)} products)...")
-            
+
             result = supabase.table("products").insert(batch).execute()
             total_inserted += len(batch)
-        
+
         print(f"✅ Successfully inserted {total_inserted} products!")
-        
+
         # Show sample of inserted data
         result = supabase.table("products").select("product_id, name, pack_size, trade_price_incl_vat").limit(5).execute()
-        
+
         if result.data:
             print("\nSample of inserted products:")
             for product in result.data:
                 print(f"  - {product['name']} ({product.get('pack_size', 'N/A')}): {product['trade_price_incl_vat']}")
-        
+
     except Exception as e:
         print(f"❌ Error: {e}")
         raise
@@ -204,22 +563,63 @@ def main():
     parser = argparse.ArgumentParser(
         description="Populate products table from Excel file using Supabase."
     )
-    parser.add_argument("--excel", required=True, help="Path to Excel file (.xlsx)")
-    parser.add_argument("--clear", action="store_true", help="Clear existing products before inserting")
-    
+    parser.add_argument("--excel", required=True, help="Path to Excel file (.xlsx, or .csv with --stream)")
+    parser.add_argument("--clear", action="store_true", help="Delete all products and re-insert (breaks references from existing POs)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per upsert request")
+    parser.add_argument("--workers", type=int, default=4, help="Batches sent in parallel")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per failed batch")
+    parser.add_argument("--deactivate-missing", action="store_true", help="Mark catalog products absent from the sheet as discontinued")
+    parser.add_argument("--dry-run", action="store_true", help="Show the diff without writing")
+    parser.add_argument("--stream", action="store_true", help="Read the file incrementally with bounded memory")
+    parser.add_argument("--resume", action="store_true", help="With --stream, continue after the last committed batch")
+    parser.add_argument("--checkpoint", help="With --stream, checkpoint file (default: <file>.checkpoint.json)")
+
     args = parser.parse_args()
-    
+
+    if args.clear:
+        # The legacy reload deletes the catalog and inserts in fixed batches;
+        # none of the sync options apply to it
+        sync_options = ("dry_run", "stream", "deactivate_missing", "batch_size", "workers", "retries")
+        ignored = [f"--{name.replace('_', '-')}" for name in sync_options if getattr(args, name) != parser.get_default(name)]
+        if ignored:
+            parser.error(f"--clear cannot be combined with {', '.join(ignored)}")
+    if args.stream and args.deactivate_missing:
+        parser.error("--deactivate-missing is not supported with --stream")
+    if not args.stream and (args.resume or args.checkpoint):
+        parser.error("--resume and --checkpoint require --stream")
+
     # Check environment variables
     if not os.getenv("SUPABASE_URL") or not os.getenv("SUPABASE_KEY"):
         print("❌ Error: SUPABASE_URL and SUPABASE_KEY must be set in .env file")
         sys.exit(1)
-    
-    # Read products from Excel
-    products = read_products_from_excel(args.excel)
-    
-    # Insert into Supabase
-    insert_products_to_supabase(products, clear_existing=args.clear)
+
+    if args.clear:
+        # Legacy full reload
+        insert_products_to_supabase(read_products_from_excel(args.excel), clear_existing=True)
+        return
+
+    if args.stream:
+        stream_products_to_supabase(
+            args.excel,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            retries=args.retries,
+            resume=args.resume,
+            checkpoint_path=args.checkpoint,
+            dry_run=args.dry_run,
+        )
+        return
+
+    # Diff against the catalog and upsert only what changed
+    sync_products_to_supabase(
+        read_products_frame(args.excel),
+        batch_size=args.batch_size,
+        workers=args.workers,
+        retries=args.retries,
+        deactivate_missing=args.deactivate_missing,
+        dry_run=args.dry_run,
+    )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,243 @@
+# scripts/index_advisor.py
+"""
+Run EXPLAIN (ANALYZE, BUFFERS) for the queries the services issue and flag
+selective sequential scans on tables large enough for them to matter.
+
+The queries mirror the PostgREST calls in services/ and repositories/ (same
+filters, ordering and limits); parameters are sampled from the data so the
+plans reflect real selectivity. Plans on near-empty tables say nothing, so
+run it against a seeded database - a staging copy, or an empty schema
+filled with --seed from the local Supabase stand-in's generator:
+
+    python scripts/index_advisor.py --seed 5
+    python scripts/index_advisor.py --min-rows 500 --json advisor.json
+
+Exits with 1 when a query has a flagged sequential scan.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import MetaData, Table, inspect, text
+
+from core.database import engine
+
+# name -> SQL; :params are filled in by _sample_params()
+QUERIES = {
+    "orders.list_mine": "SELECT * FROM purchase_orders WHERE created_by_user = :user_id "
+                        "ORDER BY po_id DESC LIMIT 20 OFFSET 0",
+    "orders.list_mine_approved": "SELECT * FROM purchase_orders WHERE created_by_user = :user_id "
+                                 "AND status = :approved ORDER BY po_id DESC LIMIT 20 OFFSET 0",
+    "orders.count_mine": "SELECT count(*) FROM purchase_orders WHERE created_by_user = :user_id",
+    "orders.count_mine_approved": "SELECT count(*) FROM purchase_orders WHERE created_by_user = :user_id "
+                                  "AND status = :approved",
+    "orders.count_dealer": "SELECT count(*) FROM purchase_orders WHERE dealer_id = :dealer_id",
+    "orders.list_all": "SELECT * FROM purchase_orders ORDER BY po_id DESC LIMIT 20 OFFSET 0",
+    "orders.get_mine": "SELECT * FROM purchase_orders WHERE po_id = :po_id AND created_by_user = :user_id",
+    "items.by_order": "SELECT * FROM purchase_order_items WHERE po_id = :po_id",
+    "products.by_ids": "SELECT * FROM products WHERE product_id = ANY(CAST(:product_ids AS uuid[]))",
+    "products.list_active": "SELECT * FROM products WHERE status = :active LIMIT 20 OFFSET 0",
+    "products.search_active": "SELECT * FROM products WHERE status = :active AND name ILIKE :term "
+                              "LIMIT 20 OFFSET 0",
+    "products.count_search": "SELECT count(*) FROM products WHERE status = :active AND name ILIKE :term",
+    "dashboard.pending_count": "SELECT count(*) FROM purchase_orders WHERE status = :submitted",
+    "dashboard.revenue_rollup": "SELECT * FROM dealer_monthly_revenue WHERE year >= :year_from AND year <= :year_to",
+    "dashboard.recent_orders": "SELECT * FROM purchase_orders ORDER BY po_date DESC LIMIT 5",
+    "dealers.by_user": "SELECT * FROM dealers WHERE user_id = :user_id",
+    "dealers.search": "SELECT * FROM dealers WHERE company_name ILIKE :term OR customer_code ILIKE :term "
+                      "ORDER BY company_name, dealer_id LIMIT 20 OFFSET 0",
+    "users.by_email": "SELECT * FROM users WHERE email = :email",
+    "users.by_id": "SELECT * FROM users WHERE user_id = :user_id",
+}
+
+# Seeding: tables in foreign key order, and how stand-in columns map onto
+# the Alembic schema where the names differ
+SEED_TABLES = ["users", "dealers", "products", "purchase_orders", "purchase_order_items", "app_settings"]
+COLUMN_SOURCES = {
+    "purchase_orders": {"total_ex_vat": "total_tp", "vat_amount": "total_vat"},
+    "products": {"mrp": "MRP", "vat": "VAT", "tp": "TP"},
+}
+
+
+def _label(conn, table: str, value: str) -> str:
+    """Stored spelling of a status value (enum labels may be upper-case)."""
+    label = conn.execute(
+        text(
+            "SELECT e.enumlabel FROM pg_attribute a JOIN pg_enum e ON e.enumtypid = a.atttypid "
+            "WHERE a.attrelid = CAST(:table AS regclass) AND a.attname = 'status' AND lower(e.enumlabel) = :value"
+        ),
+        {"table": table, "value": value},
+    ).scalar()
+    return label or value
+
+
+def _sample_params(conn) -> Dict[str, Any]:
+    busiest = conn.execute(text(
+        "SELECT created_by_user, dealer_id, max(po_id) FROM purchase_orders "
+        "GROUP BY created_by_user, dealer_id ORDER BY count(*) DESC LIMIT 1"
+    )).first()
+    if busiest is None:
+        raise SystemExit("purchase_orders is empty: seed the database first (--seed)")
+    user_id, dealer_id, po_id = busiest
+    name = conn.execute(text("SELECT name FROM products ORDER BY product_id LIMIT 1")).scalar() or "a"
+    product_ids = [str(r[0]) for r in conn.execute(text(
+        "SELECT product_id FROM purchase_order_items WHERE po_id = :po_id"), {"po_id": po_id})]
+    return {
+        "user_id": str(user_id),
+        "dealer_id": str(dealer_id),
+        "po_id": po_id,
+        "product_ids": product_ids or [str(conn.execute(text("SELECT product_id FROM products LIMIT 1")).scalar())],
+        "term": f"%{name[len(name) // 3:len(name) // 3 + 3]}%",
+        "email": conn.execute(text("SELECT email FROM users LIMIT 1")).scalar(),
+        "year_from": datetime.now(timezone.utc).year - 1,
+        "year_to": datetime.now(timezone.utc).year,
+        "approved": _label(conn, "purchase_orders", "approved"),
+        "submitted": _label(conn, "purchase_orders", "submitted"),
+        "active": _label(conn, "products", "active"),
+    }
+
+
+def _walk(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(conn, sql: str, params: Dict[str, Any], min_rows: int) -> Dict[str, Any]:
+    result = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+    report = result[0] if isinstance(result, list) else json.loads(result)[0]
+    plan = report["Plan"]
+    limited = plan["Node Type"] == "Limit"
+    seq_scans = []
+    for node in _walk(plan):
+        if node["Node Type"] != "Seq Scan":
+            continue
+        # Rows the scan had to read, not just the ones it returned. Reading
+        # most of a table to return most of it is the right plan; reading it
+        # to keep a few rows, or to feed a LIMIT, is not
+        returned = node.get("Actual Rows", 0) * node.get("Actual Loops", 1)
+        scanned = returned + node.get("Rows Removed by Filter", 0)
+        if scanned >= min_rows and (limited or returned * 2 < scanned):
+            seq_scans.append({"table": node["Relation Name"], "rows_scanned": scanned,
+                              "filter": node.get("Filter")})
+    return {
+        "execution_ms": round(report["Execution Time"], 3),
+        "shared_hit": plan.get("Shared Hit Blocks", 0),
+        "shared_read": plan.get("Shared Read Blocks", 0),
+        "top_node": plan["Node Type"],
+        "seq_scans": seq_scans,
+    }
+
+
+def _adapt_row(table: Table, source: Dict[str, Any], labels: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """Fit a stand-in row to the columns of the target table."""
+    aliases = COLUMN_SOURCES.get(table.name, {})
+    row = {}
+    for column in table.columns:
+        key = aliases.get(column.name, column.name)
+        if key in source:
+            row[column.name] = source[key]
+        elif column.name in source:
+            row[column.name] = source[column.name]
+    if "status" in row and table.name in labels:
+        row["status"] = labels[table.name].get(str(row["status"]).lower(), row["status"])
+    # NOT NULL columns the Supabase tables don't have
+    if table.name == "products" and "sku_code" in table.columns and "sku_code" not in row:
+        row["sku_code"] = f"SKU-{source['product_id']}"
+    if table.name == "products" and row.get("mrp") is None and "mrp" in table.columns:
+        row["mrp"] = source.get("trade_price_incl_vat")
+    if table.name == "purchase_orders":
+        if "vat_percent" in table.columns and "vat_percent" not in row:
+            row["vat_percent"] = 15
+        if "total_inc_vat" in table.columns and "total_inc_vat" not in row:
+            row["total_inc_vat"] = float(source.get("total_tp") or 0) + float(source.get("total_vat") or 0)
+    return row
+
+
+def seed(scale: int) -> None:
+    """Fill empty tables with the local stand-in's generated data, then ANALYZE."""
+    from local_supabase import SEED_SIZES, LocalDatabase, seed_database
+
+    db = LocalDatabase()
+    seed_database(db, **{k: v * scale for k, v in SEED_SIZES.items()})
+    existing = set(inspect(engine).get_table_names())
+    metadata = MetaData()
+    with engine.begin() as conn:
+        for name in SEED_TABLES:
+            if name not in existing:
+                print(f"skip {name}: no such table")
+                continue
+            table = Table(name, metadata, autoload_with=conn)
+            if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+                raise SystemExit(f"{name} already has rows; --seed only fills empty tables")
+            labels = {}
+            if "status" in table.columns:
+                labels[name] = {
+                    r[0].lower(): r[0] for r in conn.execute(text(
+                        "SELECT e.enumlabel FROM pg_attribute a JOIN pg_enum e ON e.enumtypid = a.atttypid "
+                        "WHERE a.attrelid = CAST(:t AS regclass) AND a.attname = 'status'"), {"t": name})
+                }
+            rows = [_adapt_row(table, r, labels) for r in db.table(name)]
+            for start in range(0, len(rows), 1000):
+                conn.execute(table.insert(), rows[start:start + 1000])
+            print(f"seeded {name}: {len(rows)} rows")
+        for name in ("purchase_orders", "purchase_order_items"):
+            if name in existing:
+                key = "po_id" if name == "purchase_orders" else "po_item_id"
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', '{key}'), (SELECT max({key}) FROM {name}))"
+                ))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN the service queries and flag sequential scans")
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="flag sequential scans reading at least this many rows")
+    parser.add_argument("--only", action="append", default=[], help="query name prefix (repeatable)")
+    parser.add_argument("--seed", type=int, metavar="SCALE",
+                        help="first fill the (empty) tables with SCALE x the local stand-in data set")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        seed(args.seed)
+
+    report = {}
+    flagged = 0
+    with engine.connect() as conn:
+        params = _sample_params(conn)
+        for name, sql in QUERIES.items():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            # Only bind the parameters the statement uses
+            used = {k: v for k, v in params.items() if f":{k}" in sql}
+            result = explain(conn, sql, used, args.min_rows)
+            conn.rollback()
+            report[name] = result
+            flag = ""
+            if result["seq_scans"]:
+                flagged += 1
+                flag = "  SEQ SCAN " + ", ".join(
+                    f"{s['table']} ({s['rows_scanned']} rows)" for s in result["seq_scans"]
+                )
+            print(f"{name:<28} {result['execution_ms']:>9.3f} ms  hit {result['shared_hit']:>6}  "
+                  f"read {result['shared_read']:>6}  {result['top_node']}{flag}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    if flagged:
+        print(f"{flagged} quer{'y' if flagged == 1 else 'ies'} with sequential scans over {args.min_rows}+ rows")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,149 @@
 # backend/services/dashboard_service.py
-from datetime import datetime, timedelta, timezone
+import calendar
+from datetime import datetime, timezone
 from decimal import Decimal
+from typing import Optional
+from fastapi import HTTPException, status
 from core.database import supabase
 from collections import defaultdict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Named periods of the revenue range endpoint, and the longest custom range
+REVENUE_PERIODS = ("6m", "12m", "ytd")
+MAX_REVENUE_MONTHS = 120
+
+
+def _month_index(year: int, month: int) -> int:
+    """Months since year 0, so calendar months of different years never collide."""
+    return int(year) * 12 + int(month) - 1
+
+
+def _month_key(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _parse_month(value: str) -> int:
+    try:
+        year, month = value.split("-")
+        if not 1 <= int(month) <= 12:
+            raise ValueError
+        return _month_index(int(year), int(month))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid month {value!r}, expected YYYY-MM")
+
 
 class DashboardService:
+    @staticmethod
+    def _revenue_rows(start: Optional[int] = None, end: Optional[int] = None) -> list:
+        """
+        Rollup rows (one per dealer and calendar month with approved orders),
+        optionally limited to the years of a month-index range. The table is
+        kept current by triggers on purchase_orders, so this reads at most
+        dealers x months rows however many orders there are.
+        """
+        q = supabase.table("dealer_monthly_revenue") \
+            .select("year,month,dealer_id,order_count,revenue_ex_vat,revenue_vat,dealers(company_name)")
+        if start is not None and end is not None:
+            q = q.gte("year", start // 12).lte("year", end // 12)
+        return q.execute().data or []
+
+    @staticmethod
+    def _aggregate(rows: list, start: Optional[int] = None, end: Optional[int] = None):
+        """Sum rollup rows per month and per dealer, keeping those within [start, end]."""
+        months = defaultdict(lambda: {"revenue": Decimal("0.00"), "order_count": 0})
+        dealers = defaultdict(lambda: {"revenue": Decimal("0.00"), "order_count": 0, "name": "Unknown"})
+        for r in rows:
+            index = _month_index(r["year"], r["month"])
+            if start is not None and not start <= index <= end:
+                continue
+            amount = Decimal(str(r.get("revenue_ex_vat") or 0)) + Decimal(str(r.get("revenue_vat") or 0))
+            months[index]["revenue"] += amount
+            months[index]["order_count"] += r.get("order_count") or 0
+            dealer = dealers[r["dealer_id"]]
+            dealer["revenue"] += amount
+            dealer["order_count"] += r.get("order_count") or 0
+            if r.get("dealers"):
+                dealer["name"] = r["dealers"].get("company_name") or "Unknown"
+        return months, dealers
+
+    @staticmethod
+    def _month_series(months, start: int, end: int) -> list:
+        """One entry per calendar month in [start, end], zero-filled, keyed YYYY-MM."""
+        return [
+            {
+                "month": _month_key(i),
+                "name": calendar.month_name[i % 12 + 1],
+                "total": float(months[i]["revenue"]) if i in months else 0.0,
+                "order_count": months[i]["order_count"] if i in months else 0,
+            }
+            for i in range(start, end + 1)
+        ]
+
+    @staticmethod
+    def _top_dealers(dealers, limit: int) -> list:
+        ranked = sorted(dealers.items(), key=lambda x: x[1]["revenue"], reverse=True)[:limit]
+        return [
+            {"dealer_id": did, "name": d["name"], "value": float(d["revenue"]), "order_count": d["order_count"]}
+            for did, d in ranked
+        ]
+
+    @staticmethod
+    def resolve_revenue_period(period: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None):
+        """
+        Month-index range for a named period ("6m", "12m", "ytd", ending with
+        the current month) or a custom start/end (YYYY-MM, inclusive; a
+        missing end is the current month, a missing start 12 months back).
+        """
+        now = datetime.now(timezone.utc)
+        current = _month_index(now.year, now.month)
+        if start or end:
+            end_index = _parse_month(end) if end else current
+            start_index = _parse_month(start) if start else end_index - 11
+        elif period in (None, "12m"):
+            start_index, end_index = current - 11, current
+        elif period == "6m":
+            start_index, end_index = current - 5, current
+        elif period == "ytd":
+            start_index, end_index = _month_index(now.year, 1), current
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown period {period!r}, expected one of {', '.join(REVENUE_PERIODS)}",
+            )
+        if start_index > end_index:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+        if end_index - start_index + 1 > MAX_REVENUE_MONTHS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Range is limited to {MAX_REVENUE_MONTHS} months",
+            )
+        return start_index, end_index
+
+    @staticmethod
+    def get_revenue(period: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                    top_dealers: int = 5):
+        """Approved-order revenue per month and top dealers over a period, from the rollup."""
+        start_index, end_index = DashboardService.resolve_revenue_period(period, start, end)
+        rows = DashboardService._revenue_rows(start_index, end_index)
+        months, dealers = DashboardService._aggregate(rows, start_index, end_index)
+        return {
+            "start": _month_key(start_index),
+            "end": _month_key(end_index),
+            "total": float(sum((m["revenue"] for m in months.values()), Decimal("0.00"))),
+            "order_count": sum(m["order_count"] for m in months.values()),
+            "months": DashboardService._month_series(months, start_index, end_index),
+            "dealer_stats": DashboardService._top_dealers(dealers, top_dealers),
+        }
+
     @staticmethod
     def get_stats(user_id: str, role: str):
         # 1. Total Orders
         # For admin, get all. For buyer, get own (though this service is primarily for admin dashboard now)
         if role == "admin":
-            res_orders = supabase.table("purchase_orders").select("*", count="exact").execute()
+            # Combined supplier orders only regroup dealer orders already counted
+            res_orders = supabase.table("purchase_orders").select("*", count="exact").neq("status", "combined").execute()
             total_orders = res_orders.count or 0
         else:
             res_orders = supabase.table("purchase_orders").select("*", count="exact").eq("created_by_user", user_id).execute()
@@ -37,20 +170,15 @@ class DashboardService:
             # For now, let's assume this dashboard is ADMIN ONLY as per request.
             total_invoices = 0 
 
-        # 4. Total Sales Amount (From Purchase Orders Only)
+        # 4. Total Sales Amount (approved orders, from the revenue rollup)
         total_sales_amount = Decimal("0.00")
+        revenue_months, revenue_dealers = {}, {}
         if role == "admin":
-            # Use approved purchase orders only
             try:
-                res_approved = supabase.table("purchase_orders").select("total_tp,total_vat").filter("status", "eq", "approved").execute()
-                print(f"Approved orders query result: {len(res_approved.data) if res_approved.data else 0} orders")
-                if res_approved.data:
-                    for po in res_approved.data:
-                        tp = Decimal(str(po.get("total_tp", 0)))
-                        vat = Decimal(str(po.get("total_vat", 0)))
-                        total_sales_amount += tp + vat
+                revenue_months, revenue_dealers = DashboardService._aggregate(DashboardService._revenue_rows())
             except Exception as e:
-                print(f"Error fetching approved orders: {e}")
+                logger.error("Error fetching revenue rollup: %s", e)
+            total_sales_amount = sum((m["revenue"] for m in revenue_months.values()), Decimal("0.00"))
 
         # 5. Total Dealers
         total_dealers = 0
@@ -61,7 +189,8 @@ class DashboardService:
         # 6. Recent Orders (Limit 5)
         recent_orders = []
         if role == "admin":
-            res_recent = supabase.table("purchase_orders").select("*").order("po_date", desc=True).limit(5).execute()
+            res_recent = supabase.table("purchase_orders").select("*").neq("status", "combined") \
+                .order("po_date", desc=True).limit(5).execute()
             recent_orders = res_recent.data or []
         
         # 7. Top Products (by quantity sold in invoices)
@@ -103,79 +232,17 @@ class DashboardService:
                     "value": qty
                 })
 
-        # 8. Monthly Revenue (Last 6 months)
+        # 8. Monthly Revenue (last 6 calendar months)
         monthly_revenue = []
         if role == "admin":
-            # Fetch approved purchase orders from last 6 months
-            six_months_ago = (datetime.now(timezone.utc) - timedelta(days=180)).isoformat()
-            try:
-                res_rev = supabase.table("purchase_orders").select("po_date,total_tp,total_vat").gte("po_date", six_months_ago).filter("status", "eq", "approved").execute()
-                print(f"Monthly revenue query result: {len(res_rev.data) if res_rev.data else 0} orders")
-            except Exception as e:
-                print(f"Error fetching monthly revenue: {e}")
-                res_rev = None
-            
-            revenue_map = defaultdict(Decimal)
-            
-            for po in (res_rev.data or []):
-                d_str = po.get("po_date")
-                tp = Decimal(str(po.get("total_tp", 0)))
-                vat = Decimal(str(po.get("total_vat", 0)))
-                amount = tp + vat
-                
-                if d_str:
-                    # Parse date, handle various formats if needed, but usually ISO from DB
-                    try:
-                        dt = datetime.fromisoformat(d_str.replace('Z', '+00:00'))
-                        month_key = dt.strftime("%B") # e.g. "January"
-                        revenue_map[month_key] += amount
-                    except:
-                        pass
-            
-            # We want to ensure order of months? 
-            # Let's just return what we have. Frontend can handle or we can sort.
-            # Better to return list of {name: Month, total: Amount}
-            # To sort correctly, maybe iterate last 6 months and fill.
-            
-            for i in range(5, -1, -1):
-                d = datetime.now(timezone.utc) - timedelta(days=i*30)
-                m_name = d.strftime("%B")
-                monthly_revenue.append({
-                    "name": m_name,
-                    "total": float(revenue_map.get(m_name, 0))
-                })
+            now = datetime.now(timezone.utc)
+            current = _month_index(now.year, now.month)
+            monthly_revenue = DashboardService._month_series(revenue_months, current - 5, current)
 
         # 9. Dealer Stats (Top Dealers by Revenue)
         dealer_stats = []
         if role == "admin":
-             # Fetch approved purchase orders and group by dealer
-             # Again, client side aggregation for MVP
-             try:
-                 res_dealer_po = supabase.table("purchase_orders").select("dealer_id,total_tp,total_vat,dealers(company_name)").filter("status", "eq", "approved").execute()
-                 print(f"Dealer stats query result: {len(res_dealer_po.data) if res_dealer_po.data else 0} orders")
-             except Exception as e:
-                 print(f"Error fetching dealer stats: {e}")
-                 res_dealer_po = None
-             
-             dealer_rev_map = defaultdict(Decimal)
-             dealer_name_map = {}
-             
-             for po in (res_dealer_po.data or []):
-                 did = po.get("dealer_id")
-                 tp = Decimal(str(po.get("total_tp", 0)))
-                 vat = Decimal(str(po.get("total_vat", 0)))
-                 amt = tp + vat
-                 
-                 dealer_rev_map[did] += amt
-                 if po.get("dealers"):
-                     dealer_name_map[did] = po.get("dealers").get("company_name")
-            
-             sorted_dealers = sorted(dealer_rev_map.items(), key=lambda x: x[1], reverse=True)[:5]
-             for did, amt in sorted_dealers:
-                 dealer_stats.append({
-                     "name": dealer_name_map.get(did, "Unknown"),
-                     "value": float(amt)
-                 })
+            dealer_stats = DashboardService._top_dealers(revenue_dealers, 5)
 
         return {
             "total_orders": total_orders,
@@ -0,0 +1,47 @@
+# services/data_version_service.py
+"""
+Change counters of the tables behind cacheable responses.
+
+data_versions is a view over one sequence per table, advanced once per
+writing transaction as it commits (migrations f1a6c3e9d024, e3f7b1c8a592).
+Reading the counters a response depends on is a single small query, so an
+unchanged response can be recognised without rebuilding it.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from core.database import supabase
+from core.http_cache import make_etag
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Tables each cacheable response is built from
+PRODUCT_TABLES = ("products",)
+ORDER_DETAIL_TABLES = ("purchase_orders", "purchase_order_items", "products", "dealers", "app_settings")
+DASHBOARD_TABLES = ("purchase_orders", "purchase_order_items", "products", "dealers", "invoices", "invoice_items")
+
+
+class DataVersionService:
+    @staticmethod
+    def get_versions(tables: Iterable[str]) -> Optional[Dict[str, int]]:
+        """
+        Current counter per table, 0 for tables never written since the
+        migration. None when the counters can't be read, in which case
+        callers serve the response without validators.
+        """
+        tables = list(tables)
+        try:
+            res = supabase.table("data_versions").select("name,version").in_("name", tables).execute()
+        except Exception as e:
+            logger.warning("Could not read data versions: %s", e)
+            return None
+        versions = {row["name"]: int(row["version"]) for row in (res.data or [])}
+        return {name: versions.get(name, 0) for name in tables}
+
+    @staticmethod
+    def etag(tables: Iterable[str], *parts: Any) -> Optional[str]:
+        """ETag over the tables' counters and the other inputs of a response."""
+        versions = DataVersionService.get_versions(tables)
+        if versions is None:
+            return None
+        return make_etag(sorted(versions.items()), *parts)
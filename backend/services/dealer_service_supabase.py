@@ -1,4 +1,6 @@
 # services/dealer_service_supabase.py
+from typing import Optional
+
 from core.database import supabase
 from core.logging import get_logger
 from core.security import hash_password
@@ -6,6 +8,21 @@ from fastapi import HTTPException
 
 logger = get_logger(__name__)
 
+# Postgres error code raised by the RPC when the email is already registered
+UNIQUE_VIOLATION = "23505"
+
+# Columns of the linked user embedded into dealer listings
+DEALER_USER_FIELDS = "user_id,email,full_name,contact_number"
+
+# Columns the admin dealer listing may be sorted by
+DEALER_SORT_FIELDS = ("company_name", "customer_code", "created_at")
+
+
+def _or_value(value: str) -> str:
+    """Double-quote a value for a PostgREST or=() filter so , . ( ) and quotes in it stay literal."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
 class DealerServiceSB:
     """Dealer service using Supabase client."""
 
@@ -16,7 +33,7 @@ class DealerServiceSB:
         dealer_data: DealerCreate Pydantic schema
         current_user: dict (from Supabase users table)
         """
-        logger.info(f"Creating dealer profile for user_id={current_user['user_id']}")
+        logger.info("Creating dealer profile for user_id=%s", current_user['user_id'])
 
         payload = {
             "customer_code": dealer_data.customer_code,
@@ -31,10 +48,10 @@ class DealerServiceSB:
         try:
             res = supabase.table("dealers").insert(payload).execute()
             dealer = res.data[0] if res.data else None
-            logger.info(f"Dealer profile created with id={dealer.get('dealer_id') if dealer else 'N/A'}")
+            logger.info("Dealer profile created with id=%s", dealer.get('dealer_id') if dealer else 'N/A')
             return dealer
         except Exception as e:
-            logger.error(f"Failed to create dealer profile: {str(e)}")
+            logger.error("Failed to create dealer profile: %s", e)
             raise HTTPException(status_code=500, detail="Could not create dealer profile")
 
     @staticmethod
@@ -42,12 +59,12 @@ class DealerServiceSB:
         """
         Fetch dealer profile for the given user.
         """
-        logger.debug(f"Fetching dealer profile for user_id={current_user['user_id']}")
+        logger.debug("Fetching dealer profile for user_id=%s", current_user['user_id'])
         try:
             res = supabase.table("dealers").select("*").eq("user_id", str(current_user["user_id"])).execute()
             return res.data[0] if res.data else None
         except Exception as e:
-            logger.error(f"Error fetching dealer profile: {str(e)}")
+            logger.error("Error fetching dealer profile: %s", e)
             raise HTTPException(status_code=500, detail="Could not fetch dealer profile")
 
     @staticmethod
@@ -55,7 +72,7 @@ class DealerServiceSB:
         """
         Update dealer profile for the given user.
         """
-        logger.info(f"Updating dealer profile for user_id={current_user['user_id']}")
+        logger.info("Updating dealer profile for user_id=%s", current_user['user_id'])
         try:
             res = supabase.table("dealers").update({
                 "customer_code": dealer_data.customer_code,
@@ -68,7 +85,7 @@ class DealerServiceSB:
 
             return res.data[0] if res.data else None
         except Exception as e:
-            logger.error(f"Failed to update dealer profile: {str(e)}")
+            logger.error("Failed to update dealer profile: %s", e)
             raise HTTPException(status_code=500, detail="Could not update dealer profile")
 
     @staticmethod
@@ -78,75 +95,68 @@ class DealerServiceSB:
         dealer_data: DealerCreate schema
         user_data: dict with email, password, full_name, contact_number
         Returns: (user, dealer) tuple
+
+        The user and dealer are created by the `create_dealer_with_user` RPC in
+        one transaction, with customer_code taken from a database sequence.
         """
-        logger.info(f"Admin creating dealer with user email={user_data.get('email')}")
-        
-        # Check if email already exists
-        existing = supabase.table("users").select("user_id").eq("email", user_data["email"].lower()).execute()
-        if existing.data:
-            raise HTTPException(status_code=400, detail="Email already registered")
-        
-        # Generate customer_code based on dealer count
-        all_dealers = supabase.table("dealers").select("*", count="exact").execute()
-        next_customer_code = str((all_dealers.count or 0) + 1)
-        
+        logger.info("Admin creating dealer with user email=%s", user_data.get('email'))
+
+        params = {
+            "p_email": user_data["email"].lower(),
+            "p_password_hash": hash_password(user_data["password"]),
+            "p_full_name": user_data["full_name"],
+            "p_user_contact_number": user_data.get("contact_number"),
+            "p_company_name": dealer_data.company_name,
+            "p_contact_person": dealer_data.contact_person,
+            "p_contact_number": dealer_data.contact_number,
+            "p_billing_address": dealer_data.billing_address,
+            "p_shipping_address": dealer_data.shipping_address,
+        }
+
         try:
-            # Create user
-            hashed_password = hash_password(user_data["password"])
-            user_payload = {
-                "email": user_data["email"].lower(),
-                "password_hash": hashed_password,
-                "full_name": user_data["full_name"],
-                "role": "buyer",
-                "contact_number": user_data.get("contact_number"),
-            }
-            user_res = supabase.table("users").insert(user_payload).execute()
-            if not user_res.data:
-                raise HTTPException(status_code=500, detail="Failed to create user")
-            
-            user = user_res.data[0]
-            user_id = user["user_id"]
-            
-            # Create dealer linked to user
-            dealer_payload = {
-                "customer_code": next_customer_code,
-                "company_name": dealer_data.company_name,
-                "contact_person": dealer_data.contact_person,
-                "contact_number": dealer_data.contact_number,
-                "billing_address": dealer_data.billing_address,
-                "shipping_address": dealer_data.shipping_address,
-                "user_id": str(user_id),
-            }
-            dealer_res = supabase.table("dealers").insert(dealer_payload).execute()
-            if not dealer_res.data:
-                raise HTTPException(status_code=500, detail="Failed to create dealer")
-            
-            dealer = dealer_res.data[0]
-            logger.info(f"Successfully created dealer with id={dealer.get('dealer_id')} and user with id={user_id}")
-            return user, dealer
-        except HTTPException:
-            raise
+            res = supabase.rpc("create_dealer_with_user", params).execute()
         except Exception as e:
-            logger.error(f"Failed to create dealer with user: {str(e)}")
+            if getattr(e, "code", None) == UNIQUE_VIOLATION:
+                raise HTTPException(status_code=400, detail="Email already registered")
+            logger.error("Failed to create dealer with user: %s", e)
             raise HTTPException(status_code=500, detail="Could not create dealer account")
 
+        if not res.data:
+            raise HTTPException(status_code=500, detail="Failed to create dealer")
+
+        user, dealer = res.data["user"], res.data["dealer"]
+        logger.info("Successfully created dealer with id=%s and user with id=%s", dealer.get('dealer_id'), user.get('user_id'))
+        return user, dealer
+
     @staticmethod
-    def get_all_dealers():
+    def get_all_dealers(
+        skip: int = 0,
+        limit: int = 20,
+        search: Optional[str] = None,
+        sort_by: str = "company_name",
+        sort_order: str = "asc",
+    ):
         """
-        Admin endpoint: Get all dealers with their user information.
+        Admin endpoint: Get dealers with their user information, paginated.
+        The linked user is embedded in the same PostgREST request and the total
+        is returned alongside the page, so the listing costs one round trip.
+        Returns: (dealers, total) tuple
         """
-        logger.debug("Fetching all dealers")
+        if sort_by not in DEALER_SORT_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Cannot sort dealers by '{sort_by}'")
+
+        logger.debug("Fetching dealers skip=%s limit=%s search=%r sort=%s %s", skip, limit, search, sort_by, sort_order)
         try:
-            res = supabase.table("dealers").select("*").execute()
-            dealers = res.data or []
-            
-            # Enrich with user information
-            for dealer in dealers:
-                if dealer.get("user_id"):
-                    user_res = supabase.table("users").select("user_id,email,full_name,contact_number").eq("user_id", str(dealer["user_id"])).execute()
-                    dealer["user"] = user_res.data[0] if user_res.data else None
-            
-            return dealers
+            q = supabase.table("dealers").select(f"*,user:users({DEALER_USER_FIELDS})", count="exact")
+            if search:
+                like = _or_value(f"%{search}%")
+                q = q.or_(f"company_name.ilike.{like},customer_code.ilike.{like}")
+            # Supabase range is inclusive
+            res = q.order(sort_by, desc=(sort_order == "desc")) \
+                .order("dealer_id") \
+                .range(skip, skip + limit - 1) \
+                .execute()
+            return res.data or [], res.count or 0
         except Exception as e:
-            logger.error(f"Error fetching all dealers: {str(e)}")
+            logger.error("Error fetching all dealers: %s", e)
             raise HTTPException(status_code=500, detail="Could not fetch dealers")
@@ -1,8 +1,12 @@
+import logging
+
 from core.database import supabase
 
+logger = logging.getLogger(__name__)
+
 class DocumentGenerationService:
     def generate_invoice(order):
-        print(order)
+        logger.debug("Generating invoice for order: %s", order)
         return order.data[0] if order.data else None
 
     def generate_po(self, order):
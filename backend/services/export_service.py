@@ -0,0 +1,129 @@
+# services/export_service.py
+"""
+Streaming purchase order exports (CSV / NDJSON) for reporting.
+
+Orders are read through the repository's iter_orders(), which fetches
+one chunk at a time (keyset pages over PostgREST, a server-side cursor
+over SQL), and each chunk is written out before the next is fetched, so
+memory stays flat however large the export. Rows are flattened straight
+from the stored columns, without the response models of the list API.
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.logging import get_logger
+from repositories import get_purchase_order_repository
+
+logger = get_logger(__name__)
+
+ORDER_COLUMNS = [
+    "po_id", "po_number", "po_date", "status", "approved_at",
+    "dealer_id", "customer_code", "company_name",
+    "line_count", "total_tp", "vat_percent", "total_vat", "total_inc_vat",
+]
+LINE_COLUMNS = [
+    "po_id", "po_number", "po_date", "status",
+    "dealer_id", "customer_code", "company_name",
+    "po_item_id", "product_id", "product_name", "pack_size", "quantity", "unit_price", "total_price",
+]
+EXPORT_LEVELS = {"orders": ORDER_COLUMNS, "lines": LINE_COLUMNS}
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Orders fetched per chunk
+EXPORT_CHUNK_SIZE = 200
+
+
+def _number(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _order_fields(order: Dict[str, Any]) -> Dict[str, Any]:
+    dealer = order.get("dealer") or {}
+    return {
+        "po_id": order["po_id"],
+        "po_number": order.get("po_number"),
+        "po_date": order.get("po_date"),
+        "status": order.get("status"),
+        "dealer_id": order.get("dealer_id"),
+        "customer_code": dealer.get("customer_code"),
+        "company_name": dealer.get("company_name"),
+    }
+
+
+def _order_row(order: Dict[str, Any]) -> Dict[str, Any]:
+    total_tp, total_vat = order.get("total_tp"), order.get("total_vat")
+    total_inc_vat = None
+    if total_tp is not None and total_vat is not None:
+        total_inc_vat = float(Decimal(str(total_tp)) + Decimal(str(total_vat)))
+    return {
+        **_order_fields(order),
+        "approved_at": order.get("approved_at"),
+        "line_count": len(order.get("items") or []),
+        "total_tp": _number(total_tp),
+        "vat_percent": _number(order.get("vat_percent")),
+        "total_vat": _number(total_vat),
+        "total_inc_vat": total_inc_vat,
+    }
+
+
+def _line_rows(order: Dict[str, Any]) -> List[Dict[str, Any]]:
+    fields = _order_fields(order)
+    rows = []
+    for it in order.get("items") or []:
+        product = it.get("product") or {}
+        rows.append({
+            **fields,
+            "po_item_id": it.get("po_item_id"),
+            "product_id": it.get("product_id"),
+            "product_name": product.get("name"),
+            "pack_size": it.get("pack_size_snapshot") or product.get("pack_size"),
+            "quantity": it.get("quantity"),
+            "unit_price": _number(it.get("unit_price")),
+            "total_price": _number(it.get("total_price")),
+        })
+    return rows
+
+
+class ExportService:
+    @staticmethod
+    def iter_rows(level: str, **filters) -> Iterator[List[Dict[str, Any]]]:
+        """Flat export rows, one list per fetched chunk of orders."""
+        for orders in get_purchase_order_repository().iter_orders(chunk_size=EXPORT_CHUNK_SIZE, **filters):
+            if level == "lines":
+                yield [row for order in orders for row in _line_rows(order)]
+            else:
+                yield [_order_row(order) for order in orders]
+
+    @staticmethod
+    def stream(fmt: str, level: str, **filters) -> Iterator[str]:
+        """
+        Encoded export, one piece per chunk. The CSV header goes out before
+        the first query so clients see the response start immediately.
+        """
+        columns = EXPORT_LEVELS[level]
+        rows_written = 0
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        if fmt == "csv":
+            writer.writeheader()
+            yield buffer.getvalue()
+        try:
+            for rows in ExportService.iter_rows(level, **filters):
+                buffer.seek(0)
+                buffer.truncate()
+                if fmt == "csv":
+                    writer.writerows(rows)
+                else:
+                    for row in rows:
+                        buffer.write(json.dumps(row, default=str))
+                        buffer.write("\n")
+                rows_written += len(rows)
+                yield buffer.getvalue()
+        except Exception:
+            # Headers are already sent; all that's left is to end the body early
+            logger.exception("Export failed after %d rows (%s, %s, %s)", rows_written, fmt, level, filters)
+            raise
+        logger.info("Export finished: %d %s rows as %s", rows_written, level, fmt)
@@ -10,14 +10,15 @@ import subprocess
 from decimal import Decimal
 import logging
 import os
-import json
 
 from docxtpl import DocxTemplate
 from docx import Document
 from docx.oxml.shared import OxmlElement
 from docx.shared import Pt
 from core.database import supabase
+from core.instrumentation import document_stage
 from fastapi import HTTPException
+from services.settings_service_supabase import SettingsServiceSB
 from services.utils import convert_docx_to_pdf
 
 logger = logging.getLogger(__name__)
@@ -25,7 +26,7 @@ logger = logging.getLogger(__name__)
 # Create output directory for invoices
 OUTPUT_DIR = Path(__file__).parent.parent / "output" / "invoices"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-logger.info(f"Invoice output directory: {OUTPUT_DIR}")
+logger.debug("Invoice output directory: %s", OUTPUT_DIR)
 
 
 # Bank details (constant)
@@ -164,7 +165,7 @@ def add_table_row_from_template(table, row_data: list, template_row):
 
         return True
     except Exception as e:
-        print(f"Error adding row: {e}")
+        logger.error("Error adding row: %s", e)
         return False
 
 
@@ -196,13 +197,13 @@ def replace_placeholders_everywhere(doc: Document, context: dict):
                 new = orig
                 for k, v in repl.items():
                     if k in new:
-                        logger.info(f"Replacing placeholder {k} with {v}")
+                        logger.debug("Replacing placeholder %s with %s", k, v)
                         new = new.replace(k, v)
                 if new != orig:
                     t.text = new
         return True
     except Exception as e:
-        logger.error(f"Error replacing placeholders: {e}")
+        logger.error("Error replacing placeholders: %s", e)
         return False
 
 
@@ -217,43 +218,43 @@ class InvoiceGeneratorService:
         Generate invoice for a purchase order.
         Returns: (docx_path, pdf_path)
         """
-        logger.info(f"Starting invoice generation for PO ID: {po_id}")
+        logger.info("Starting invoice generation for PO ID: %s", po_id)
         
         # Use persistent output directory if not specified
         if output_dir is None:
             output_dir = OUTPUT_DIR
         
         output_dir.mkdir(parents=True, exist_ok=True)
-        logger.debug(f"Output directory: {output_dir}")
+        logger.debug("Output directory: %s", output_dir)
         
         # Get PO details
-        logger.info(f"Fetching purchase order details for PO ID: {po_id}")
+        logger.debug("Fetching purchase order details for PO ID: %s", po_id)
         po_res = supabase.table("purchase_orders").select("*").eq("po_id", po_id).execute()
         if not po_res.data:
-            logger.error(f"Purchase order not found for PO ID: {po_id}")
+            logger.error("Purchase order not found for PO ID: %s", po_id)
             raise HTTPException(status_code=404, detail="Purchase order not found")
         
         po = po_res.data[0]
-        logger.info(f"PO retrieved: {po.get('po_number')} - Status: {po.get('status')}")
+        logger.debug("PO retrieved: %s - Status: %s", po.get('po_number'), po.get('status'))
         
         # Get dealer details
-        logger.info(f"Fetching dealer details for dealer ID: {po['dealer_id']}")
+        logger.debug("Fetching dealer details for dealer ID: %s", po['dealer_id'])
         dealer_res = supabase.table("dealers").select("*").eq("dealer_id", str(po["dealer_id"])).execute()
         if not dealer_res.data:
-            logger.error(f"Dealer not found for dealer ID: {po['dealer_id']}")
+            logger.error("Dealer not found for dealer ID: %s", po['dealer_id'])
             raise HTTPException(status_code=404, detail="Dealer not found")
         
         dealer = dealer_res.data[0]
-        logger.info(f"Dealer retrieved: {dealer.get('company_name')} (Code: {dealer.get('customer_code')})")
+        logger.debug("Dealer retrieved: %s (Code: %s)", dealer.get('company_name'), dealer.get('customer_code'))
         
         # Get PO items
-        logger.info(f"Fetching items for PO ID: {po_id}")
+        logger.debug("Fetching items for PO ID: %s", po_id)
         items_res = supabase.table("purchase_order_items").select("*").eq("po_id", po_id).execute()
         items = items_res.data or []
-        logger.info(f"Retrieved {len(items)} items for PO")
+        logger.debug("Retrieved %s items for PO", len(items))
         
         # Fetch product details for each item
-        logger.info(f"Fetching product details for items")
+        logger.debug("Fetching product details for items")
         if items:
             product_ids = list({it["product_id"] for it in items if it.get("product_id")})
             if product_ids:
@@ -291,37 +292,28 @@ class InvoiceGeneratorService:
                 "unit_price": unit_price,
                 "total": total,
             })
-            logger.debug(f"Item {idx}: {product_name} - Qty: {qty}, Unit Price: {unit_price}, Total: {total}")
+            logger.debug("Item %s: %s - Qty: %s, Unit Price: %s, Total: %s", idx, product_name, qty, unit_price, total)
         
-        logger.info(f"Subtotal calculated: {subtotal}")
+        logger.debug("Subtotal calculated: %s", subtotal)
         
-        # Fetch VAT and commission rates from app_settings
-        logger.info(f"Fetching VAT and commission rates from app_settings")
-        settings_res = supabase.table("app_settings").select("value").limit(1).execute()
-        settings = {"vat": 0.15, "commission": 0.15}  # defaults
-        if settings_res.data and len(settings_res.data) > 0:
-            settings_data = settings_res.data[0].get("value")
-            if isinstance(settings_data, str):
-                settings = json.loads(settings_data)
-            else:
-                settings = settings_data
-        
-        vat_percent = settings.get("vat", 0.15) * 100  # Convert to percentage
-        commission_percent = settings.get("commission", 0.15)
-        logger.info(f"Settings fetched - VAT: {vat_percent}%, Commission: {commission_percent * 100}%")
+        # VAT and commission rates from the shared app settings cache
+        app_settings = SettingsServiceSB.get_settings()
+        vat_percent = app_settings.vat * 100  # Convert to percentage
+        commission_percent = app_settings.commission
+        logger.debug("Settings fetched - VAT: %s%%, Commission: %s%%", vat_percent, commission_percent * 100)
         
         # Format invoice number: ASK-AP# 04 (based on PO number)
         po_number = po.get("po_number", "")
         invoice_no = f"ASK-AP# {po_number.replace('PO-', '')}"
-        logger.info(f"Invoice number formatted: {invoice_no}")
+        logger.debug("Invoice number formatted: %s", invoice_no)
         
         # Create pages
-        logger.info(f"Paginating items (30 items per page)")
+        logger.debug("Paginating items (30 items per page)")
         pages = InvoiceGeneratorService._paginate_items(items_with_totals)
-        logger.info(f"Created {len(pages)} page(s) for invoice")
+        logger.debug("Created %s page(s) for invoice", len(pages))
         
         # Generate multi-page document
-        logger.info(f"Generating multi-page invoice document")
+        logger.debug("Generating multi-page invoice document")
         docx_path, pdf_path = InvoiceGeneratorService._generate_multi_page_invoice(
             template_path=template_path,
             output_dir=output_dir,
@@ -334,7 +326,7 @@ class InvoiceGeneratorService:
             commission_percent=commission_percent,
         )
         
-        logger.info(f"Invoice generation completed - DOCX: {docx_path}, PDF: {pdf_path}")
+        logger.info("Invoice generation completed - DOCX: %s, PDF: %s", docx_path, pdf_path)
         return docx_path, pdf_path
     
     @staticmethod
@@ -359,8 +351,8 @@ class InvoiceGeneratorService:
         commission_percent: float,
     ) -> tuple:
         """Generate multi-page invoice document."""
-        logger.info(f"Starting multi-page invoice generation with {len(pages)} page(s)")
-        logger.debug(f"Template path: {template_path}")
+        logger.debug("Starting multi-page invoice generation with %s page(s)", len(pages))
+        logger.debug("Template path: %s", template_path)
         
         all_docs = []
         balance_bd = 0.0
@@ -369,10 +361,10 @@ class InvoiceGeneratorService:
         # Calculate overall VAT and commission (for last page)
         overall_vat = subtotal * (vat_percent / 100)
         overall_commission = subtotal * commission_percent
-        logger.info(f"Overall calculations - VAT: {overall_vat}, Commission: {overall_commission}")
+        logger.debug("Overall calculations - VAT: %s, Commission: %s", overall_vat, overall_commission)
         
         for page_num, page_items in enumerate(pages, 1):
-            logger.info(f"Processing page {page_num}/{total_pages} with {len(page_items)} items")
+            logger.debug("Processing page %s/%s with %s items", page_num, total_pages, len(page_items))
             # Add balance b/d as first item if not first page
             if page_num > 1:
                 page_items = [
@@ -416,7 +408,7 @@ class InvoiceGeneratorService:
                 total_payable = subtotal + overall_vat - overall_commission
                 tp_display = money(total_payable)
                 tp_in_words = number_to_words(total_payable)
-                logger.debug(f"Last page - TIV: {subtotal}, VAT: {overall_vat}, Commission: {overall_commission}, TP: {total_payable}")
+                logger.debug("Last page - TIV: %s, VAT: %s, Commission: %s, TP: %s", subtotal, overall_vat, overall_commission, total_payable)
             else:
                 # First/Middle pages: show page TIV (TP + page VAT + balance B/D)
                 vat_display = ""
@@ -427,7 +419,7 @@ class InvoiceGeneratorService:
                 total_payable = page_tiv
                 tp_display = money(total_payable)
                 tp_in_words = number_to_words(total_payable)
-                logger.debug(f"Page {page_num} - Page TP Sum: {page_tp_sum}, Page VAT: {page_vat}, Balance B/D: {balance_bd}, TIV: {page_tiv}")
+                logger.debug("Page %s - Page TP Sum: %s, Page VAT: %s, Balance B/D: %s, TIV: %s", page_num, page_tp_sum, page_vat, balance_bd, page_tiv)
             
             # Create context for this page
             context = {
@@ -455,123 +447,129 @@ class InvoiceGeneratorService:
             }
             
             # Load template and render
-            logger.debug(f"Loading template from: {template_path}")
-            tpl = DocxTemplate(template_path)
-            logger.debug(f"Rendering template with context for page {page_num}")
-            logger.info(f"Context COMM value: {context.get('COMM', 'NOT SET')}")
-            tpl.render(context)
-            buf = BytesIO()
-            tpl.save(buf)
-            
-            doc = Document(BytesIO(buf.getvalue()))
-            logger.debug(f"Document created from template for page {page_num}")
+            logger.debug("Loading template from: %s", template_path)
+            with document_stage("invoice", "render"):
+                tpl = DocxTemplate(template_path)
+                logger.debug("Rendering template with context for page %s", page_num)
+                logger.debug("Context COMM value: %s", context.get('COMM', 'NOT SET'))
+                tpl.render(context)
+                buf = BytesIO()
+                tpl.save(buf)
+                
+                doc = Document(BytesIO(buf.getvalue()))
+            logger.debug("Document created from template for page %s", page_num)
             
-            # Find and populate items table
-            logger.debug(f"Finding items table in document")
-            items_table = find_items_table(doc)
-            if items_table and len(items_table.rows) >= 2:
-                logger.debug(f"Items table found with {len(items_table.rows)} rows")
-                template_row = items_table.rows[1]
+            with document_stage("invoice", "rows"):
+                # Find and populate items table
+                logger.debug("Finding items table in document")
+                items_table = find_items_table(doc)
+                if items_table and len(items_table.rows) >= 2:
+                    logger.debug("Items table found with %s rows", len(items_table.rows))
+                    template_row = items_table.rows[1]
                 
-                # Remove existing rows (keep header)
-                for row in list(items_table.rows)[1:]:
-                    items_table._tbl.remove(row._tr)
-                logger.debug(f"Cleared existing rows from items table")
+                    # Remove existing rows (keep header)
+                    for row in list(items_table.rows)[1:]:
+                        items_table._tbl.remove(row._tr)
+                    logger.debug("Cleared existing rows from items table")
                 
-                # Add items and fill remaining rows to 30
-                logger.debug(f"Adding {len(page_items)} items to table")
-                for item in page_items:
-                    row_data = [
-                        str(item.get("sl", "")),
-                        str(item.get("desc", "")),
-                        str(item.get("pkt_size", "")),
-                        str(item.get("qty", "")) if item.get("qty") != "" else "",
-                        money(item.get("unit_price", "")) if item.get("unit_price") != "" else "",
-                        money(item.get("total", "")),
-                    ]
-                    add_table_row_from_template(items_table, row_data, template_row)
+                    # Add items and fill remaining rows to 30
+                    logger.debug("Adding %s items to table", len(page_items))
+                    for item in page_items:
+                        row_data = [
+                            str(item.get("sl", "")),
+                            str(item.get("desc", "")),
+                            str(item.get("pkt_size", "")),
+                            str(item.get("qty", "")) if item.get("qty") != "" else "",
+                            money(item.get("unit_price", "")) if item.get("unit_price") != "" else "",
+                            money(item.get("total", "")),
+                        ]
+                        add_table_row_from_template(items_table, row_data, template_row)
                 
-                # Fill remaining rows with empty rows to make 30 rows total
-                rows_to_fill = ITEMS_PER_PAGE - len(page_items)
-                if rows_to_fill > 0:
-                    logger.debug(f"Filling {rows_to_fill} empty rows to reach {ITEMS_PER_PAGE} rows")
-                    for _ in range(rows_to_fill):
-                        empty_row_data = ["", "", "", "", "", ""]
-                        add_table_row_from_template(items_table, empty_row_data, template_row)
+                    # Fill remaining rows with empty rows to make 30 rows total
+                    rows_to_fill = ITEMS_PER_PAGE - len(page_items)
+                    if rows_to_fill > 0:
+                        logger.debug("Filling %s empty rows to reach %s rows", rows_to_fill, ITEMS_PER_PAGE)
+                        for _ in range(rows_to_fill):
+                            empty_row_data = ["", "", "", "", "", ""]
+                            add_table_row_from_template(items_table, empty_row_data, template_row)
                 
-                logger.debug(f"All items and empty rows added to table for page {page_num}")
-            else:
-                logger.warning(f"Items table not found or insufficient rows on page {page_num}")
+                    logger.debug("All items and empty rows added to table for page %s", page_num)
+                else:
+                    logger.warning("Items table not found or insufficient rows on page %s", page_num)
             
-            logger.debug(f"Replacing placeholders in document")
-            replace_placeholders_everywhere(doc, context)
+            logger.debug("Replacing placeholders in document")
+            with document_stage("invoice", "placeholders"):
+                replace_placeholders_everywhere(doc, context)
             all_docs.append(doc)
-            logger.info(f"Page {page_num} document completed and added to collection")
+            logger.debug("Page %s document completed and added to collection", page_num)
             
             # Calculate balance b/d for next page
             page_total = sum(float(item.get("total", 0)) for item in page_items if item.get("sl") != "B/D")
             balance_bd += page_total
-            logger.debug(f"Balance B/D for next page: {balance_bd}")
+            logger.debug("Balance B/D for next page: %s", balance_bd)
         
         # Merge all documents
-        logger.info(f"Merging {len(all_docs)} document(s)")
+        logger.debug("Merging %s document(s)", len(all_docs))
         if not all_docs:
             logger.error("No documents were generated")
             raise RuntimeError("No documents generated")
         
-        merged_doc = all_docs[0]
-        logger.debug(f"Starting with first document as base")
+        with document_stage("invoice", "merge"):
+            merged_doc = all_docs[0]
+            logger.debug("Starting with first document as base")
         
-        for idx, doc in enumerate(all_docs[1:], 1):
-            logger.debug(f"Merging document {idx + 1} into merged document")
-            # Append body elements from other documents, excluding section properties
-            # Section properties (sectPr) should not be copied to avoid formatting conflicts
-            w_ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-            sectPr_tag = f'{{{w_ns}}}sectPr'
+            for idx, doc in enumerate(all_docs[1:], 1):
+                logger.debug("Merging document %s into merged document", idx + 1)
+                # Append body elements from other documents, excluding section properties
+                # Section properties (sectPr) should not be copied to avoid formatting conflicts
+                w_ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+                sectPr_tag = f'{{{w_ns}}}sectPr'
             
-            first_element = True
-            for element in doc.element.body:
-                # Skip section properties to preserve first page formatting
-                if element.tag == sectPr_tag:
-                    logger.debug(f"Skipping section properties element to preserve formatting")
-                    continue
+                first_element = True
+                for element in doc.element.body:
+                    # Skip section properties to preserve first page formatting
+                    if element.tag == sectPr_tag:
+                        logger.debug("Skipping section properties element to preserve formatting")
+                        continue
                 
-                # For the first element of subsequent documents, add page break to it
-                if first_element:
-                    element_copy = deepcopy(element)
-                    # Add page break to the first element's paragraph properties
-                    w_p_tag = f'{{{w_ns}}}p'
-                    if element_copy.tag == w_p_tag:
-                        pPr = element_copy.find(f'{{{w_ns}}}pPr')
-                        if pPr is None:
-                            pPr = OxmlElement('w:pPr')
-                            element_copy.insert(0, pPr)
-                        # Insert page break at the beginning of pPr
-                        pageBreak = OxmlElement('w:pageBreakBefore')
-                        pPr.insert(0, pageBreak)
-                        logger.debug(f"Added page break to first element of page {idx + 1}")
-                    first_element = False
-                    merged_doc.element.body.append(element_copy)
-                else:
-                    merged_doc.element.body.append(deepcopy(element))
+                    # For the first element of subsequent documents, add page break to it
+                    if first_element:
+                        element_copy = deepcopy(element)
+                        # Add page break to the first element's paragraph properties
+                        w_p_tag = f'{{{w_ns}}}p'
+                        if element_copy.tag == w_p_tag:
+                            pPr = element_copy.find(f'{{{w_ns}}}pPr')
+                            if pPr is None:
+                                pPr = OxmlElement('w:pPr')
+                                element_copy.insert(0, pPr)
+                            # Insert page break at the beginning of pPr
+                            pageBreak = OxmlElement('w:pageBreakBefore')
+                            pPr.insert(0, pageBreak)
+                            logger.debug("Added page break to first element of page %s", idx + 1)
+                        first_element = False
+                        merged_doc.element.body.append(element_copy)
+                    else:
+                        merged_doc.element.body.append(deepcopy(element))
         
-        logger.info(f"All {len(all_docs)} document(s) merged successfully")
+        logger.debug("All %s document(s) merged successfully", len(all_docs))
         
         # Save DOCX
         safe_no = invoice_no.replace("/", "-").replace("\\", "-").replace("#", "_")
         docx_path = output_dir / f"Invoice_{safe_no}.docx"
-        logger.info(f"Saving DOCX file to: {docx_path}")
-        merged_doc.save(docx_path)
-        logger.info(f"DOCX file saved successfully")
+        logger.debug("Saving DOCX file to: %s", docx_path)
+        with document_stage("invoice", "save"):
+            merged_doc.save(docx_path)
+        logger.debug("DOCX file saved successfully")
         
         # Convert to PDF
-        logger.info(f"Attempting to convert DOCX to PDF")
-        pdf_path = convert_docx_to_pdf(docx_path)
+        logger.debug("Attempting to convert DOCX to PDF")
+        with document_stage("invoice", "pdf_convert"):
+            pdf_path = convert_docx_to_pdf(docx_path)
         if pdf_path and pdf_path.exists():
-            logger.info(f"PDF conversion successful: {pdf_path}")
+            logger.debug("PDF conversion successful: %s", pdf_path)
         else:
-            logger.warning(f"PDF conversion failed or LibreOffice not available - will return DOCX instead")
+            logger.warning("PDF conversion failed or LibreOffice not available - will return DOCX instead")
             pdf_path = None
         
-        logger.info(f"Invoice generation process completed successfully - DOCX: {docx_path}, PDF: {pdf_path}")
+        logger.debug("Invoice generation process completed successfully - DOCX: %s, PDF: %s", docx_path, pdf_path)
         return docx_path, pdf_path
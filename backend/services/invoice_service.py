@@ -4,12 +4,15 @@ from datetime import datetime
 from copy import deepcopy
 import re
 import subprocess
+import logging
 
 from docxtpl import DocxTemplate
 from docx import Document
 from docx.oxml.shared import OxmlElement
 from docx.shared import Pt
 
+logger = logging.getLogger(__name__)
+
 
 # -----------------------------
 # HELPERS
@@ -146,8 +149,7 @@ def add_table_row_from_template(table, row_data: list, template_row):
 
         return True
     except Exception as e:
-        print(f"Error adding row (format-preserving): {e}")
-        import traceback; traceback.print_exc()
+        logger.exception("Error adding row (format-preserving): %s", e)
         return False
 
 
@@ -193,8 +195,7 @@ def find_and_fill_summary_table(doc: Document, context: dict, commission_rate: f
             process_table(t)
         return True
     except Exception as e:
-        print(f"Error filling summary table: {e}")
-        import traceback; traceback.print_exc()
+        logger.exception("Error filling summary table: %s", e)
         return False
 
 
@@ -221,11 +222,10 @@ def replace_placeholders_everywhere(doc: Document, context: dict):
                 if new != orig:
                     t.text = new
                     changed += 1
-        print(f"Sweep replaced text nodes: {changed}")
+        logger.debug("Sweep replaced text nodes: %s", changed)
         return True
     except Exception as e:
-        print(f"Error sweeping placeholders (iter): {e}")
-        import traceback; traceback.print_exc()
+        logger.exception("Error sweeping placeholders (iter): %s", e)
         return False
 
 
@@ -241,9 +241,9 @@ def list_unresolved_placeholders(doc: Document):
             for m in token_re.findall(t.text):
                 found.add(m)
     if found:
-        print("Unresolved placeholders still in document:", sorted(found))
+        logger.warning("Unresolved placeholders still in document: %s", sorted(found))
     else:
-        print("No unresolved placeholders detected.")
+        logger.debug("No unresolved placeholders detected.")
 
 
 def convert_docx_to_pdf(docx_path: Path, pdf_path: Path | None = None) -> Path | None:
@@ -256,10 +256,10 @@ def convert_docx_to_pdf(docx_path: Path, pdf_path: Path | None = None) -> Path |
              '--outdir', str(pdf_path.parent), str(docx_path)],
             check=True, capture_output=True, text=True
         )
-        print("PDF converted using LibreOffice")
+        logger.info("PDF converted using LibreOffice")
         return pdf_path
     except (subprocess.CalledProcessError, FileNotFoundError):
-        print("LibreOffice not found. Install it for PDF conversion.")
+        logger.warning("LibreOffice not found. Install it for PDF conversion.")
         return None
 
 
@@ -347,7 +347,7 @@ class InvoiceService:
                 money(item.get("total", "")),
             ]
             if not add_table_row_from_template(items_table, row_data, template_row):
-                print(f"Failed to add row {item.get('sl')}")
+                logger.warning("Failed to add row %s", item.get('sl'))
 
         find_and_fill_summary_table(doc, context, commission_rate)
         replace_placeholders_everywhere(doc, context)
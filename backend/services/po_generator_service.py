@@ -13,6 +13,7 @@ from docx import Document
 from docx.shared import Pt
 from docx.oxml.shared import OxmlElement
 from core.database import supabase
+from core.instrumentation import document_stage
 from fastapi import HTTPException
 from services.utils import convert_docx_to_pdf
 
@@ -21,7 +22,7 @@ logger = logging.getLogger(__name__)
 # Create output directory for POs
 OUTPUT_DIR = Path(__file__).parent.parent / "output" / "purchase_orders"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-logger.info(f"PO output directory: {OUTPUT_DIR}")
+logger.debug("PO output directory: %s", OUTPUT_DIR)
 
 # Hardcoded company details (FROM - ASK INTERNATIONAL)
 COMPANY_DETAILS = {
@@ -64,7 +65,7 @@ def parse_date_ddmmyyyy(date_str: str) -> str:
         
         return dt.strftime("%d/%m/%Y")
     except Exception as e:
-        logger.warning(f"Could not parse date {date_str}: {e}")
+        logger.warning("Could not parse date %s: %s", date_str, e)
         return datetime.now().strftime("%d/%m/%Y")
 
 
@@ -77,58 +78,61 @@ class POGeneratorService:
         Generate PO for a purchase order.
         Returns: (docx_path, pdf_path)
         """
-        logger.info(f"Starting PO generation for PO ID: {po_id}")
+        logger.info("Starting PO generation for PO ID: %s", po_id)
         
         # Use persistent output directory if not specified
         if output_dir is None:
             output_dir = OUTPUT_DIR
         
         output_dir.mkdir(parents=True, exist_ok=True)
-        logger.debug(f"Output directory: {output_dir}")
+        logger.debug("Output directory: %s", output_dir)
         
         # Get PO details
-        logger.info(f"Fetching purchase order details for PO ID: {po_id}")
+        logger.debug("Fetching purchase order details for PO ID: %s", po_id)
         po_res = supabase.table("purchase_orders").select("*").eq("po_id", po_id).execute()
         if not po_res.data:
-            logger.error(f"Purchase order not found for PO ID: {po_id}")
+            logger.error("Purchase order not found for PO ID: %s", po_id)
             raise HTTPException(status_code=404, detail="Purchase order not found")
         
         po = po_res.data[0]
-        logger.info(f"PO retrieved: {po.get('po_number')} - Status: {po.get('status')}")
+        logger.debug("PO retrieved: %s - Status: %s", po.get('po_number'), po.get('status'))
+        
+        if po.get("status") == "combined":
+            return POGeneratorService._generate_combined_po(po, template_path, output_dir)
         
         # Get dealer details
-        logger.info(f"Fetching dealer details for dealer ID: {po['dealer_id']}")
+        logger.debug("Fetching dealer details for dealer ID: %s", po['dealer_id'])
         dealer_res = supabase.table("dealers").select("*").eq("dealer_id", str(po["dealer_id"])).execute()
         if not dealer_res.data:
-            logger.error(f"Dealer not found for dealer ID: {po['dealer_id']}")
+            logger.error("Dealer not found for dealer ID: %s", po['dealer_id'])
             raise HTTPException(status_code=404, detail="Dealer not found")
         
         dealer = dealer_res.data[0]
-        logger.info(f"Dealer retrieved: {dealer.get('company_name')}")
+        logger.debug("Dealer retrieved: %s", dealer.get('company_name'))
         
         # Get PO items
-        logger.info(f"Fetching PO items for PO ID: {po_id}")
+        logger.debug("Fetching PO items for PO ID: %s", po_id)
         items_res = supabase.table("purchase_order_items").select("*").eq("po_id", po_id).execute()
         items = items_res.data if items_res.data else []
-        logger.info(f"Retrieved {len(items)} items for PO")
+        logger.debug("Retrieved %s items for PO", len(items))
         
         # Fetch product details for each item
         logger.debug("Fetching product details for items")
         for item in items:
             if item.get("product_id"):
-                logger.debug(f"Fetching product details for product_id: {item['product_id']}")
+                logger.debug("Fetching product details for product_id: %s", item['product_id'])
                 product_res = supabase.table("products").select("name, pack_size").eq("product_id", item["product_id"]).execute()
                 if product_res.data:
                     product = product_res.data[0]
                     item["product_name"] = product.get("name", "")  # Use "name" not "product_name"
                     item["pack_size"] = product.get("pack_size", "")
-                    logger.debug(f"Product details fetched: name={item['product_name']}, pack_size={item['pack_size']}")
+                    logger.debug("Product details fetched: name=%s, pack_size=%s", item['product_name'], item['pack_size'])
                 else:
-                    logger.warning(f"No product found for product_id: {item['product_id']}")
+                    logger.warning("No product found for product_id: %s", item['product_id'])
                     item["product_name"] = ""
                     item["pack_size"] = ""
             else:
-                logger.debug(f"Item has no product_id: {item}")
+                logger.debug("Item has no product_id: %s", item)
                 item["product_name"] = ""
                 item["pack_size"] = ""
         
@@ -140,7 +144,7 @@ class POGeneratorService:
         if not pages:
             pages = [[]]
         
-        logger.info(f"PO will have {len(pages)} page(s)")
+        logger.debug("PO will have %s page(s)", len(pages))
         
         # Generate multi-page PO
         docx_path, pdf_path = POGeneratorService._generate_multi_page_po(
@@ -151,13 +155,53 @@ class POGeneratorService:
             output_dir=output_dir
         )
         
-        logger.info(f"PO generation completed - DOCX: {docx_path}, PDF: {pdf_path}")
+        logger.info("PO generation completed - DOCX: %s, PDF: %s", docx_path, pdf_path)
         return docx_path, pdf_path
     
+    @staticmethod
+    def _generate_combined_po(po: dict, template_path: Path, output_dir: Path) -> tuple:
+        """
+        One PO for a consolidation batch: the combined order's lines (already
+        summed per product by consolidate_purchase_orders), sorted by product
+        name, shipped to our own address instead of a dealer's.
+        """
+        po_id = po["po_id"]
+        items_res = supabase.table("purchase_order_items").select("*").eq("po_id", po_id).execute()
+        items = items_res.data or []
+        
+        # One lookup for all products instead of one per line
+        product_ids = list({item["product_id"] for item in items if item.get("product_id")})
+        products = {}
+        if product_ids:
+            product_res = supabase.table("products").select("product_id, name, pack_size").in_("product_id", product_ids).execute()
+            products = {p["product_id"]: p for p in (product_res.data or [])}
+        for item in items:
+            product = products.get(item.get("product_id"), {})
+            item["product_name"] = product.get("name", "")
+            item["pack_size"] = item.get("pack_size_snapshot") or product.get("pack_size", "")
+        items.sort(key=lambda item: item["product_name"].lower())
+        
+        members_res = supabase.table("purchase_orders").select("po_id", count="exact").eq("combined_po_id", po_id).limit(1).execute()
+        member_count = members_res.count or 0
+        logger.info("Generating combined PO %s: %s lines from %s dealer orders", po.get("po_number"), len(items), member_count)
+        
+        recipient = {
+            "company_name": f"Consolidated from {member_count} dealer orders",
+            "shipping_address": COMPANY_DETAILS["billing_address"],
+        }
+        pages = [items[i:i + ITEMS_PER_PAGE] for i in range(0, len(items), ITEMS_PER_PAGE)] or [[]]
+        return POGeneratorService._generate_multi_page_po(
+            po=po,
+            dealer=recipient,
+            pages=pages,
+            template_path=template_path,
+            output_dir=output_dir
+        )
+    
     @staticmethod
     def _generate_multi_page_po(po: dict, dealer: dict, pages: list, template_path: Path, output_dir: Path) -> tuple:
         """Generate multi-page PO document."""
-        logger.info(f"Generating multi-page PO with {len(pages)} page(s)")
+        logger.debug("Generating multi-page PO with %s page(s)", len(pages))
         
         total_pages = len(pages)
         po_number = po.get("po_number", "")
@@ -166,7 +210,7 @@ class POGeneratorService:
         all_docs = []
         
         for page_num, page_items in enumerate(pages, 1):
-            logger.info(f"Processing page {page_num} of {total_pages}")
+            logger.debug("Processing page %s of %s", page_num, total_pages)
             
             # Create context for this page
             context = {
@@ -190,131 +234,137 @@ class POGeneratorService:
                 "DEALER_SHIPPING_ADDR": dealer.get("shipping_address", ""),
             }
             
-            logger.debug(f"Context created: {context}")
+            logger.debug("Context created: %s", context)
             
             # Load template and render
-            logger.debug(f"Loading template from: {template_path}")
-            tpl = DocxTemplate(template_path)
-            logger.debug(f"Rendering template with context for page {page_num}")
-            logger.debug(f"Context keys: {list(context.keys())}")
-            logger.debug(f"Context values: {context}")
+            logger.debug("Loading template from: %s", template_path)
+            with document_stage("purchase_order", "render"):
+                tpl = DocxTemplate(template_path)
+                logger.debug("Rendering template with context for page %s", page_num)
+                logger.debug("Context keys: %s", list(context.keys()))
+                logger.debug("Context values: %s", context)
             
-            try:
-                tpl.render(context)
-                logger.debug(f"Template rendered successfully")
-            except Exception as e:
-                logger.error(f"Error rendering template: {e}", exc_info=True)
+                try:
+                    tpl.render(context)
+                    logger.debug("Template rendered successfully")
+                except Exception as e:
+                    logger.error("Error rendering template: %s", e, exc_info=True)
             
-            buf = BytesIO()
-            tpl.save(buf)
+                buf = BytesIO()
+                tpl.save(buf)
             
-            doc = Document(BytesIO(buf.getvalue()))
-            logger.debug(f"Document created from template for page {page_num}")
+                doc = Document(BytesIO(buf.getvalue()))
+            logger.debug("Document created from template for page %s", page_num)
             
-            # Find and populate items table
-            logger.debug(f"Finding items table in document")
-            items_table = POGeneratorService._find_items_table(doc)
-            if items_table and len(items_table.rows) >= 2:
-                logger.debug(f"Items table found with {len(items_table.rows)} rows")
-                template_row = items_table.rows[1]
+            with document_stage("purchase_order", "rows"):
+                # Find and populate items table
+                logger.debug("Finding items table in document")
+                items_table = POGeneratorService._find_items_table(doc)
+                if items_table and len(items_table.rows) >= 2:
+                    logger.debug("Items table found with %s rows", len(items_table.rows))
+                    template_row = items_table.rows[1]
                 
-                # Remove existing rows (keep header)
-                for row in list(items_table.rows)[1:]:
-                    items_table._tbl.remove(row._tr)
-                logger.debug(f"Cleared existing rows from items table")
+                    # Remove existing rows (keep header)
+                    for row in list(items_table.rows)[1:]:
+                        items_table._tbl.remove(row._tr)
+                    logger.debug("Cleared existing rows from items table")
                 
-                # Add items and fill remaining rows to 30
-                logger.debug(f"Adding {len(page_items)} items to table")
-                for idx, item in enumerate(page_items, 1):
-                    # Get product name from item (should be populated from product details fetch)
-                    product_name = item.get("product_name", "")
-                    pack_size = item.get("pack_size", "")
-                    quantity = item.get("quantity", "")
+                    # Add items and fill remaining rows to 30
+                    logger.debug("Adding %s items to table", len(page_items))
+                    for idx, item in enumerate(page_items, 1):
+                        # Get product name from item (should be populated from product details fetch)
+                        product_name = item.get("product_name", "")
+                        pack_size = item.get("pack_size", "")
+                        quantity = item.get("quantity", "")
                     
-                    logger.debug(f"Item {idx}: product_name='{product_name}', pack_size='{pack_size}', quantity='{quantity}'")
+                        logger.debug("Item %s: product_name='%s', pack_size='%s', quantity='%s'", idx, product_name, pack_size, quantity)
                     
-                    row_data = [
-                        str(idx),  # Sl #
-                        po_number,  # Invoice # (use PO_NO)
-                        parse_date_ddmmyyyy(po.get("po_date", "")),  # PO Date
-                        product_name,  # Product Name
-                        str(pack_size),  # Pkt Size
-                        str(quantity),  # Qty
-                    ]
-                    logger.debug(f"Row data: {row_data}")
-                    POGeneratorService._add_table_row_from_template(items_table, row_data, template_row)
+                        row_data = [
+                            str(idx),  # Sl #
+                            po_number,  # Invoice # (use PO_NO)
+                            parse_date_ddmmyyyy(po.get("po_date", "")),  # PO Date
+                            product_name,  # Product Name
+                            str(pack_size),  # Pkt Size
+                            str(quantity),  # Qty
+                        ]
+                        logger.debug("Row data: %s", row_data)
+                        POGeneratorService._add_table_row_from_template(items_table, row_data, template_row)
                 
-                # Fill remaining rows with empty rows to make 30 rows total
-                rows_to_fill = ITEMS_PER_PAGE - len(page_items)
-                if rows_to_fill > 0:
-                    logger.debug(f"Filling {rows_to_fill} empty rows to reach {ITEMS_PER_PAGE} rows")
-                    for _ in range(rows_to_fill):
-                        empty_row_data = ["", "", "", "", "", ""]
-                        POGeneratorService._add_table_row_from_template(items_table, empty_row_data, template_row)
+                    # Fill remaining rows with empty rows to make 30 rows total
+                    rows_to_fill = ITEMS_PER_PAGE - len(page_items)
+                    if rows_to_fill > 0:
+                        logger.debug("Filling %s empty rows to reach %s rows", rows_to_fill, ITEMS_PER_PAGE)
+                        for _ in range(rows_to_fill):
+                            empty_row_data = ["", "", "", "", "", ""]
+                            POGeneratorService._add_table_row_from_template(items_table, empty_row_data, template_row)
                 
-                logger.debug(f"All items and empty rows added to table for page {page_num}")
-            else:
-                logger.warning(f"Items table not found or insufficient rows on page {page_num}")
+                    logger.debug("All items and empty rows added to table for page %s", page_num)
+                else:
+                    logger.warning("Items table not found or insufficient rows on page %s", page_num)
             
             # Replace any remaining placeholders in the document
-            logger.debug(f"Replacing placeholders in document")
-            result = POGeneratorService._replace_placeholders_everywhere(doc, context)
-            logger.debug(f"Placeholder replacement result: {result}")
+            logger.debug("Replacing placeholders in document")
+            with document_stage("purchase_order", "placeholders"):
+                result = POGeneratorService._replace_placeholders_everywhere(doc, context)
+            logger.debug("Placeholder replacement result: %s", result)
             
             all_docs.append(doc)
-            logger.info(f"Page {page_num} document completed and added to collection")
+            logger.debug("Page %s document completed and added to collection", page_num)
         
         # Merge all documents
-        logger.info(f"Merging {len(all_docs)} document(s)")
+        logger.debug("Merging %s document(s)", len(all_docs))
         if not all_docs:
             logger.error("No documents were generated")
             raise RuntimeError("No documents generated")
         
-        merged_doc = all_docs[0]
-        logger.debug(f"Starting with first document as base")
+        with document_stage("purchase_order", "merge"):
+            merged_doc = all_docs[0]
+            logger.debug("Starting with first document as base")
         
-        for idx, doc in enumerate(all_docs[1:], 1):
-            logger.debug(f"Merging document {idx + 1} into merged document")
-            # Append body elements from other documents, excluding section properties
-            # Section properties (sectPr) should not be copied to avoid formatting conflicts
-            w_ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-            sectPr_tag = f'{{{w_ns}}}sectPr'
+            for idx, doc in enumerate(all_docs[1:], 1):
+                logger.debug("Merging document %s into merged document", idx + 1)
+                # Append body elements from other documents, excluding section properties
+                # Section properties (sectPr) should not be copied to avoid formatting conflicts
+                w_ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+                sectPr_tag = f'{{{w_ns}}}sectPr'
             
-            first_element = True
-            for element in doc.element.body:
-                # Skip section properties to preserve first page formatting
-                if element.tag == sectPr_tag:
-                    logger.debug(f"Skipping section properties element to preserve formatting")
-                    continue
+                first_element = True
+                for element in doc.element.body:
+                    # Skip section properties to preserve first page formatting
+                    if element.tag == sectPr_tag:
+                        logger.debug("Skipping section properties element to preserve formatting")
+                        continue
                 
-                # For the first element of subsequent documents, add page break to it
-                if first_element:
-                    element_copy = deepcopy(element)
-                    # Add page break to the first element's paragraph properties
-                    w_p_tag = f'{{{w_ns}}}p'
-                    if element_copy.tag == w_p_tag:
-                        pPr = element_copy.find(f'{{{w_ns}}}pPr')
-                        if pPr is None:
-                            pPr = OxmlElement('w:pPr')
-                            element_copy.insert(0, pPr)
-                        # Insert page break at the beginning of pPr
-                        pageBreak = OxmlElement('w:pageBreakBefore')
-                        pPr.insert(0, pageBreak)
-                        logger.debug(f"Added page break to first element of page {idx + 1}")
-                    first_element = False
-                    merged_doc.element.body.append(element_copy)
-                else:
-                    merged_doc.element.body.append(deepcopy(element))
+                    # For the first element of subsequent documents, add page break to it
+                    if first_element:
+                        element_copy = deepcopy(element)
+                        # Add page break to the first element's paragraph properties
+                        w_p_tag = f'{{{w_ns}}}p'
+                        if element_copy.tag == w_p_tag:
+                            pPr = element_copy.find(f'{{{w_ns}}}pPr')
+                            if pPr is None:
+                                pPr = OxmlElement('w:pPr')
+                                element_copy.insert(0, pPr)
+                            # Insert page break at the beginning of pPr
+                            pageBreak = OxmlElement('w:pageBreakBefore')
+                            pPr.insert(0, pageBreak)
+                            logger.debug("Added page break to first element of page %s", idx + 1)
+                        first_element = False
+                        merged_doc.element.body.append(element_copy)
+                    else:
+                        merged_doc.element.body.append(deepcopy(element))
         
         # Save DOCX
         docx_filename = f"PO_{po_number}.docx"
         docx_path = output_dir / docx_filename
-        logger.info(f"Saving DOCX to: {docx_path}")
-        merged_doc.save(docx_path)
-        logger.info(f"DOCX saved successfully")
+        logger.debug("Saving DOCX to: %s", docx_path)
+        with document_stage("purchase_order", "save"):
+            merged_doc.save(docx_path)
+        logger.debug("DOCX saved successfully")
         
         # Try to convert to PDF
-        pdf_path = convert_docx_to_pdf(docx_path)
+        with document_stage("purchase_order", "pdf_convert"):
+            pdf_path = convert_docx_to_pdf(docx_path)
         
         return docx_path, pdf_path
     
@@ -339,7 +389,7 @@ class POGeneratorService:
                         t.text = new
             return True
         except Exception as e:
-            logger.error(f"Error replacing placeholders: {e}")
+            logger.error("Error replacing placeholders: %s", e)
             return False
     
     @staticmethod
@@ -414,6 +464,6 @@ class POGeneratorService:
 
             return True
         except Exception as e:
-            logger.error(f"Error adding row: {e}")
+            logger.error("Error adding row: %s", e)
             return False
     
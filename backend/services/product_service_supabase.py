@@ -2,8 +2,12 @@
 from typing import Optional, List, Dict, Any
 from core.database import supabase
 import boto3
+import logging
+import time
 from botocore.client import Config
 
+logger = logging.getLogger(__name__)
+
 class ProductServiceSB:
     BUCKET_NAME = "products"
     S3_ENDPOINT = "https://wauzatpesevxqkbqbwpl.storage.supabase.co/storage/v1/s3"
@@ -28,6 +32,15 @@ class ProductServiceSB:
             )
         return ProductServiceSB._s3_client
 
+    @staticmethod
+    def signed_url_epoch() -> int:
+        """
+        Changes every half expiration period. Part of the product ETags, so
+        a client revalidating a cached body is never kept on image URLs
+        signed more than EXPIRATION_SECONDS / 2 ago.
+        """
+        return int(time.time()) // (ProductServiceSB.EXPIRATION_SECONDS // 2)
+
     @staticmethod
     def _generate_image_url(image_filename: Optional[str]) -> Optional[str]:
         """Generate signed URL for product image using S3 protocol."""
@@ -45,7 +58,7 @@ class ProductServiceSB:
             return signed_url
         except Exception as e:
             # Log error and return None if URL generation fails
-            print(f"Error generating signed URL for {image_filename}: {str(e)}")
+            logger.error("Error generating signed URL for %s: %s", image_filename, e)
             return None
 
     @staticmethod
@@ -1,70 +1,108 @@
 # services/purchase_order_service_supabase.py
-from datetime import datetime, timezone
+import asyncio
+from datetime import date, datetime, timezone
 from decimal import Decimal
+from typing import List, Optional
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from core.database import supabase
+from core.logging import get_logger
+from repositories import get_async_purchase_order_repository, get_purchase_order_repository
+from services.settings_service_supabase import SettingsServiceSB
+
+logger = get_logger(__name__)
+
+# Fields a summary listing (view=summary / fields=) can return. total_inc_vat
+# is not stored; it is derived from the two stored totals
+ORDER_SUMMARY_FIELDS = (
+    "po_id", "po_number", "po_date", "status", "dealer_id", "created_by_user",
+    "approved_at", "combined_po_id", "total_tp", "total_vat", "vat_percent", "total_inc_vat",
+)
+DEFAULT_SUMMARY_FIELDS = ("po_id", "po_number", "po_date", "status", "total_inc_vat")
+_SUMMARY_SOURCES = {"total_inc_vat": ("total_tp", "total_vat")}
+_NUMERIC_SUMMARY_FIELDS = {"total_tp", "total_vat", "vat_percent"}
+
+# Status changes admins can apply in bulk: target -> statuses it may come
+# from. Only the approval the single-order endpoint already does; the
+# revenue rollup, invoice download and approved lists only know "approved"
+BULK_TRANSITIONS = {
+    "approved": ("submitted",),
+}
+
+
+def _decimal(value) -> Decimal:
+    return Decimal(str(value))
+
+
+def _summary_row(row: dict, fields: List[str]) -> dict:
+    out = {}
+    for field in fields:
+        if field == "total_inc_vat":
+            total_tp, total_vat = row.get("total_tp"), row.get("total_vat")
+            out[field] = None if total_tp is None or total_vat is None else float(_decimal(total_tp) + _decimal(total_vat))
+        elif field in _NUMERIC_SUMMARY_FIELDS and row.get(field) is not None:
+            out[field] = float(row[field])
+        else:
+            out[field] = row.get(field)
+    return out
 
-from datetime import datetime, timezone
 
 def _with_required_fields(order: dict) -> dict:
-    # 1) dealer (nested)
-    dealer = None
-    if order.get("dealer_id"):
-        dres = supabase.table("dealers").select("*").eq("dealer_id", order["dealer_id"]).execute()
-        dealer = dres.data[0] if dres.data else None
-
-    # 2) items (list)
-    ires = supabase.table("purchase_order_items").select("*").eq("po_id", order["po_id"]).execute()
-    items = ires.data or []
-
-    # 2a) attach product to each item (bulk fetch for efficiency)
-    if items:
-        product_ids = list({it["product_id"] for it in items if it.get("product_id")})
-        if product_ids:
-            pres = supabase.table("products").select("*").in_("product_id", product_ids).execute()
-            product_map = {p["product_id"]: p for p in (pres.data or [])}
-        else:
-            product_map = {}
-
-        # inject nested product and calculate line totals
-        for it in items:
-            product = product_map.get(it.get("product_id"))
-            it["product"] = product
-            # Calculate unit_price and total_price from product data
-            if product:
-                unit_price = Decimal(str(product.get("trade_price_incl_vat", "0")))
-                it["unit_price"] = float(unit_price)
-                it["total_price"] = float(unit_price * Decimal(it.get("quantity", 0)))
-                it["pack_size_snapshot"] = product.get("pack_size")
-
-    # 3) Calculate totals from items
-    total_tp = Decimal("0.00")
+    """
+    Shape a hydrated order for the response from its stored prices.
+
+    Line prices, totals and the VAT rate are snapshotted when the order is
+    written, so an order keeps its prices when the catalog or VAT setting
+    changes. Rows written before the snapshots existed (NULL columns) fall
+    back to the current product price and VAT rate.
+    """
+    items = order.get("items") or []
+
     for it in items:
-        total_tp += Decimal(str(it.get("total_price", 0)))
-    
-    total_vat = (total_tp * VAT_PERCENT / Decimal("100")).quantize(Decimal("0.01"))
+        product = it.get("product") or {}
+        if it.get("unit_price") is None and product:
+            it["unit_price"] = float(_decimal(product.get("trade_price_incl_vat", "0")))
+        if it.get("total_price") is None and it.get("unit_price") is not None:
+            it["total_price"] = float(_decimal(it["unit_price"]) * Decimal(it.get("quantity", 0)))
+        if it.get("pack_size_snapshot") is None:
+            it["pack_size_snapshot"] = product.get("pack_size")
+
+    if order.get("total_tp") is not None:
+        total_tp = _decimal(order["total_tp"])
+    else:
+        total_tp = sum((_decimal(it.get("total_price") or 0) for it in items), Decimal("0.00"))
+
+    if order.get("vat_percent") is not None:
+        vat_percent = _decimal(order["vat_percent"])
+    elif order.get("total_vat") is not None and total_tp:
+        vat_percent = (_decimal(order["total_vat"]) * 100 / total_tp).quantize(Decimal("0.01"))
+    else:
+        vat_percent = SettingsServiceSB.get_vat_percent()
+
+    if order.get("total_vat") is not None:
+        total_vat = _decimal(order["total_vat"])
+    else:
+        total_vat = (total_tp * vat_percent / Decimal("100")).quantize(Decimal("0.01"))
     total_inc_vat = (total_tp + total_vat).quantize(Decimal("0.01"))
 
-    # 4) created_at / updated_at (your table doesn't have these; synthesize)
+    # created_at / updated_at (your table doesn't have these; synthesize)
     now_iso = datetime.now(timezone.utc).isoformat()
     created_at = order.get("created_at") or now_iso
     updated_at = order.get("updated_at") or created_at
 
     return {
         **order,
-        "dealer": dealer,
         "items": items,
         "created_at": created_at,
         "updated_at": updated_at,
-        "total_ex_vat": float(total_tp),
+        "total_tp": float(total_tp),
         "total_vat": float(total_vat),
+        "total_ex_vat": float(total_tp),
         "total_inc_vat": float(total_inc_vat),
-        "vat_percent": float(VAT_PERCENT),
+        "vat_percent": float(vat_percent),
         "vat_amount": float(total_vat),
     }
 
-VAT_PERCENT = Decimal("15.00")
-
 class PurchaseOrderServiceSB:
     @staticmethod
     def _get_dealer_initials(dealer_id: str) -> str:
@@ -139,230 +177,288 @@ class PurchaseOrderServiceSB:
         return f"{prefix}-{sequence_num:03d}"
 
     @staticmethod
-    def create_purchase_order_as_admin(order_in, admin_user_id: str):
+    def _build_items(items_in):
         """
-        Create a purchase order as admin for a specific dealer.
-        The dealer_id must be specified in order_in.
+        Price requested items from the current catalog in one query.
+        Returns (items_payload, total_ex_vat).
         """
-        # 1) Validate dealer exists (no user validation needed for admin)
-        d = supabase.table("dealers").select("dealer_id") \
-            .eq("dealer_id", str(order_in.dealer_id)).execute()
-        if not d.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dealer not found.")
-
-        # 2) Generate po_number BEFORE creating the PO to avoid race conditions
-        existing_pos = supabase.table("purchase_orders").select("*", count="exact") \
-            .eq("dealer_id", str(order_in.dealer_id)) \
-            .execute()
-        
-        sequence_num = (existing_pos.count or 0) + 1
-        po_number = PurchaseOrderServiceSB._format_po_number(str(order_in.dealer_id), sequence_num)
-
-        # 3) Create PO with generated po_number
-        po_payload = {
-            "po_number": po_number,
-            "dealer_id": str(order_in.dealer_id),
-            "created_by_user": str(admin_user_id),
-            "po_date": datetime.now(timezone.utc).isoformat(),
-            "status": "draft",
-        }
-        po_res = supabase.table("purchase_orders").insert(po_payload).execute()
-        if not po_res.data:
-            raise HTTPException(status_code=500, detail="Failed to create purchase order")
-        po = po_res.data[0]
-        po_id = po["po_id"]
+        product_ids = list({str(it.product_id) for it in items_in})
+        product_map = {}
+        if product_ids:
+            p = supabase.table("products").select("product_id,trade_price_incl_vat,pack_size") \
+                .in_("product_id", product_ids).execute()
+            product_map = {str(pr["product_id"]): pr for pr in (p.data or [])}
 
-        # 4) Insert items and compute totals
         total_ex_vat = Decimal("0.00")
         items_payload = []
-        for it in order_in.items:
-            # fetch product
-            p = supabase.table("products").select("product_id,trade_price_incl_vat,pack_size") \
-                .eq("product_id", str(it.product_id)).execute()
-            if not p.data:
+        for it in items_in:
+            pr = product_map.get(str(it.product_id))
+            if not pr:
                 raise HTTPException(status_code=404, detail=f"Product not found: {it.product_id}")
 
-            pr = p.data[0]
             unit_price = Decimal(str(pr["trade_price_incl_vat"]))
             line_total = unit_price * Decimal(it.quantity)
             total_ex_vat += line_total
 
             items_payload.append({
-                "po_id": po_id,
                 "product_id": str(pr["product_id"]),
                 "quantity": it.quantity,
+                "unit_price": float(unit_price),
+                "total_price": float(line_total),
+                "pack_size_snapshot": pr.get("pack_size"),
             })
+        return items_payload, total_ex_vat
 
-        if items_payload:
-            supabase.table("purchase_order_items").insert(items_payload).execute()
-
-        vat_amount = (total_ex_vat * VAT_PERCENT / Decimal("100")).quantize(Decimal("0.01"))
-        total_inc_vat = (total_ex_vat + vat_amount).quantize(Decimal("0.01"))
-
-        supabase.table("purchase_orders").update({
+    @staticmethod
+    def _totals(total_ex_vat: Decimal) -> dict:
+        """Order totals with the VAT rate they were computed at, stored alongside them."""
+        vat_percent = SettingsServiceSB.get_vat_percent()
+        vat_amount = (total_ex_vat * vat_percent / Decimal("100")).quantize(Decimal("0.01"))
+        return {
             "total_tp": str(total_ex_vat.quantize(Decimal("0.01"))),
             "total_vat": str(vat_amount),
-        }).eq("po_id", po_id).execute()
-
-        # 6) Return final PO
-        out = supabase.table("purchase_orders").select("*").eq("po_id", po_id).execute()
-        order = out.data[0] if out.data else None
-        if not order:
-            raise HTTPException(status_code=500, detail="Purchase order not found after create")
-        return _with_required_fields(order)
+            "vat_percent": str(vat_percent),
+        }
 
     @staticmethod
-    def create_purchase_order(order_in, user_id: str):
-        # 1) Validate dealer belongs to user
-        d = supabase.table("dealers").select("dealer_id,user_id") \
-            .eq("dealer_id", str(order_in.dealer_id)).eq("user_id", str(user_id)).execute()
-        if not d.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dealer not found or access denied.")
+    def _create_order(order_in, created_by_user: str):
+        """Number, price and store a new draft order for the dealer in order_in."""
+        repo = get_purchase_order_repository()
 
-        # 2) Generate po_number BEFORE creating the PO to avoid race conditions
-        # Get the maximum sequence number for this dealer by counting all POs for this dealer
-        existing_pos = supabase.table("purchase_orders").select("*", count="exact") \
-            .eq("dealer_id", str(order_in.dealer_id)) \
-            .execute()
-        
-        # Next sequence number is count + 1 (since sequences start at 1)
-        sequence_num = (existing_pos.count or 0) + 1
-        
+        # Generate po_number BEFORE creating the PO to avoid race conditions
+        sequence_num = repo.count_orders(dealer_id=str(order_in.dealer_id)) + 1
         po_number = PurchaseOrderServiceSB._format_po_number(str(order_in.dealer_id), sequence_num)
 
-        # 3) Create PO with generated po_number
+        items_payload, total_ex_vat = PurchaseOrderServiceSB._build_items(order_in.items)
+
         po_payload = {
             "po_number": po_number,
             "dealer_id": str(order_in.dealer_id),
-            "created_by_user": str(user_id),
+            "created_by_user": str(created_by_user),
             "po_date": datetime.now(timezone.utc).isoformat(),
             "status": "draft",
+            **PurchaseOrderServiceSB._totals(total_ex_vat),
         }
-        po_res = supabase.table("purchase_orders").insert(po_payload).execute()
-        if not po_res.data:
-            raise HTTPException(status_code=500, detail="Failed to create purchase order")
-        po = po_res.data[0]
-        po_id = po["po_id"]
-
-        # 4) Insert items and compute totals
-        total_ex_vat = Decimal("0.00")
-        items_payload = []
-        for it in order_in.items:
-            # fetch product
-            p = supabase.table("products").select("product_id,trade_price_incl_vat,pack_size") \
-                .eq("product_id", str(it.product_id)).execute()
-            if not p.data:
-                raise HTTPException(status_code=404, detail=f"Product not found: {it.product_id}")
-
-            pr = p.data[0]
-            unit_price = Decimal(str(pr["trade_price_incl_vat"]))
-            line_total = unit_price * Decimal(it.quantity)
-            total_ex_vat += line_total
-
-            items_payload.append({
-                "po_id": po_id,
-                "product_id": str(pr["product_id"]),
-                "quantity": it.quantity,
-            })
-
-        if items_payload:
-            supabase.table("purchase_order_items").insert(items_payload).execute()
-
-        # 5) Calculate and store totals
-        vat_amount = (total_ex_vat * VAT_PERCENT / Decimal("100")).quantize(Decimal("0.01"))
-        total_inc_vat = (total_ex_vat + vat_amount).quantize(Decimal("0.01"))
-
-        supabase.table("purchase_orders").update({
-            "total_tp": str(total_ex_vat.quantize(Decimal("0.01"))),
-            "total_vat": str(vat_amount),
-        }).eq("po_id", po_id).execute()
+        po_id = repo.create_order(po_payload, items_payload)
 
-        # 6) Return final PO
-        out = supabase.table("purchase_orders").select("*").eq("po_id", po_id).execute()
-        order = out.data[0] if out.data else None
+        order = repo.get_order(po_id)
         if not order:
             raise HTTPException(status_code=500, detail="Purchase order not found after create")
         return _with_required_fields(order)
 
+    @staticmethod
+    def create_purchase_order_as_admin(order_in, admin_user_id: str):
+        """
+        Create a purchase order as admin for a specific dealer.
+        The dealer_id must be specified in order_in.
+        """
+        # Validate dealer exists (no user validation needed for admin)
+        d = supabase.table("dealers").select("dealer_id") \
+            .eq("dealer_id", str(order_in.dealer_id)).execute()
+        if not d.data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dealer not found.")
+        return PurchaseOrderServiceSB._create_order(order_in, admin_user_id)
+
+    @staticmethod
+    def create_purchase_order(order_in, user_id: str):
+        # Validate dealer belongs to user
+        d = supabase.table("dealers").select("dealer_id,user_id") \
+            .eq("dealer_id", str(order_in.dealer_id)).eq("user_id", str(user_id)).execute()
+        if not d.data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dealer not found or access denied.")
+        return PurchaseOrderServiceSB._create_order(order_in, user_id)
+
     @staticmethod
     def get_my_orders(user_id: str, skip: int = 0, limit: int = 100):
-        res = supabase.table("purchase_orders") \
-            .select("*") \
-            .eq("created_by_user", str(user_id)) \
-            .order("po_id", desc=True) \
-            .range(skip, skip + limit - 1) \
-            .execute()
-        orders = res.data or []
+        orders = get_purchase_order_repository().list_orders(created_by_user=str(user_id), skip=skip, limit=limit)
         # IMPORTANT: enrich each order to match your response_model
         return [_with_required_fields(o) for o in orders]
 
     @staticmethod
     def get_my_orders_count(user_id: str) -> int:
         """Get total count of user's purchase orders."""
-        res = supabase.table("purchase_orders") \
-            .select("*", count="exact") \
-            .eq("created_by_user", str(user_id)) \
-            .execute()
-        return res.count or 0
+        return get_purchase_order_repository().count_orders(created_by_user=str(user_id))
 
     @staticmethod
     def get_my_approved_orders(user_id: str, skip: int = 0, limit: int = 100):
-        res = supabase.table("purchase_orders") \
-            .select("*") \
-            .eq("created_by_user", str(user_id)) \
-            .eq("status", "approved") \
-            .order("po_id", desc=True) \
-            .range(skip, skip + limit - 1) \
-            .execute()
-        orders = res.data or []
+        orders = get_purchase_order_repository().list_orders(
+            created_by_user=str(user_id), status="approved", skip=skip, limit=limit
+        )
         # IMPORTANT: enrich each order to match your response_model
         return [_with_required_fields(o) for o in orders]
 
     @staticmethod
     def get_my_approved_orders_count(user_id: str) -> int:
         """Get total count of user's approved purchase orders."""
-        res = supabase.table("purchase_orders") \
-            .select("*", count="exact") \
-            .eq("created_by_user", str(user_id)) \
-            .eq("status", "approved") \
-            .execute()
-        return res.count or 0
+        return get_purchase_order_repository().count_orders(created_by_user=str(user_id), status="approved")
+
+    @staticmethod
+    def resolve_summary_fields(fields: Optional[str]) -> List[str]:
+        """Parse a comma-separated fields= value; po_id is always included."""
+        if not fields:
+            return list(DEFAULT_SUMMARY_FIELDS)
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in ORDER_SUMMARY_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(ORDER_SUMMARY_FIELDS)}",
+            )
+        return ["po_id"] + [f for f in dict.fromkeys(requested) if f != "po_id"]
+
+    @staticmethod
+    def get_order_summaries(fields: List[str], created_by_user: Optional[str] = None,
+                            status: Optional[str] = None, skip: int = 0, limit: int = 100):
+        """
+        One page of order summaries and the total count, in one query: only
+        the columns behind fields are read, and dealers/items are never loaded.
+        """
+        columns = list(dict.fromkeys(c for f in fields for c in _SUMMARY_SOURCES.get(f, (f,))))
+        rows, total = get_purchase_order_repository().list_order_columns(
+            columns,
+            created_by_user=str(created_by_user) if created_by_user is not None else None,
+            status=status,
+            skip=skip,
+            limit=limit,
+        )
+        return [_summary_row(row, fields) for row in rows], total
 
     @staticmethod
     def approve_purchase_order(dealer_id: int, po_id: int):
-        supabase.table("purchase_orders").update({"status": "approved", "approved_at": datetime.now(timezone.utc).isoformat()}).eq("po_id", po_id).eq("dealer_id", str(dealer_id)).execute()
+        get_purchase_order_repository().update_order(
+            po_id,
+            {"status": "approved", "approved_at": datetime.now(timezone.utc).isoformat()},
+            dealer_id=str(dealer_id),
+        )
         return PurchaseOrderServiceSB.get_purchase_order_details(po_id, "", dealer_id)
 
+    @staticmethod
+    def bulk_transition(po_ids: List[int], target: str, include_orders: bool = False) -> dict:
+        """
+        Move many orders to target status with one guarded, set-based
+        update, and report the outcome per id. Revenue rollups and data
+        versions follow through their triggers. Orders are re-read (in
+        batches) only with include_orders.
+        """
+        sources = BULK_TRANSITIONS.get(target)
+        if sources is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Orders can't be moved to {target} in bulk. Allowed: {', '.join(BULK_TRANSITIONS)}",
+            )
+        repo = get_purchase_order_repository()
+        po_ids = list(dict.fromkeys(po_ids))
+        states = repo.get_order_states(po_ids)
+        current = {po_id: state["status"] for po_id, state in states.items()}
+        # Orders folded into a supplier PO stay as they are; the combined
+        # order still buys their quantities
+        combined_into = {po_id: state["combined_po_id"] for po_id, state in states.items() if state.get("combined_po_id")}
+        eligible = [po_id for po_id in po_ids if current.get(po_id) in sources and po_id not in combined_into]
+
+        values = {"status": target}
+        if target == "approved":
+            values["approved_at"] = datetime.now(timezone.utc).isoformat()
+        updated = set(repo.transition_orders(eligible, list(sources), values)) if eligible else set()
+
+        orders = {}
+        if include_orders and updated:
+            orders = {o["po_id"]: _with_required_fields(o) for o in repo.get_orders(sorted(updated))}
+
+        results = []
+        for po_id in po_ids:
+            previous = current.get(po_id)
+            result = {"po_id": po_id, "previous_status": previous, "status": previous}
+            if po_id in updated:
+                result.update(result="updated", status=target, order=orders.get(po_id))
+            elif previous is None:
+                result.update(result="not_found", detail="Purchase Order not found")
+            elif previous == target:
+                result.update(result="unchanged")
+            elif po_id in combined_into:
+                result.update(result="invalid_transition",
+                              detail=f"Order is part of combined order {combined_into[po_id]}")
+            elif previous in sources:
+                # Eligible when read, changed by someone else before the update
+                result.update(result="conflict", status=None, detail="Status changed during the update; retry")
+            else:
+                result.update(result="invalid_transition", detail=f"Can't move a {previous} order to {target}")
+            results.append(result)
+
+        logger.info("Bulk status change to %s: %d of %d orders updated", target, len(updated), len(po_ids))
+        return {"updated": len(updated), "results": results}
+
+    @staticmethod
+    def consolidate_orders(admin_user_id: str, po_ids: Optional[List[int]] = None,
+                           start: Optional[date] = None, end: Optional[date] = None) -> dict:
+        """
+        Combine approved dealer orders into one supplier order for the
+        vendor: its lines are the members' lines summed per product, and
+        each member's combined_po_id points to it. The grouping and the
+        member updates run in the database in one transaction; orders
+        already combined are skipped.
+        """
+        if start and end and start >= end:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+        result = get_purchase_order_repository().consolidate_orders(
+            admin_user_id,
+            po_ids=list(dict.fromkeys(po_ids)) if po_ids else None,
+            start=start.isoformat() if start else None,
+            end=end.isoformat() if end else None,
+        )
+        if result is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No approved purchase orders left to consolidate",
+            )
+        result["total_inc_vat"] = float(_decimal(result["total_tp"]) + _decimal(result["total_vat"]))
+        logger.info("Consolidated %d orders into %s (%d lines)",
+                    len(result["po_ids"]), result["po_number"], result["line_count"])
+        return result
+
     @staticmethod
     def get_all_purchase_orders(skip: int = 0, limit: int = 100):
-        res = supabase.table("purchase_orders") \
-            .select("*") \
-            .order("po_id", desc=True) \
-            .range(skip, skip + limit - 1) \
-            .execute()
-        orders = res.data or []
+        orders = get_purchase_order_repository().list_orders(skip=skip, limit=limit)
         # IMPORTANT: enrich each order to match your response_model
         return [_with_required_fields(o) for o in orders]
 
     @staticmethod
     def get_all_purchase_orders_count() -> int:
         """Get total count of all purchase orders."""
-        res = supabase.table("purchase_orders") \
-            .select("*", count="exact") \
-            .execute()
-        return res.count or 0
+        return get_purchase_order_repository().count_orders()
+
+    @staticmethod
+    async def get_all_purchase_orders_page(skip: int = 0, limit: int = 100):
+        """
+        (orders, total) for one page of all purchase orders. On the postgres
+        backend the page and the count are read concurrently over asyncpg;
+        otherwise both run in the threadpool.
+        """
+        repo = get_async_purchase_order_repository()
+        if repo is None:
+            return await run_in_threadpool(
+                lambda: (
+                    PurchaseOrderServiceSB.get_all_purchase_orders(skip=skip, limit=limit),
+                    PurchaseOrderServiceSB.get_all_purchase_orders_count(),
+                )
+            )
+        orders, total = await asyncio.gather(repo.list_orders(skip=skip, limit=limit), repo.count_orders())
+        # Shaping can fetch the VAT setting (a blocking Supabase call) for
+        # legacy rows, so it stays off the event loop
+        shaped = await run_in_threadpool(lambda: [_with_required_fields(o) for o in orders])
+        return shaped, total
 
     @staticmethod
     def get_purchase_order_details(po_id: int, user_id: str, dealer_id: str = None):
+        repo = get_purchase_order_repository()
         if dealer_id:
-            po = supabase.table("purchase_orders").select("*") \
-             .eq("po_id", po_id).eq("dealer_id", str(dealer_id)).execute()
+            order = repo.get_order(po_id, dealer_id=str(dealer_id))
+        elif user_id:
+            order = repo.get_order(po_id, created_by_user=str(user_id))
         else:
-            po = supabase.table("purchase_orders").select("*") \
-                .eq("po_id", po_id).eq("created_by_user", str(user_id)).execute()
-        if not po.data:
+            order = None
+        if not order:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase Order not found")
-        return _with_required_fields(po.data[0])
+        return _with_required_fields(order)
 
     @staticmethod
     def update_draft_purchase_order(po_id: int, order_update, user_id: str):
@@ -371,40 +467,9 @@ class PurchaseOrderServiceSB:
         if po["status"] != "draft":
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only draft orders can be modified.")
 
-        # delete old items
-        supabase.table("purchase_order_items").delete().eq("po_id", po_id).execute()
-
-        # re-add items
-        total_ex_vat = Decimal("0.00")
-        items_payload = []
-        for it in order_update.items:
-            p = supabase.table("products").select("product_id,trade_price_incl_vat,pack_size") \
-                .eq("product_id", str(it.product_id)).execute()
-            if not p.data:
-                raise HTTPException(status_code=404, detail=f"Product not found: {it.product_id}")
-
-            pr = p.data[0]
-            unit_price = Decimal(str(pr["trade_price_incl_vat"]))
-            line_total = unit_price * Decimal(it.quantity)
-            total_ex_vat += line_total
-
-            items_payload.append({
-                "po_id": po_id,
-                "product_id": str(pr["product_id"]),
-                "quantity": it.quantity,
-            })
-
-        if items_payload:
-            supabase.table("purchase_order_items").insert(items_payload).execute()
-
-        # Calculate and store totals
-        vat_amount = (total_ex_vat * VAT_PERCENT / Decimal("100")).quantize(Decimal("0.01"))
-        total_inc_vat = (total_ex_vat + vat_amount).quantize(Decimal("0.01"))
-
-        supabase.table("purchase_orders").update({
-            "total_tp": str(total_ex_vat.quantize(Decimal("0.01"))),
-            "total_vat": str(vat_amount),
-        }).eq("po_id", po_id).execute()
+        # replace items and stored totals
+        items_payload, total_ex_vat = PurchaseOrderServiceSB._build_items(order_update.items)
+        get_purchase_order_repository().replace_items(po_id, items_payload, PurchaseOrderServiceSB._totals(total_ex_vat))
 
         return PurchaseOrderServiceSB.get_purchase_order_details(po_id, user_id)
 
@@ -413,5 +478,5 @@ class PurchaseOrderServiceSB:
         po = PurchaseOrderServiceSB.get_purchase_order_details(po_id, user_id)
         if po["status"] != "draft":
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only draft orders can be submitted.")
-        supabase.table("purchase_orders").update({"status": "submitted"}).eq("po_id", po_id).execute()
+        get_purchase_order_repository().update_order(po_id, {"status": "submitted"})
         return PurchaseOrderServiceSB.get_purchase_order_details(po_id, user_id)
@@ -1,52 +1,148 @@
 import json
+import threading
+import time
+from decimal import Decimal
+from typing import Optional
+
 from fastapi import HTTPException, status
+from core.config import settings
 from core.database import supabase
+from core.logging import get_logger
+from schemas.settings import AppSettingsRead
+from services.data_version_service import DataVersionService
+
+logger = get_logger(__name__)
+
+# Row of app_settings holding invoice/VAT settings
+SETTINGS_KEY = "invoice"
+
+DEFAULT_SETTINGS = {"vat": 0.15, "commission": 0.15}
 
 
 class SettingsServiceSB:
+    # In-process cache shared by PO totals, invoices and the settings API.
+    # At most every SETTINGS_VERSION_CHECK_MS a read compares the app_settings
+    # change counter (data_versions) with the one the copy was loaded at and
+    # reloads on a mismatch, so a change made through another worker is seen
+    # within that interval. If the counter can't be read, the copy is
+    # reloaded after SETTINGS_CACHE_TTL_SECONDS instead.
+    _cached: Optional[AppSettingsRead] = None
+    _cached_at: float = 0.0
+    _checked_at: float = 0.0
+    _data_version: Optional[int] = None
+    _lock = threading.Lock()
+
     @staticmethod
-    def get_app_settings():
-        """Get current app settings from database"""
-        try:
-            res = supabase.table("app_settings").select("value").limit(1).execute()
-            if res.data and len(res.data) > 0:
-                settings_data = res.data[0].get("value")
-                if isinstance(settings_data, str):
-                    return json.loads(settings_data)
-                return settings_data
-            # Return default settings if none exist
-            return {"vat": 0.15, "commission": 0.15}
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to fetch settings: {str(e)}"
-            )
+    def _parse(raw) -> AppSettingsRead:
+        """Build typed settings from the stored JSON value (string or object)."""
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        return AppSettingsRead(**{**DEFAULT_SETTINGS, **(raw or {})})
 
     @staticmethod
-    def update_app_settings(vat: float, commission: float):
+    def _load() -> AppSettingsRead:
+        res = supabase.table("app_settings").select("value").eq("key", SETTINGS_KEY).limit(1).execute()
+        if res.data:
+            return SettingsServiceSB._parse(res.data[0].get("value"))
+        # Return default settings if none exist
+        return AppSettingsRead(**DEFAULT_SETTINGS)
+
+    @staticmethod
+    def get_settings() -> AppSettingsRead:
+        """Get current app settings, served from the in-process cache while it is current."""
+        cls = SettingsServiceSB
+        check_interval = settings.SETTINGS_VERSION_CHECK_MS / 1000
+        cached = cls._cached
+        if cached is not None and time.monotonic() - cls._checked_at < check_interval:
+            return cached
+
+        with cls._lock:
+            # Another thread may have revalidated while we waited
+            now = time.monotonic()
+            if cls._cached is not None and now - cls._checked_at < check_interval:
+                return cls._cached
+            versions = DataVersionService.get_versions(("app_settings",))
+            data_version = versions["app_settings"] if versions is not None else None
+            if cls._cached is not None and (
+                data_version == cls._data_version if data_version is not None
+                else now - cls._cached_at < settings.SETTINGS_CACHE_TTL_SECONDS
+            ):
+                cls._checked_at = now
+                return cls._cached
+            try:
+                loaded = cls._load()
+            except Exception as e:
+                if cls._cached is not None:
+                    logger.warning("Failed to refresh app settings, serving cached version %s: %s", cls._cached.version, e)
+                    return cls._cached
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to fetch settings: {str(e)}"
+                )
+            if cls._cached is None or loaded.version >= cls._cached.version:
+                if cls._cached is not None and loaded.version != cls._cached.version:
+                    logger.info("App settings changed: version %s -> %s", cls._cached.version, loaded.version)
+                cls._cached = loaded
+            cls._data_version = data_version
+            cls._cached_at = cls._checked_at = time.monotonic()
+            return cls._cached
+
+    @staticmethod
+    def get_vat_percent() -> Decimal:
+        """VAT rate as a percentage, e.g. Decimal('15.00')."""
+        vat = SettingsServiceSB.get_settings().vat
+        return (Decimal(str(vat)) * Decimal("100")).quantize(Decimal("0.01"))
+
+    @staticmethod
+    def invalidate_cache() -> None:
+        """Drop the cached settings so the next read goes to the database."""
+        with SettingsServiceSB._lock:
+            SettingsServiceSB._cached = None
+            SettingsServiceSB._cached_at = SettingsServiceSB._checked_at = 0.0
+            SettingsServiceSB._data_version = None
+
+    @staticmethod
+    def get_app_settings() -> AppSettingsRead:
+        """Get current app settings"""
+        return SettingsServiceSB.get_settings()
+
+    @staticmethod
+    def update_app_settings(vat: float, commission: float) -> AppSettingsRead:
         """Update app settings in database"""
         try:
+            # Millisecond timestamps give a version that increases across workers
+            # without a read-modify-write round trip
             settings_value = {
                 "vat": vat,
-                "commission": commission
+                "commission": commission,
+                "version": time.time_ns() // 1_000_000,
             }
-            
+
             # Update the single settings row (key='invoice')
             update_res = supabase.table("app_settings").update({
                 "value": json.dumps(settings_value)
-            }).eq("key", "invoice").execute()
-            
+            }).eq("key", SETTINGS_KEY).execute()
+
             if not update_res.data:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to update settings"
                 )
-            
-            return settings_value
         except HTTPException:
+            SettingsServiceSB.invalidate_cache()
             raise
         except Exception as e:
+            SettingsServiceSB.invalidate_cache()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to update settings: {str(e)}"
             )
+
+        # Write-through: this worker serves the new values immediately. The
+        # counter this write produced is not known, so the next check reloads
+        updated = AppSettingsRead(**settings_value)
+        with SettingsServiceSB._lock:
+            SettingsServiceSB._cached = updated
+            SettingsServiceSB._cached_at = SettingsServiceSB._checked_at = time.monotonic()
+            SettingsServiceSB._data_version = None
+        return updated
@@ -24,7 +24,7 @@ class UserServiceSB:
         user_data must have: email, password, full_name, role, contact_number
         """
         email = user_data.email.strip().lower()
-        logger.info(f"Creating new user with email: {email}")
+        logger.info("Creating new user with email: %s", email)
 
         # Check if email already exists
         existing = supabase.table("users").select("user_id").eq("email", email).execute()
@@ -42,7 +42,7 @@ class UserServiceSB:
 
         res = supabase.table("users").insert(payload).execute()
         user = res.data[0] if res.data else None
-        logger.info(f"Successfully created user with ID: {user.get('user_id') if user else 'N/A'}")
+        logger.info("Successfully created user with ID: %s", user.get('user_id') if user else 'N/A')
         return user
 
     @staticmethod
@@ -51,7 +51,7 @@ class UserServiceSB:
         Get user by email, or None.
         """
         email = email.strip().lower()
-        logger.debug(f"Searching for user with email: {email}")
+        logger.debug("Searching for user with email: %s", email)
         res = supabase.table("users").select("*").eq("email", email).execute()
         return res.data[0] if res.data else None
 
@@ -60,7 +60,7 @@ class UserServiceSB:
         """
         Get user by ID, or None.
         """
-        logger.debug(f"Searching for user with ID: {str(user_id)[:8]}...")
+        logger.debug("Searching for user with ID: %s...", str(user_id)[:8])
         res = supabase.table("users").select("*").eq("user_id", str(user_id)).execute()
         return res.data[0] if res.data else None
 
@@ -72,17 +72,17 @@ class UserServiceSB:
         Authenticate user with email and password.
         Returns user dict if OK, else None.
         """
-        logger.info(f"Authentication attempt for email: {email}")
+        logger.info("Authentication attempt for email: %s", email)
         user = UserServiceSB.get_user_by_email(email)
         if not user:
-            logger.warning(f"Authentication failed - user not found: {email}")
+            logger.warning("Authentication failed - user not found: %s", email)
             return None
 
         if not verify_password(password, user.get("password_hash", "")):
-            logger.warning(f"Authentication failed - invalid password for user: {email}")
+            logger.warning("Authentication failed - invalid password for user: %s", email)
             return None
 
-        logger.info(f"Authentication successful for user: {email}")
+        logger.info("Authentication successful for user: %s", email)
         return user
 
     @staticmethod
@@ -91,13 +91,13 @@ class UserServiceSB:
         Reset user password.
         Returns True if updated.
         """
-        logger.info(f"Password reset attempt for email: {email}")
+        logger.info("Password reset attempt for email: %s", email)
         user = UserServiceSB.get_user_by_email(email)
         if not user:
-            logger.warning(f"Password reset failed - user not found: {email}")
+            logger.warning("Password reset failed - user not found: %s", email)
             return False
 
         hashed = hash_password(new_password)
         supabase.table("users").update({"password_hash": hashed}).eq("email", email.lower()).execute()
-        logger.info(f"Password reset successful for user: {email}")
+        logger.info("Password reset successful for user: %s", email)
         return True
@@ -4,6 +4,8 @@ import shutil
 import logging
 from pathlib import Path
 
+from core.tracing import span
+
 logger = logging.getLogger(__name__)
 
 def convert_docx_to_pdf(docx_path: Path, pdf_path: Path | None = None) -> Path | None:
@@ -37,19 +39,22 @@ def convert_docx_to_pdf(docx_path: Path, pdf_path: Path | None = None) -> Path |
             str(output_dir)
         ]
         
-        logger.info(f"Converting: {docx_path} -> PDF in {output_dir}")
+        logger.debug("Converting: %s -> PDF in %s", docx_path, output_dir)
         
-        result = subprocess.run(
-            command, 
-            capture_output=True, 
-            text=True, 
-            timeout=120 # Increased timeout for cold starts
-        )
+        with span("libreoffice.convert", **{"document.file": docx_path.name}) as convert_span:
+            result = subprocess.run(
+                command, 
+                capture_output=True, 
+                text=True, 
+                timeout=120 # Increased timeout for cold starts
+            )
+            if convert_span is not None:
+                convert_span.set_attribute("process.exit_code", result.returncode)
         
         if result.returncode != 0:
-            logger.error(f"LibreOffice failed. Return code: {result.returncode}")
-            logger.error(f"Stderr: {result.stderr}")
-            logger.error(f"Stdout: {result.stdout}")
+            logger.error("LibreOffice failed. Return code: %s", result.returncode)
+            logger.error("Stderr: %s", result.stderr)
+            logger.error("Stdout: %s", result.stdout)
             return None
 
         # Verify file creation
@@ -61,17 +66,17 @@ def convert_docx_to_pdf(docx_path: Path, pdf_path: Path | None = None) -> Path |
             if expected_output != pdf_path:
                 expected_output.rename(pdf_path)
             
-            logger.info(f"PDF created successfully: {pdf_path}")
+            logger.info("PDF created successfully: %s", pdf_path)
             return pdf_path
         else:
-            logger.error(f"LibreOffice finished but PDF not found at: {expected_output}")
+            logger.error("LibreOffice finished but PDF not found at: %s", expected_output)
             return None
 
     except subprocess.TimeoutExpired:
         logger.error("LibreOffice conversion timed out.")
         return None
     except Exception as e:
-        logger.error(f"Conversion error: {str(e)}")
+        logger.error("Conversion error: %s", e)
         return None
     finally:
         # Clean up the temporary profile directory
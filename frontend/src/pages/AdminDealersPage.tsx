@@ -43,8 +43,8 @@ const AdminDealersPage: React.FC = () => {
     try {
       setLoading(true);
       setError('');
-      const response = await dealerApi.get('/dealers/admin/all');
-      setDealers(response.data || []);
+      const response = await dealerApi.get('/dealers/admin/all', { params: { limit: 1000 } });
+      setDealers(response.data?.items || []);
     } catch (err: any) {
       setError(err.response?.data?.detail || err.message || 'Failed to load dealers');
     } finally {
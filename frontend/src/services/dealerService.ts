@@ -1,5 +1,5 @@
 import api from './api';
-import { Dealer } from '../types/api';
+import { Dealer, DealerList } from '../types/api';
 
 export const getMyDealerProfile = async (): Promise<Dealer> => {
   const response = await api.dealerApi.get<Dealer>('/dealers/my-profile');
@@ -7,6 +7,8 @@ export const getMyDealerProfile = async (): Promise<Dealer> => {
 };
 
 export const getAllDealers = async (): Promise<Dealer[]> => {
-  const response = await api.dealerApi.get<Dealer[]>('/dealers/admin/all');
-  return response.data;
+  const response = await api.dealerApi.get<DealerList>('/dealers/admin/all', {
+    params: { limit: 1000 },
+  });
+  return response.data.items;
 };
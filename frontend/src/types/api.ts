@@ -71,6 +71,13 @@ export interface Dealer {
   user?: UserRead;
 }
 
+export interface DealerList {
+  items: Dealer[];
+  total: number;
+  skip: number;
+  limit: number;
+}
+
 export enum UserRole {
   BUYER = 'buyer',
   ADMIN = 'admin'